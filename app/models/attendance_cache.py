@@ -0,0 +1,122 @@
+import threading
+from datetime import datetime
+from app.models.database import Database
+
+class AttendanceCache:
+    """Caché en proceso de las asistencias del día y de la información de estudiantes
+
+    Se carga con dos consultas la primera vez que se usa en el día y se
+    invalida sola al cambiar la fecha; las ediciones manuales de asistencia
+    deben llamar a invalidate().
+    """
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AttendanceCache, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+    
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self.db = Database()
+        self.lock = threading.RLock()
+        self.date = None
+        self.marked_today = set()
+        self.student_info = {}
+    
+    @staticmethod
+    def today():
+        return datetime.now().strftime("%Y-%m-%d")
+    
+    def ensure_current(self):
+        """Recargar la caché si cambió el día o fue invalidada"""
+        today = self.today()
+        with self.lock:
+            if self.date != today:
+                self.warm(today)
+    
+    def warm(self, fecha):
+        """Cargar asistencias del día e información de todos los estudiantes"""
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT estudiante_id FROM asistencias WHERE fecha = ?", (fecha,))
+            marked_today = {str(row[0]) for row in cursor.fetchall()}
+            
+            cursor.execute("""
+                SELECT e.id, e.nombre, e.apellido, e.codigo, n.nombre as nivel, g.nombre as grado, s.nombre as seccion
+                FROM estudiantes e
+                LEFT JOIN niveles n ON e.nivel_id = n.id
+                LEFT JOIN grados g ON e.grado_id = g.id
+                LEFT JOIN secciones s ON e.seccion_id = s.id
+            """)
+            student_info = {str(row[0]): self._info_from_row(row[1:]) for row in cursor.fetchall()}
+        finally:
+            conn.close()
+        
+        with self.lock:
+            self.marked_today = marked_today
+            self.student_info = student_info
+            self.date = fecha
+    
+    @staticmethod
+    def _info_from_row(row):
+        nombre, apellido, codigo, nivel, grado, seccion = row
+        return {
+            'nombre': f"{nombre} {apellido}",
+            'codigo': codigo or 'No asignado',
+            'nivel': nivel or 'No asignado',
+            'grado': grado or 'No asignado',
+            'seccion': seccion or 'No asignado'
+        }
+    
+    def invalidate(self):
+        """Forzar una recarga completa en el próximo uso (ediciones manuales)"""
+        with self.lock:
+            self.date = None
+    
+    def is_marked(self, student_id):
+        """Indica si el estudiante ya tiene asistencia registrada hoy"""
+        self.ensure_current()
+        with self.lock:
+            return str(student_id) in self.marked_today
+    
+    def mark(self, student_id):
+        """Registrar en la caché una asistencia ya guardada en la base de datos"""
+        self.ensure_current()
+        with self.lock:
+            self.marked_today.add(str(student_id))
+    
+    def get_student_info(self, student_id):
+        """Información del estudiante; consulta la base de datos solo si no está en caché"""
+        self.ensure_current()
+        key = str(student_id)
+        with self.lock:
+            info = self.student_info.get(key)
+        if info is not None:
+            return info
+        
+        # Estudiante agregado después de cargar la caché
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT e.nombre, e.apellido, e.codigo, n.nombre as nivel, g.nombre as grado, s.nombre as seccion
+                FROM estudiantes e
+                LEFT JOIN niveles n ON e.nivel_id = n.id
+                LEFT JOIN grados g ON e.grado_id = g.id
+                LEFT JOIN secciones s ON e.seccion_id = s.id
+                WHERE e.id = ?
+            """, (student_id,))
+            row = cursor.fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        info = self._info_from_row(row)
+        with self.lock:
+            self.student_info[key] = info
+        return info
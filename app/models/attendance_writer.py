@@ -0,0 +1,112 @@
+import threading
+from datetime import datetime
+from PySide6.QtCore import QThread, Signal
+from app.models.database import Database
+
+class AttendanceWriter(QThread):
+    """Cola write-behind de asistencias automáticas
+
+    Las detecciones se acumulan (una por estudiante y fecha) y se guardan en
+    una sola transacción cada flush_interval_ms o al llegar a max_batch
+    registros. Los resultados se informan por señales, sin diálogos modales.
+    Un lote que falla puede volver a la cola con requeue() hasta max_retries
+    veces.
+    """
+    records_flushed = Signal(list)      # dicts: student_id, fecha, hora, estado, metodo, inserted
+    flush_failed = Signal(str, list)    # (mensaje de error, registros no guardados)
+    
+    def __init__(self, flush_interval_ms=500, max_batch=50, max_retries=3):
+        super().__init__()
+        self.db = Database()
+        self.flush_interval_ms = flush_interval_ms
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self._pending = {}  # (student_id, fecha) -> registro; la primera detección del día se conserva
+        self._condition = threading.Condition()
+        self.running = False
+    
+    def start_writing(self):
+        if not self.isRunning():
+            self.running = True
+            self.start()
+    
+    def stop_writing(self):
+        """Detener el hilo guardando antes lo pendiente"""
+        with self._condition:
+            self.running = False
+            self._condition.notify()
+        self.wait()
+    
+    def enqueue(self, student_id, estado='presente', metodo='reconocimiento_facial'):
+        """Encolar una asistencia sin bloquear; devuelve la hora registrada"""
+        now = datetime.now()
+        fecha, hora = now.strftime("%Y-%m-%d"), now.strftime("%H:%M:%S")
+        with self._condition:
+            key = (str(student_id), fecha)
+            if key not in self._pending:
+                self._pending[key] = {
+                    'student_id': str(student_id),
+                    'fecha': fecha,
+                    'hora': hora,
+                    'estado': estado,
+                    'metodo': metodo
+                }
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify()
+        return hora
+    
+    def requeue(self, records):
+        """Devolver a la cola los registros de un lote fallido
+
+        Se conservan la fecha y la hora de la detección original. Devuelve los
+        registros que agotaron sus reintentos y no se volverán a intentar.
+        """
+        dropped = []
+        with self._condition:
+            for record in records:
+                record['attempts'] = record.get('attempts', 0) + 1
+                if record['attempts'] > self.max_retries:
+                    dropped.append(record)
+                else:
+                    self._pending.setdefault((record['student_id'], record['fecha']), record)
+        return dropped
+    
+    def run(self):
+        while True:
+            with self._condition:
+                if self.running and len(self._pending) < self.max_batch:
+                    self._condition.wait(self.flush_interval_ms / 1000.0)
+                batch = list(self._pending.values())
+                self._pending.clear()
+                finished = not self.running
+            if batch:
+                self.flush(batch)
+            # El checkpoint periódico del WAL corre aquí para no bloquear la interfaz
+            self.db.maybe_checkpoint()
+            if finished:
+                break
+    
+    def flush(self, batch):
+        """Guardar un lote en una sola transacción respetando UNIQUE(estudiante_id, fecha)"""
+        conn = None
+        try:
+            conn = self.db.connect()
+            cursor = conn.cursor()
+            for record in batch:
+                cursor.execute("""
+                    INSERT INTO asistencias (estudiante_id, fecha, hora, estado, metodo)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(estudiante_id, fecha) DO NOTHING
+                """, (record['student_id'], record['fecha'], record['hora'], record['estado'], record['metodo']))
+                record['inserted'] = cursor.rowcount == 1
+            conn.commit()
+        except Exception as e:
+            print(f"Error guardando asistencias: {e}")
+            if conn:
+                conn.rollback()
+            self.flush_failed.emit(str(e), batch)
+            return
+        finally:
+            if conn:
+                conn.close()
+        self.records_flushed.emit(batch)
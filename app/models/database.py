@@ -1,6 +1,467 @@
 from PySide6.QtWidgets import QSizePolicy
+from PySide6.QtCore import QObject, Signal
 import os
 import sqlite3  # Añadir esta línea
+import threading
+import time
+from contextlib import contextmanager
+from app.utils.settings import get_setting
+from app.models.student_codes import format_codigo, split_codigo
+from app.models.queries import (EMOCIONES_RESUMEN_SQL, EMOCIONES_POR_HORA_SQL, EMOCIONES_POR_DIA_SQL,
+                                EMOCIONES_POR_DIA_PDF_SQL, HORARIOS_SECCION_SQL, HORARIOS_PROFESOR_SQL,
+                                ASISTENCIAS_RECIENTES_SQL, ESTUDIANTES_ASISTENCIA_SQL, ESTUDIANTE_POR_CODIGO_SQL,
+                                estudiantes_filter_sql, emails_registrados_sql)
+
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'database.db')
+
+# Perfiles de rendimiento de SQLite (sección 'database' de data/settings.json).
+# journal_mode es persistente y se aplica en setup(); el resto se aplica a cada
+# conexión nueva. wal_autocheckpoint y journal_size_limit limitan el tamaño del WAL.
+PERFORMANCE_PROFILES = {
+    'safe': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,            # KiB (valor por defecto de SQLite)
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,           # ~16 MB
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 1000,     # páginas
+        'journal_size_limit': 32 * 1024 * 1024,
+    },
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,           # ~64 MB
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 2000,
+        'journal_size_limit': 64 * 1024 * 1024,
+    },
+}
+
+# Columnas agregadas después de la primera versión del esquema: tabla -> [(columna, tipo)]
+LEGACY_COLUMNS = {
+    'estudiantes': [('nivel_id', 'INTEGER'), ('grado_id', 'INTEGER'), ('seccion_id', 'INTEGER'),
+                    ('codigo', 'TEXT'), ('foto_path', 'TEXT'), ('facial_data_path', 'TEXT')],
+    'eventos': [('fecha', 'TEXT'), ('hora', 'TEXT'), ('tipo', 'TEXT')],
+    'asistencias': [('metodo', 'TEXT')],
+}
+
+def _add_legacy_columns(cursor):
+    """Agregar a bases antiguas las columnas de LEGACY_COLUMNS que falten"""
+    for table, columns in LEGACY_COLUMNS.items():
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        for column, column_type in columns:
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                print(f"Added {column} column to {table} table")
+
+def _index_estudiantes_codigo(cursor):
+    """Índice por código solo si la tabla no lo tiene ya (UNIQUE crea uno automático)"""
+    for index in cursor.execute("PRAGMA index_list(estudiantes)").fetchall():
+        columns = [row[2] for row in cursor.execute(f"PRAGMA index_info({index[1]})")]
+        if columns[:1] == ['codigo']:
+            return
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_estudiantes_codigo ON estudiantes (codigo)")
+
+def _backfill_codigo_secuencias(cursor):
+    """Iniciar cada contador con el mayor correlativo ya usado en su prefijo"""
+    last = {}
+    for (codigo,) in cursor.execute("SELECT codigo FROM estudiantes WHERE codigo IS NOT NULL").fetchall():
+        parts = split_codigo(codigo)
+        if parts:
+            last[parts[0]] = max(last.get(parts[0], 0), parts[1])
+    cursor.executemany("""
+        INSERT INTO codigo_secuencias (prefijo, ultimo) VALUES (?, ?)
+        ON CONFLICT(prefijo) DO UPDATE SET ultimo = MAX(ultimo, excluded.ultimo)
+    """, list(last.items()))
+
+# Triggers que mantienen asistencias_resumen. "estado IS 'x'" vale 0 o 1 aunque
+# estado sea NULL ("estado = 'x'" daría NULL y violaría el NOT NULL del resumen)
+ASISTENCIAS_RESUMEN_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS trg_asistencias_resumen_insert AFTER INSERT ON asistencias
+    BEGIN
+        INSERT OR IGNORE INTO asistencias_resumen (estudiante_id) VALUES (NEW.estudiante_id);
+        UPDATE asistencias_resumen
+        SET presentes = presentes + (NEW.estado IS 'presente'),
+            ausentes = ausentes + (NEW.estado IS 'ausente'),
+            tardanzas = tardanzas + (NEW.estado IS 'tardanza')
+        WHERE estudiante_id = NEW.estudiante_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_asistencias_resumen_delete AFTER DELETE ON asistencias
+    BEGIN
+        UPDATE asistencias_resumen
+        SET presentes = presentes - (OLD.estado IS 'presente'),
+            ausentes = ausentes - (OLD.estado IS 'ausente'),
+            tardanzas = tardanzas - (OLD.estado IS 'tardanza')
+        WHERE estudiante_id = OLD.estudiante_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_asistencias_resumen_update AFTER UPDATE OF estudiante_id, estado ON asistencias
+    BEGIN
+        UPDATE asistencias_resumen
+        SET presentes = presentes - (OLD.estado IS 'presente'),
+            ausentes = ausentes - (OLD.estado IS 'ausente'),
+            tardanzas = tardanzas - (OLD.estado IS 'tardanza')
+        WHERE estudiante_id = OLD.estudiante_id;
+        INSERT OR IGNORE INTO asistencias_resumen (estudiante_id) VALUES (NEW.estudiante_id);
+        UPDATE asistencias_resumen
+        SET presentes = presentes + (NEW.estado IS 'presente'),
+            ausentes = ausentes + (NEW.estado IS 'ausente'),
+            tardanzas = tardanzas + (NEW.estado IS 'tardanza')
+        WHERE estudiante_id = NEW.estudiante_id;
+    END""",
+]
+
+# Recalcular el resumen completo a partir de las asistencias existentes
+ASISTENCIAS_RESUMEN_BACKFILL = [
+    "DELETE FROM asistencias_resumen",
+    """INSERT INTO asistencias_resumen (estudiante_id, presentes, ausentes, tardanzas)
+    SELECT estudiante_id, SUM(estado IS 'presente'), SUM(estado IS 'ausente'), SUM(estado IS 'tardanza')
+    FROM asistencias GROUP BY estudiante_id""",
+]
+
+# Migraciones versionadas con PRAGMA user_version: (versión, descripción, pasos).
+# Cada paso es una sentencia SQL o una función que recibe el cursor; cada
+# migración corre en su propia transacción y se aplica una sola vez. La lista
+# solo crece al final: nunca renumerar una versión publicada; un error en una
+# versión ya aplicada se corrige con una migración nueva.
+SCHEMA_MIGRATIONS = [
+    (1, "Índices para las consultas frecuentes", [
+        # Columnas indexadas que las bases antiguas aún no tienen (antes se
+        # agregaban justo antes de esta migración)
+        _add_legacy_columns,
+        # Gráficos de ReportesView: WHERE fecha_registro BETWEEN ? AND ? (índice cubriente)
+        "CREATE INDEX IF NOT EXISTS idx_emociones_fecha_registro ON emociones (fecha_registro, emocion, confianza)",
+        # Filtros en cascada nivel -> grado -> sección
+        "CREATE INDEX IF NOT EXISTS idx_estudiantes_nivel_grado_seccion ON estudiantes (nivel_id, grado_id, seccion_id)",
+        "CREATE INDEX IF NOT EXISTS idx_estudiantes_seccion ON estudiantes (seccion_id)",
+        # Horarios por sección y por profesor, ya ordenados por día y hora
+        "CREATE INDEX IF NOT EXISTS idx_horarios_seccion ON horarios (seccion_id, activo, dia_semana, hora_inicio)",
+        "CREATE INDEX IF NOT EXISTS idx_horarios_profesor ON horarios (profesor_id, activo, dia_semana, hora_inicio)",
+        # Asistencias del día (load_recent_attendance ordena por hora)
+        "CREATE INDEX IF NOT EXISTS idx_asistencias_fecha ON asistencias (fecha, hora)",
+    ]),
+    (2, "Tablas de alertas, mensajes y registros de verificación", [
+        """CREATE TABLE IF NOT EXISTS alertas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha TEXT,
+            hora TEXT,
+            tipo TEXT,
+            destinatarios TEXT,
+            asunto TEXT,
+            mensaje TEXT,
+            metodos_envio TEXT,
+            estado TEXT,
+            usuario_id INTEGER,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS mensajes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha TEXT,
+            hora TEXT,
+            destinatarios TEXT,
+            asunto TEXT,
+            mensaje TEXT,
+            estado TEXT,
+            usuario_id INTEGER,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS verification_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER,
+            timestamp TEXT,
+            success BOOLEAN,
+            details TEXT,
+            FOREIGN KEY (student_id) REFERENCES estudiantes(id)
+        )""",
+    ]),
+    (3, "Columnas agregadas a estudiantes, eventos y asistencias", [
+        _add_legacy_columns,
+    ]),
+    (4, "Resumen de asistencia por estudiante mantenido con triggers", [
+        """CREATE TABLE IF NOT EXISTS asistencias_resumen (
+            estudiante_id INTEGER PRIMARY KEY,
+            presentes INTEGER NOT NULL DEFAULT 0,
+            ausentes INTEGER NOT NULL DEFAULT 0,
+            tardanzas INTEGER NOT NULL DEFAULT 0
+        )""",
+        *ASISTENCIAS_RESUMEN_TRIGGERS,
+        *ASISTENCIAS_RESUMEN_BACKFILL,
+    ]),
+    (5, "Contadores de código por prefijo e índices de código y email", [
+        """CREATE TABLE IF NOT EXISTS codigo_secuencias (
+            prefijo TEXT PRIMARY KEY,
+            ultimo INTEGER NOT NULL DEFAULT 0
+        )""",
+        _index_estudiantes_codigo,
+        "CREATE INDEX IF NOT EXISTS idx_estudiantes_email ON estudiantes (email)",
+        _backfill_codigo_secuencias,
+    ]),
+    (6, "Triggers del resumen de asistencia con estado NULL", [
+        "DROP TRIGGER IF EXISTS trg_asistencias_resumen_insert",
+        "DROP TRIGGER IF EXISTS trg_asistencias_resumen_delete",
+        "DROP TRIGGER IF EXISTS trg_asistencias_resumen_update",
+        *ASISTENCIAS_RESUMEN_TRIGGERS,
+        *ASISTENCIAS_RESUMEN_BACKFILL,
+    ]),
+]
+
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+DATE_RANGE = ('2024-01-01', '2024-12-31')
+
+# Consultas de la aplicación que no deben recorrer tablas completas:
+# nombre -> (alias que deben usar un índice, sql, parámetros). El SQL viene de
+# app/models/queries.py, el mismo que ejecutan las vistas.
+HOT_QUERY_PLANS = {
+    'emociones por rango de fechas': (('emociones',), EMOCIONES_RESUMEN_SQL, DATE_RANGE),
+    'emociones por hora': (('emociones',), EMOCIONES_POR_HORA_SQL, DATE_RANGE),
+    'emociones por día de la semana': (('emociones',), EMOCIONES_POR_DIA_SQL, DATE_RANGE),
+    'emociones por día (PDF)': (('emociones',), EMOCIONES_POR_DIA_PDF_SQL, DATE_RANGE),
+    'estudiantes por nivel': (('estudiantes',),) + tuple(estudiantes_filter_sql(1)),
+    'estudiantes por nivel, grado y sección': (('estudiantes',),) + tuple(estudiantes_filter_sql(1, 1, 1)),
+    'estudiantes por sección': (('estudiantes',),) + tuple(estudiantes_filter_sql(seccion_id=1)),
+    'horarios por sección': (('h', 'm', 'p'), HORARIOS_SECCION_SQL, (1,)),
+    'horarios por profesor': (('h', 'm', 's', 'g', 'n'), HORARIOS_PROFESOR_SQL, (1,)),
+    'estudiante por código': (('estudiantes',), ESTUDIANTE_POR_CODIGO_SQL, ('P1A001',)),
+    'email registrado': (('estudiantes',), emails_registrados_sql(1), ('a@kairos.pe',)),
+    'asistencias del día': (('a', 'e'), ASISTENCIAS_RECIENTES_SQL, ('2024-01-01',)),
+    # La lista recorre estudiantes a propósito; las uniones deben ir por índice
+    'estudiantes con resumen de asistencia': (('n', 'g', 's', 'a', 'r'), ESTUDIANTES_ASISTENCIA_SQL, ('2024-01-01',)),
+}
+
+def get_performance_profile(name=None):
+    """Obtener el perfil configurado (o 'balanced' si el nombre no existe)"""
+    name = name or get_setting('database', 'performance_profile', 'balanced')
+    if name not in PERFORMANCE_PROFILES:
+        print(f"Perfil de base de datos desconocido '{name}', usando 'balanced'")
+        name = 'balanced'
+    return name, PERFORMANCE_PROFILES[name]
+
+
+class PooledConnection:
+    """Conexión prestada por el pool; close() la devuelve en lugar de cerrarla"""
+
+    def __init__(self, pool, conn, generation):
+        self._pool = pool
+        self._conn = conn
+        self._generation = generation
+        self._owner = threading.get_ident()
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(conn, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._conn, name, value)
+
+    def __enter__(self):
+        # Igual que sqlite3: commit al salir sin error, rollback si hay excepción
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        conn = self.__dict__.get('_conn')
+        if conn is not None:
+            self._conn = None
+            self._pool.release(conn, self._owner, self._generation)
+
+    def __del__(self):
+        # Las conexiones que nunca se cerraron vuelven al pool al recolectarse
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Pool de conexiones SQLite con conexiones ociosas separadas por hilo
+
+    Cada hilo reutiliza sus propias conexiones, así que nunca se comparte una
+    conexión entre hilos a la vez. Los PRAGMA de conexión se ejecutan solo al
+    abrirla, no en cada préstamo. reset() descarta todas las conexiones abiertas
+    hasta ese momento (por ejemplo tras migrar el esquema): las ociosas de otros
+    hilos se cierran en su próximo préstamo y las prestadas al devolverse.
+    """
+
+    def __init__(self, db_path, max_idle_per_thread=4, pragmas=None, timeout=5.0):
+        self.db_path = db_path
+        self.max_idle_per_thread = max_idle_per_thread
+        self.pragmas = pragmas or {}
+        self.timeout = timeout
+        self._local = threading.local()
+        self._generation = 0
+
+    def _idle(self):
+        idle = getattr(self._local, 'idle', None)
+        if idle is None:
+            idle = self._local.idle = []
+        return idle
+
+    def _open(self):
+        # check_same_thread=False solo para poder cerrarla desde el recolector;
+        # el pool nunca entrega la misma conexión a dos hilos
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Habilitar claves foráneas
+        conn.execute("PRAGMA foreign_keys = ON")
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def open_connection(self):
+        """Conexión nueva fuera del pool (el llamador debe cerrarla)"""
+        return self._open()
+
+    def checkout(self):
+        idle = self._idle()
+        while idle:
+            conn, generation = idle.pop()
+            if generation == self._generation:
+                return PooledConnection(self, conn, generation)
+            conn.close()
+        return PooledConnection(self, self._open(), self._generation)
+
+    def release(self, conn, owner, generation):
+        try:
+            # Lo no confirmado se descarta, igual que al cerrar una conexión
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            conn.close()
+            return
+        idle = self._idle() if threading.get_ident() == owner else None
+        if idle is not None and generation == self._generation and len(idle) < self.max_idle_per_thread:
+            idle.append((conn, generation))
+        else:
+            conn.close()
+
+    def close_idle(self):
+        """Cerrar las conexiones ociosas del hilo actual"""
+        idle = self._idle()
+        while idle:
+            idle.pop()[0].close()
+
+    def reset(self):
+        """Descartar las conexiones abiertas hasta ahora; los préstamos siguientes abren conexiones nuevas"""
+        self._generation += 1
+        self.close_idle()
+
+
+CATALOG_TABLES = ('niveles', 'grados', 'secciones', 'materias')
+
+
+class CatalogCache(QObject):
+    """Caché en proceso de las tablas de referencia (niveles, grados, secciones, materias)
+
+    Se carga completa con cuatro consultas en el primer uso y guarda índices
+    por id, grados por nivel y secciones por grado. Quien escriba en estas
+    tablas debe llamar a Database.notify_catalog_changed(tabla), que vacía la
+    caché y emite catalog_changed para que las vistas recarguen sus combos.
+    """
+    catalog_changed = Signal(str)  # tabla modificada ('' = todas)
+
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+        self.lock = threading.RLock()
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        with self.lock:
+            if self._loaded:
+                return
+            conn = self.db.connect()
+            try:
+                # Filas (id, nombre, padre) ordenadas por id
+                niveles = [tuple(r) for r in conn.execute("SELECT id, nombre FROM niveles ORDER BY id")]
+                grados = [tuple(r) for r in conn.execute("SELECT id, nombre, nivel_id FROM grados ORDER BY id")]
+                secciones = [tuple(r) for r in conn.execute("SELECT id, nombre, grado_id FROM secciones ORDER BY id")]
+                materias = [tuple(r) for r in conn.execute("SELECT id, nombre FROM materias ORDER BY id")]
+            finally:
+                conn.close()
+            self._niveles = [(i, n) for i, n in niveles]
+            self._grados = [(i, n) for i, n, _ in grados]
+            self._secciones = [(i, n) for i, n, _ in secciones]
+            self._materias = materias
+            self._nombres = {table: dict(rows) for table, rows in (
+                ('niveles', self._niveles), ('grados', self._grados),
+                ('secciones', self._secciones), ('materias', self._materias))}
+            self._grado_nivel = {i: nivel_id for i, _, nivel_id in grados}
+            self._seccion_grado = {i: grado_id for i, _, grado_id in secciones}
+            self._grados_by_nivel = {}
+            for i, nombre, nivel_id in grados:
+                self._grados_by_nivel.setdefault(nivel_id, []).append((i, nombre))
+            self._secciones_by_grado = {}
+            for i, nombre, grado_id in secciones:
+                self._secciones_by_grado.setdefault(grado_id, []).append((i, nombre))
+            self._loaded = True
+
+    @staticmethod
+    def _ordered(rows, order_by):
+        # Igual que ORDER BY nombre / ORDER BY id en SQLite (comparación binaria)
+        return sorted(rows, key=lambda row: row[1]) if order_by == 'nombre' else list(rows)
+
+    def niveles(self, order_by='nombre'):
+        self._ensure_loaded()
+        return self._ordered(self._niveles, order_by)
+
+    def grados(self, nivel_id=None, order_by='nombre'):
+        """Grados de un nivel (o todos si nivel_id es None)"""
+        self._ensure_loaded()
+        rows = self._grados if nivel_id is None else self._grados_by_nivel.get(nivel_id, [])
+        return self._ordered(rows, order_by)
+
+    def secciones(self, grado_id=None, order_by='nombre'):
+        """Secciones de un grado (o todas si grado_id es None)"""
+        self._ensure_loaded()
+        rows = self._secciones if grado_id is None else self._secciones_by_grado.get(grado_id, [])
+        return self._ordered(rows, order_by)
+
+    def materias(self, order_by='nombre'):
+        self._ensure_loaded()
+        return self._ordered(self._materias, order_by)
+
+    def nombre(self, table, row_id):
+        """Nombre de un registro del catálogo por id (None si no existe)"""
+        self._ensure_loaded()
+        return self._nombres[table].get(row_id)
+
+    def secciones_completas(self):
+        """(id, "Nivel - Grado - Sección") de todas las secciones, ordenadas por esos nombres"""
+        self._ensure_loaded()
+        rows = []
+        for seccion_id, seccion in self._secciones:
+            grado_id = self._seccion_grado[seccion_id]
+            nivel_id = self._grado_nivel.get(grado_id)
+            grado = self._nombres['grados'].get(grado_id)
+            nivel = self._nombres['niveles'].get(nivel_id)
+            if grado is not None and nivel is not None:
+                rows.append(((nivel, grado, seccion), seccion_id))
+        rows.sort()
+        return [(seccion_id, " - ".join(names)) for names, seccion_id in rows]
+
+    def invalidate(self, table=''):
+        """Vaciar la caché y avisar a las vistas"""
+        with self.lock:
+            self._loaded = False
+        self.catalog_changed.emit(table or '')
+
 
 class Database:
     _instance = None
@@ -8,26 +469,97 @@ class Database:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(Database, cls).__new__(cls)
+            cls._instance._pool = None
+            cls._instance._catalog = None
+            cls._instance._last_checkpoint = time.monotonic()
         return cls._instance
     
+    @property
+    def catalog(self):
+        """Caché compartida de niveles, grados, secciones y materias"""
+        if self._catalog is None:
+            self._catalog = CatalogCache(self)
+        return self._catalog
+    
+    def notify_catalog_changed(self, table=''):
+        """Llamar después de confirmar escrituras en CATALOG_TABLES"""
+        if self._catalog is not None:
+            self._catalog.invalidate(table)
+    
+    def _get_pool(self):
+        if self._pool is None:
+            db_path = DB_PATH
+            # Asegurar que el directorio existe (una sola vez)
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self.profile_name, profile = get_performance_profile()
+            pragmas = {k: v for k, v in profile.items() if k != 'journal_mode'}
+            timeout = get_setting('database', 'busy_timeout_ms', 5000) / 1000.0
+            self._pool = ConnectionPool(db_path, pragmas=pragmas, timeout=timeout)
+        return self._pool
+    
     def connect(self):
-        """Create a new connection each time - don't reuse connections"""
+        """Obtener una conexión del pool; conn.close() la devuelve al pool"""
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'database.db')
-            # Asegurar que el directorio existe
-            os.makedirs(os.path.dirname(db_path), exist_ok=True)
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row
-            # Habilitar claves foráneas
-            conn.execute("PRAGMA foreign_keys = ON")
-            return conn
+            return self._get_pool().checkout()
         except Exception as e:
             print(f"Error conectando a la base de datos: {e}")
             raise
     
+    @contextmanager
+    def connection(self):
+        """Prestar una conexión: commit al terminar, rollback si falla y siempre se libera"""
+        conn = self.connect()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
     def close(self):
-        """This method is no longer needed since we don't store connections"""
-        pass
+        """Cerrar las conexiones ociosas del hilo actual"""
+        if self._pool is not None:
+            self._pool.close_idle()
+    
+    def apply_performance_profile(self):
+        """Configurar el modo de journal del perfil activo (persistente en el archivo)"""
+        self._get_pool()
+        _, profile = get_performance_profile(self.profile_name)
+        conn = self.connect()
+        try:
+            mode = conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']}").fetchone()[0]
+            print(f"Perfil de base de datos '{self.profile_name}' (journal_mode={mode})")
+        except sqlite3.Error as e:
+            # Otra instancia puede tener la base abierta; se mantiene el modo actual
+            print(f"No se pudo cambiar journal_mode: {e}")
+        finally:
+            conn.close()
+    
+    def checkpoint(self, mode='PASSIVE'):
+        """Ejecutar un checkpoint del WAL; devuelve (busy, páginas en WAL, páginas copiadas)"""
+        conn = self.connect()
+        try:
+            result = tuple(conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+            self._last_checkpoint = time.monotonic()
+            return result
+        except sqlite3.Error as e:
+            print(f"Error en checkpoint del WAL: {e}")
+            return None
+        finally:
+            conn.close()
+    
+    def maybe_checkpoint(self):
+        """Checkpoint TRUNCATE cada checkpoint_interval_s (llamar desde hilos de fondo)
+
+        wal_autocheckpoint solo hace checkpoints PASSIVE, que no avanzan mientras
+        haya lectores largos; este checkpoint periódico deja el WAL en cero.
+        """
+        interval = get_setting('database', 'checkpoint_interval_s', 300)
+        if time.monotonic() - self._last_checkpoint < interval:
+            return None
+        return self.checkpoint('TRUNCATE')
     
     def _create_tables(self):
         """Create database tables if they don't exist"""
@@ -109,6 +641,7 @@ class Database:
                 hora TEXT NOT NULL,
                 estado TEXT CHECK (estado IN ('presente', 'ausente', 'tardanza')),
                 emocion TEXT CHECK (emocion IN ('feliz', 'triste', 'enojado', 'neutral', 'desconocido')),
+                metodo TEXT,
                 FOREIGN KEY (estudiante_id) REFERENCES estudiantes(id),
                 UNIQUE(estudiante_id, fecha)
             )
@@ -236,6 +769,11 @@ class Database:
 
     def setup(self):
         """Set up the database by creating tables and inserting initial data"""
+        self.apply_performance_profile()
+        # Base ya migrada: basta con leer user_version, sin revisar el esquema
+        if self.get_schema_version() >= SCHEMA_VERSION:
+            self.checkpoint('TRUNCATE')
+            return
         self._create_tables()
         try:
             conn = self.connect()
@@ -245,8 +783,10 @@ class Database:
             self._insert_initial_data(cursor)
             
             conn.commit()
+            self.notify_catalog_changed()
             print("Base de datos configurada correctamente")
             self.migrate_database()  # Ensure migrations run after setup
+            self.checkpoint('TRUNCATE')
             
         except Exception as e:
             print(f"Error configurando la base de datos: {e}")
@@ -358,127 +898,178 @@ class Database:
             raise
     
     def get_niveles(self):
-        """Obtener todos los niveles educativos"""
+        """Obtener todos los niveles educativos (desde la caché de catálogos)"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nombre FROM niveles ORDER BY nombre")
-            return cursor.fetchall()
+            return self.catalog.niveles()
         except Exception as e:
             print(f"Error obteniendo niveles: {e}")
             return []
     
     def get_grados_by_nivel(self, nivel_id):
-        """Obtener grados por nivel"""
+        """Obtener grados por nivel (desde la caché de catálogos)"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nombre FROM grados WHERE nivel_id = ? ORDER BY nombre", (nivel_id,))
-            return cursor.fetchall()
+            return self.catalog.grados(nivel_id)
         except Exception as e:
             print(f"Error obteniendo grados: {e}")
             return []
     
     def get_secciones_by_grado(self, grado_id):
-        """Obtener secciones por grado"""
+        """Obtener secciones por grado (desde la caché de catálogos)"""
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nombre FROM secciones WHERE grado_id = ? ORDER BY nombre", (grado_id,))
-            return cursor.fetchall()
+            return self.catalog.secciones(grado_id)
         except Exception as e:
             print(f"Error obteniendo secciones: {e}")
             return []
     
+    def get_schema_version(self):
+        """Versión del esquema guardada en PRAGMA user_version"""
+        conn = self.connect()
+        try:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+    
     def migrate_database(self):
-        """Check if the database needs migration and perform necessary updates"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Check for nivel_id column in estudiantes table
-        cursor.execute("PRAGMA table_info(estudiantes)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        # Add missing columns if they don't exist
-        if 'nivel_id' not in columns:
-            cursor.execute("ALTER TABLE estudiantes ADD COLUMN nivel_id INTEGER")
-            print("Added nivel_id column to estudiantes table")
-            
-        if 'grado_id' not in columns:
-            cursor.execute("ALTER TABLE estudiantes ADD COLUMN grado_id INTEGER")
-            print("Added grado_id column to estudiantes table")
-            
-        if 'seccion_id' not in columns:
-            cursor.execute("ALTER TABLE estudiantes ADD COLUMN seccion_id INTEGER")
-            print("Added seccion_id column to estudiantes table")
-            
-        if 'codigo' not in columns:
-            cursor.execute("ALTER TABLE estudiantes ADD COLUMN codigo TEXT")
-            print("Added codigo column to estudiantes table")
-            
-        if 'foto_path' not in columns:
-            cursor.execute("ALTER TABLE estudiantes ADD COLUMN foto_path TEXT")
-            print("Added foto_path column to estudiantes table")
-            
-        if 'facial_data_path' not in columns:
-            cursor.execute("ALTER TABLE estudiantes ADD COLUMN facial_data_path TEXT")
-            print("Added facial_data_path column to estudiantes table")
-        
-        # Check for columns in eventos table
-        cursor.execute("PRAGMA table_info(eventos)")
-        eventos_columns = [column[1] for column in cursor.fetchall()]
-        
-        # Add missing columns to eventos table
-        if 'fecha' not in eventos_columns:
-            cursor.execute("ALTER TABLE eventos ADD COLUMN fecha TEXT")
-            print("Added fecha column to eventos table")
-            
-        if 'hora' not in eventos_columns:
-            cursor.execute("ALTER TABLE eventos ADD COLUMN hora TEXT")
-            print("Added hora column to eventos table")
-            
-        if 'tipo' not in eventos_columns:
-            cursor.execute("ALTER TABLE eventos ADD COLUMN tipo TEXT")
-            print("Added tipo column to eventos table")
-        
-        conn.commit()
-        conn.close()
-        print("Database migration completed successfully")
+        """Aplicar una sola vez las migraciones de SCHEMA_MIGRATIONS posteriores a user_version
+
+        Si se aplicó alguna, se descartan las conexiones del pool abiertas con
+        el esquema anterior.
+        """
+        applied = 0
+        conn = self.connect()
+        try:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            for version, description, steps in SCHEMA_MIGRATIONS:
+                if version <= current:
+                    continue
+                cursor = conn.cursor()
+                cursor.execute("BEGIN")
+                try:
+                    for step in steps:
+                        if callable(step):
+                            step(cursor)
+                        else:
+                            cursor.execute(step)
+                    cursor.execute(f"PRAGMA user_version = {version}")
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                print(f"Migración {version} aplicada: {description}")
+                applied += 1
+        finally:
+            conn.close()
+            if applied:
+                self._pool.reset()
+    
+    def verify_query_plans(self, queries=None):
+        """Revisar con EXPLAIN QUERY PLAN que las consultas frecuentes usen índices
+
+        queries tiene el formato de HOT_QUERY_PLANS (por defecto, esas). Devuelve
+        una lista de (consulta, detalle del plan) con los recorridos completos
+        encontrados; vacía si todas usan un índice.
+        """
+        failures = []
+        # Conexión nueva, para que el plan use el esquema actual del archivo
+        conn = self._get_pool().open_connection()
+        try:
+            for name, (tables, sql, params) in (queries or HOT_QUERY_PLANS).items():
+                scans = {f"SCAN {table}" for table in tables} | {f"SCAN TABLE {table}" for table in tables}
+                for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+                    detail = row[3]
+                    # "SCAN e" y "SCAN e USING [COVERING] INDEX ..." recorren todas las
+                    # filas (de la tabla o del índice); solo "SEARCH ..." usa el índice
+                    if detail.split(' USING ')[0] in scans:
+                        failures.append((name, detail))
+        finally:
+            conn.close()
+        return failures
 
     def get_connection(self):
         """Get a database connection"""
+        return self.connect()
+
+    def reserve_codigos(self, prefix, count=1, conn=None):
+        """Reservar count códigos consecutivos de un prefijo (ej. P3A -> P3A007, P3A008, ...)
+
+        El contador de codigo_secuencias se incrementa con una sola sentencia, que
+        toma el bloqueo de escritura hasta el commit; dos reservas nunca reciben el
+        mismo número. Sin conn la reserva se confirma de inmediato (como una
+        secuencia, los números de una inserción fallida quedan sin usar); con conn
+        forma parte de la transacción del llamador.
+        """
+        own_connection = conn is None
+        if own_connection:
+            conn = self.connect()
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'database.db')
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(db_path), exist_ok=True)
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row
-            # Enable foreign keys
-            conn.execute("PRAGMA foreign_keys = ON")
-            return conn
-        except Exception as e:
-            print(f"Error connecting to database: {e}")
+            conn.execute("""
+                INSERT INTO codigo_secuencias (prefijo, ultimo) VALUES (?, ?)
+                ON CONFLICT(prefijo) DO UPDATE SET ultimo = ultimo + excluded.ultimo
+            """, (prefix, count))
+            last = conn.execute("SELECT ultimo FROM codigo_secuencias WHERE prefijo = ?", (prefix,)).fetchone()[0]
+            if own_connection:
+                conn.commit()
+        except Exception:
+            if own_connection:
+                conn.rollback()
             raise
-
+        finally:
+            if own_connection:
+                conn.close()
+        return [format_codigo(prefix, n) for n in range(last - count + 1, last + 1)]
+    
+    def peek_codigo(self, prefix):
+        """Siguiente código del prefijo sin reservarlo (para mostrarlo en el formulario)"""
+        with self.connection() as conn:
+            row = conn.execute("SELECT ultimo FROM codigo_secuencias WHERE prefijo = ?", (prefix,)).fetchone()
+        return format_codigo(prefix, (row[0] if row else 0) + 1)
+    
+    def register_codigos(self, codigos, conn=None):
+        """Adelantar los contadores para que no vuelvan a entregar códigos asignados a mano"""
+        last = {}
+        for codigo in codigos:
+            parts = split_codigo(codigo)
+            if parts:
+                last[parts[0]] = max(last.get(parts[0], 0), parts[1])
+        if not last:
+            return
+        sql = """
+            INSERT INTO codigo_secuencias (prefijo, ultimo) VALUES (?, ?)
+            ON CONFLICT(prefijo) DO UPDATE SET ultimo = MAX(ultimo, excluded.ultimo)
+        """
+        if conn is not None:
+            conn.executemany(sql, list(last.items()))
+        else:
+            with self.connection() as conn:
+                conn.executemany(sql, list(last.items()))
+    
+    def email_registrado(self, email, conn=None):
+        """True si algún estudiante ya usa el email (búsqueda por idx_estudiantes_email)"""
+        return bool(self.emails_registrados([email], conn))
+    
+    def emails_registrados(self, emails, conn=None):
+        """Subconjunto de emails que ya usa algún estudiante, consultado por bloques"""
+        emails = [email for email in set(emails) if email]
+        found = set()
+        own_connection = conn is None
+        if own_connection:
+            conn = self.connect()
+        try:
+            for start in range(0, len(emails), 500):
+                block = emails[start:start + 500]
+                rows = conn.execute(emails_registrados_sql(len(block)), block).fetchall()
+                found.update(email for (email,) in rows)
+        finally:
+            if own_connection:
+                conn.close()
+        return found
+    
     def buscar_estudiante_por_codigo(self, codigo):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM estudiantes WHERE codigo = ?", (codigo,))
-        return cursor.fetchone()
+        with self.connection() as conn:
+            return conn.execute(ESTUDIANTE_POR_CODIGO_SQL, (codigo,)).fetchone()
     
     def filtrar_estudiantes(self, nivel_id=None, grado_id=None, seccion_id=None):
-        cursor = self.conn.cursor()
-        query = "SELECT * FROM estudiantes WHERE 1=1"
-        params = []
-        
-        if nivel_id:
-            query += " AND nivel_id = ?"
-            params.append(nivel_id)
-        if grado_id:
-            query += " AND grado_id = ?"
-            params.append(grado_id)
-        if seccion_id:
-            query += " AND seccion_id = ?"
-            params.append(seccion_id)
+        query, params = estudiantes_filter_sql(nivel_id, grado_id, seccion_id)
         
-        cursor.execute(query, params)
-        return cursor.fetchall()
\ No newline at end of file
+        with self.connection() as conn:
+            return conn.execute(query, params).fetchall()
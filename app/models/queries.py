@@ -0,0 +1,133 @@
+# Consultas frecuentes compartidas por las vistas y por la verificación de
+# planes (HOT_QUERY_PLANS en database.py), para que la verificación revise
+# exactamente el SQL que ejecuta la aplicación.
+
+# --- Reportes de emociones (filtro por rango de fechas) -------------------------
+
+EMOCIONES_RESUMEN_SQL = """
+    SELECT emocion, COUNT(*) as cantidad, AVG(confianza) as confianza_promedio
+    FROM emociones
+    WHERE fecha_registro BETWEEN ? AND ?
+    GROUP BY emocion
+    ORDER BY cantidad DESC
+"""
+
+EMOCIONES_POR_HORA_SQL = """
+    SELECT
+        strftime('%H', fecha_registro) as hora,
+        emocion,
+        COUNT(*) as cantidad
+    FROM emociones
+    WHERE fecha_registro BETWEEN ? AND ?
+    GROUP BY hora, emocion
+    ORDER BY hora, cantidad DESC
+"""
+
+_DIA_SEMANA = """
+        CASE strftime('%w', fecha_registro)
+            WHEN '0' THEN 'Domingo'
+            WHEN '1' THEN 'Lunes'
+            WHEN '2' THEN 'Martes'
+            WHEN '3' THEN 'Miércoles'
+            WHEN '4' THEN 'Jueves'
+            WHEN '5' THEN 'Viernes'
+            WHEN '6' THEN 'Sábado'
+        END as dia_semana"""
+
+EMOCIONES_POR_DIA_SQL = f"""
+    SELECT {_DIA_SEMANA},
+        emocion,
+        COUNT(*) as cantidad,
+        AVG(confianza) as confianza_promedio
+    FROM emociones
+    WHERE fecha_registro BETWEEN ? AND ?
+    GROUP BY dia_semana, emocion
+    ORDER BY cantidad DESC
+"""
+
+EMOCIONES_POR_DIA_PDF_SQL = f"""
+    SELECT {_DIA_SEMANA},
+        emocion,
+        COUNT(*) as cantidad
+    FROM emociones
+    WHERE fecha_registro BETWEEN ? AND ?
+    GROUP BY dia_semana, emocion
+    ORDER BY dia_semana, cantidad DESC
+"""
+
+# --- Horarios -----------------------------------------------------------------
+
+HORARIOS_SECCION_SQL = """
+    SELECT h.dia_semana, h.hora_inicio, h.hora_fin, m.nombre as materia,
+           p.nombre || ' ' || p.apellido as profesor, h.aula
+    FROM horarios h
+    JOIN materias m ON h.materia_id = m.id
+    JOIN profesores p ON h.profesor_id = p.id
+    WHERE h.seccion_id = ? AND h.activo = 1
+    ORDER BY h.dia_semana, h.hora_inicio
+"""
+
+HORARIOS_PROFESOR_SQL = """
+    SELECT h.dia_semana, h.hora_inicio, h.hora_fin, m.nombre as materia,
+           n.nombre as nivel, g.nombre as grado, s.nombre as seccion, h.aula
+    FROM horarios h
+    JOIN materias m ON h.materia_id = m.id
+    JOIN secciones s ON h.seccion_id = s.id
+    JOIN grados g ON s.grado_id = g.id
+    JOIN niveles n ON g.nivel_id = n.id
+    WHERE h.profesor_id = ? AND h.activo = 1
+    ORDER BY h.dia_semana, h.hora_inicio
+"""
+
+# --- Asistencia -----------------------------------------------------------------
+
+ASISTENCIAS_RECIENTES_SQL = """
+    SELECT a.hora, e.nombre, e.apellido, a.estado, a.metodo
+    FROM asistencias a
+    JOIN estudiantes e ON a.estudiante_id = e.id
+    WHERE a.fecha = ?
+    ORDER BY a.hora DESC
+    LIMIT 10
+"""
+
+# Lista todos los estudiantes (recorre estudiantes a propósito); los totales
+# vienen de asistencias_resumen (mantenida por triggers) por clave primaria
+ESTUDIANTES_ASISTENCIA_SQL = """
+    SELECT e.id, e.nombre, e.apellido, n.nombre as nivel, g.nombre as grado, s.nombre as seccion,
+           COALESCE(a.estado, 'ausente') as estado_hoy,
+           COALESCE(r.presentes, 0) as total_presentes,
+           COALESCE(r.ausentes, 0) as total_ausentes
+    FROM estudiantes e
+    LEFT JOIN niveles n ON e.nivel_id = n.id
+    LEFT JOIN grados g ON e.grado_id = g.id
+    LEFT JOIN secciones s ON e.seccion_id = s.id
+    LEFT JOIN asistencias a ON e.id = a.estudiante_id AND a.fecha = ?
+    LEFT JOIN asistencias_resumen r ON r.estudiante_id = e.id
+    ORDER BY e.nombre, e.apellido
+"""
+
+# --- Estudiantes ----------------------------------------------------------------
+
+ESTUDIANTE_POR_CODIGO_SQL = "SELECT * FROM estudiantes WHERE codigo = ?"
+
+
+def estudiantes_filter_sql(nivel_id=None, grado_id=None, seccion_id=None):
+    """(sql, parámetros) para filtrar estudiantes por nivel, grado y sección"""
+    query = "SELECT * FROM estudiantes WHERE 1=1"
+    params = []
+
+    if nivel_id:
+        query += " AND nivel_id = ?"
+        params.append(nivel_id)
+    if grado_id:
+        query += " AND grado_id = ?"
+        params.append(grado_id)
+    if seccion_id:
+        query += " AND seccion_id = ?"
+        params.append(seccion_id)
+    return query, params
+
+
+def emails_registrados_sql(count):
+    """Consulta de los emails ya registrados entre count candidatos"""
+    return f"SELECT email FROM estudiantes WHERE email IN ({','.join('?' * count)})"
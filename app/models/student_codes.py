@@ -0,0 +1,45 @@
+import re
+
+# Código de estudiante: NIVEL + GRADO + SECCIÓN + CORRELATIVO (ej. P3A001, S1B045, I5C123)
+CODIGO_PATTERN = re.compile(r'^(\D+\d+\D+?)(\d+)$')
+
+
+def codigo_prefix(nivel_text, grado_text, seccion_text):
+    """Prefijo del código de estudiante: NIVEL + GRADO + SECCIÓN (ej. P3A)"""
+    if "Inicial" in nivel_text:
+        nivel_prefix = "I"
+    elif "Primaria" in nivel_text:
+        nivel_prefix = "P"
+    elif "Secundaria" in nivel_text:
+        nivel_prefix = "S"
+    else:
+        nivel_prefix = "X"
+    grado_num = re.findall(r'\d+', grado_text)
+    grado_code = grado_num[0] if grado_num else "0"
+    return f"{nivel_prefix}{grado_code}{seccion_text.upper()}"
+
+
+def format_codigo(prefix, correlativo):
+    return f"{prefix}{correlativo:03d}"
+
+
+def split_codigo(codigo):
+    """(prefijo, correlativo) de un código, o None si no sigue el formato"""
+    match = CODIGO_PATTERN.match(codigo or '')
+    return (match.group(1), int(match.group(2))) if match else None
+
+
+def generate_email(nombres, primer_apellido, segundo_apellido):
+    """nombre + 2 primeras del primer apellido + 2 primeras del segundo apellido @kairos.pe"""
+    nombre_clean = nombres.split()[0].lower() if nombres else ""
+    return f"{nombre_clean}{primer_apellido[:2].lower()}{segundo_apellido[:2].lower()}@kairos.pe"
+
+
+def unique_email(email, is_taken):
+    """Primer email libre agregando un número antes de la arroba (ana@ -> ana2@ -> ana3@)"""
+    local, _, domain = email.partition('@')
+    candidate, number = email, 2
+    while is_taken(candidate):
+        candidate = f"{local}{number}@{domain}"
+        number += 1
+    return candidate
@@ -0,0 +1,393 @@
+import csv
+import re
+from functools import lru_cache
+import sqlite3
+import unicodedata
+from datetime import datetime, date
+from pathlib import Path
+import pandas as pd
+from PySide6.QtCore import QThread, Signal
+from app.models.database import Database
+from app.models.student_codes import codigo_prefix, generate_email, split_codigo, unique_email
+
+# Columnas reconocidas en el archivo (cabeceras normalizadas: minúsculas, sin tildes, "_" por espacios)
+IMPORT_FIELDS = ('nombres', 'primer_apellido', 'segundo_apellido', 'fecha_nacimiento', 'genero',
+                 'direccion', 'telefono', 'email', 'codigo', 'nivel', 'grado', 'seccion',
+                 'tutor_nombre', 'tutor_telefono', 'tutor_email')
+REQUIRED_FIELDS = ('nombres', 'primer_apellido', 'segundo_apellido', 'fecha_nacimiento',
+                   'nivel', 'grado', 'seccion', 'tutor_nombre', 'tutor_telefono')
+FIELD_ALIASES = {
+    'nombre': 'nombres',
+    'apellido_paterno': 'primer_apellido',
+    'apellido_materno': 'segundo_apellido',
+    'fecha_de_nacimiento': 'fecha_nacimiento',
+    'sexo': 'genero',
+    'correo': 'email',
+    'tutor': 'tutor_nombre',
+    'telefono_tutor': 'tutor_telefono',
+    'email_tutor': 'tutor_email',
+}
+GENEROS = {'m': 'M', 'masculino': 'M', 'f': 'F', 'femenino': 'F', 'otro': 'Otro'}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d')
+
+
+@lru_cache(maxsize=4096)
+def _normalize(text):
+    """Minúsculas y sin tildes, para comparar cabeceras y nombres del catálogo"""
+    text = unicodedata.normalize('NFKD', str(text).strip().lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def normalize_header(name):
+    key = re.sub(r'[\s\-]+', '_', _normalize(name))
+    return FIELD_ALIASES.get(key, key)
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text):
+    """Fecha de nacimiento en cualquiera de DATE_FORMATS -> 'yyyy-MM-dd'"""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text[:10], fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    raise ValueError(f"Fecha de nacimiento no válida: {text}")
+
+
+def _cell_text(value):
+    """Texto de una celda de Excel (fechas ISO, enteros sin '.0')"""
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def read_chunks(path, chunk_size=500):
+    """Leer un CSV o XLSX por bloques de chunk_size filas (DataFrames de texto)"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            sample = f.read(4096)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=',;\t').delimiter
+        except csv.Error:
+            delimiter = ','
+        yield from pd.read_csv(path, sep=delimiter, dtype=str, keep_default_na=False,
+                               encoding='utf-8-sig', chunksize=chunk_size)
+    elif suffix in ('.xlsx', '.xlsm'):
+        # openpyxl en modo read_only recorre la hoja sin cargarla completa en memoria
+        import openpyxl
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [_cell_text(h) for h in next(rows, ())]
+            chunk = []
+            for row in rows:
+                if not any(v is not None and str(v).strip() for v in row):
+                    continue
+                chunk.append([_cell_text(v) for v in row[:len(header)]])
+                if len(chunk) >= chunk_size:
+                    yield pd.DataFrame(chunk, columns=header)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=header)
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Formato no soportado: {suffix} (use .csv o .xlsx)")
+
+
+class ImportReport:
+    """Resultado de una importación: filas leídas, importadas y errores por fila"""
+
+    def __init__(self, source):
+        self.source = str(source)
+        self.total_rows = 0
+        self.imported = 0
+        self.errors = []  # (fila en el archivo, mensaje, valores originales)
+        self.elapsed = 0.0
+
+    def add_error(self, fila, mensaje, values):
+        self.errors.append((fila, mensaje, values))
+
+    def write_errors(self, path=None):
+        """Guardar los errores en un CSV reutilizable (fila, error y columnas originales)"""
+        if not self.errors:
+            return None
+        if path is None:
+            source = Path(self.source)
+            path = source.with_name(f"{source.stem}_errores.csv")
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('fila', 'error') + IMPORT_FIELDS)
+            for fila, mensaje, values in sorted(self.errors, key=lambda error: error[0]):
+                writer.writerow([fila, mensaje] + [values.get(field, '') for field in IMPORT_FIELDS])
+        return str(path)
+
+    def summary(self):
+        return (f"{self.imported} de {self.total_rows} estudiantes importados, "
+                f"{len(self.errors)} filas con errores ({self.elapsed:.1f} s)")
+
+
+class StudentImporter:
+    """Importación masiva de estudiantes y sus tutores desde CSV/XLSX
+
+    El archivo se procesa por bloques de chunk_size filas: cada bloque se
+    valida, resuelve nivel/grado/sección contra el catálogo, recibe códigos
+    correlativos y se inserta con executemany en una sola transacción. Las
+    filas inválidas no detienen la importación; quedan en el ImportReport.
+    """
+
+    def __init__(self, chunk_size=500):
+        self.db = Database()
+        self.chunk_size = chunk_size
+        self._codigos = set()  # códigos usados en esta importación
+        self._emails = set()   # emails usados en esta importación
+        self._build_catalog_lookup()
+
+    def _build_catalog_lookup(self):
+        catalog = self.db.catalog
+        self._niveles = {_normalize(nombre): (i, nombre) for i, nombre in catalog.niveles()}
+        self._grados = {}
+        for nivel_id, _ in catalog.niveles():
+            for i, nombre in catalog.grados(nivel_id):
+                self._grados[(nivel_id, _normalize(nombre))] = (i, nombre)
+                # También se acepta solo el número ("3" para "3° grado")
+                digits = re.findall(r'\d+', nombre)
+                if digits:
+                    self._grados.setdefault((nivel_id, digits[0]), (i, nombre))
+        self._secciones = {}
+        for grado_id in {grado_id for grado_id, _ in self._grados.values()}:
+            for i, nombre in catalog.secciones(grado_id):
+                self._secciones[(grado_id, _normalize(nombre))] = (i, nombre)
+
+    def import_file(self, path, progress=None):
+        """Importar el archivo completo; progress(filas procesadas) se llama por bloque"""
+        report = ImportReport(path)
+        started = datetime.now()
+        conn = self.db.connect()
+        try:
+            for chunk in read_chunks(path, self.chunk_size):
+                first_row = report.total_rows + 2  # la fila 1 del archivo es la cabecera
+                report.total_rows += len(chunk)
+                rows = self._validate_chunk(chunk, first_row, report)
+                if rows:
+                    self._insert_chunk(conn, rows, report)
+                if progress:
+                    progress(report.total_rows)
+        finally:
+            conn.close()
+        self.db.maybe_checkpoint()
+        report.elapsed = (datetime.now() - started).total_seconds()
+        return report
+
+    # --- Validación -----------------------------------------------------------
+
+    def _validate_chunk(self, chunk, first_row, report):
+        chunk = chunk.rename(columns=normalize_header)
+        chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+        chunk = chunk.reindex(columns=IMPORT_FIELDS, fill_value='').fillna('')
+        columns = [[str(v).strip() for v in chunk[field].tolist()] for field in IMPORT_FIELDS]
+        rows = []
+        for offset, values in enumerate(zip(*columns)):
+            values = dict(zip(IMPORT_FIELDS, values))
+            fila = first_row + offset
+            try:
+                rows.append(self._validate_row(values, fila))
+            except ValueError as e:
+                report.add_error(fila, str(e), values)
+        return rows
+
+    def _validate_row(self, values, fila):
+        missing = [field for field in REQUIRED_FIELDS if not values[field]]
+        if missing:
+            raise ValueError(f"Campos obligatorios vacíos: {', '.join(missing)}")
+
+        fecha = parse_date(values['fecha_nacimiento'])
+        genero = None
+        if values['genero']:
+            genero = GENEROS.get(_normalize(values['genero']))
+            if genero is None:
+                raise ValueError(f"Género no válido: {values['genero']}")
+
+        nivel = self._niveles.get(_normalize(values['nivel']))
+        if nivel is None:
+            raise ValueError(f"Nivel no encontrado: {values['nivel']}")
+        grado = self._grados.get((nivel[0], _normalize(values['grado'])))
+        if grado is None:
+            raise ValueError(f"Grado no encontrado en {nivel[1]}: {values['grado']}")
+        seccion = self._secciones.get((grado[0], _normalize(values['seccion'])))
+        if seccion is None:
+            raise ValueError(f"Sección no encontrada en {grado[1]}: {values['seccion']}")
+
+        prefix = codigo_prefix(nivel[1], grado[1], seccion[1])
+        codigo = values['codigo'].upper()
+        if codigo:
+            if codigo in self._codigos:
+                raise ValueError(f"Código repetido en el archivo: {codigo}")
+            # El código debe corresponder al nivel, grado y sección de la fila
+            parts = split_codigo(codigo)
+            if parts is None or parts[0] != prefix:
+                raise ValueError(f"El código {codigo} no corresponde a {nivel[1]} / {grado[1]} / "
+                                 f"{seccion[1]} (se esperaba {prefix}###)")
+
+        email = values['email'].lower() or generate_email(values['nombres'], values['primer_apellido'],
+                                                          values['segundo_apellido'])
+        # El código se reserva solo cuando la fila completa es válida
+        if codigo:
+            self._codigos.add(codigo)
+        return {
+            'fila': fila,
+            'values': values,
+            'nombre': f"{values['nombres']} {values['primer_apellido']}",
+            'apellido': values['segundo_apellido'],
+            'fecha_nacimiento': fecha,
+            'genero': genero,
+            'direccion': values['direccion'],
+            'telefono': values['telefono'],
+            'email': email,
+            'email_generado': not values['email'],
+            'codigo': codigo,
+            'prefix': prefix,
+            'nivel_id': nivel[0],
+            'grado_id': grado[0],
+            'seccion_id': seccion[0],
+        }
+
+    # --- Códigos y emails ------------------------------------------------------
+
+    def _check_unique(self, conn, rows, report):
+        """Descartar filas con código o email ya registrados y completar los generados
+
+        Las comprobaciones son búsquedas por índice (codigo, email) por bloque en
+        lugar de esperar a que falle el INSERT. Los emails generados que ya
+        existen reciben un número (ana@ -> ana2@); los indicados en el archivo
+        se reportan como error.
+        """
+        provided = [row['codigo'] for row in rows if row['codigo']]
+        existing = set()
+        if provided:
+            existing = {codigo for (codigo,) in conn.execute(
+                f"SELECT codigo FROM estudiantes WHERE codigo IN ({','.join('?' * len(provided))})", provided)}
+        registered = self.db.emails_registrados([row['email'] for row in rows], conn)
+
+        accepted = []
+        for row in rows:
+            email = row['email']
+            if row['codigo'] in existing:
+                report.add_error(row['fila'], f"El código {row['codigo']} ya existe", row['values'])
+                continue
+            if email in registered or email in self._emails:
+                if not row['email_generado']:
+                    report.add_error(row['fila'], f"El email {email} ya está registrado", row['values'])
+                    continue
+                row['email'] = unique_email(email, lambda candidate: candidate in self._emails
+                                            or self.db.email_registrado(candidate, conn))
+            self._emails.add(row['email'])
+            accepted.append(row)
+        return accepted
+
+    def _assign_codigos(self, rows):
+        """Reservar de una vez un bloque de correlativos por prefijo para las filas sin código"""
+        pending = {}
+        for row in rows:
+            if not row['codigo']:
+                pending.setdefault(row['prefix'], []).append(row)
+        # Los códigos indicados en el archivo adelantan el contador de su prefijo
+        self.db.register_codigos([row['codigo'] for row in rows if row['codigo']])
+        for prefix, prefix_rows in pending.items():
+            for row, codigo in zip(prefix_rows, self.db.reserve_codigos(prefix, len(prefix_rows))):
+                row['codigo'] = codigo
+                self._codigos.add(codigo)
+
+    # --- Inserción ----------------------------------------------------------------
+
+    def _student_params(self, row):
+        return (row['nombre'], row['apellido'], row['fecha_nacimiento'], row['genero'], row['direccion'],
+                row['telefono'], row['email'], row['codigo'], row['nivel_id'], row['grado_id'], row['seccion_id'])
+
+    def _tutor_params(self, estudiante_id, row):
+        values = row['values']
+        return (estudiante_id, values['tutor_nombre'], values['tutor_telefono'], values['tutor_email'], 1)
+
+    def _insert_chunk(self, conn, rows, report):
+        """Insertar un bloque en una transacción; si falla, reintentar fila por fila"""
+        rows = self._check_unique(conn, rows, report)
+        if not rows:
+            return
+        # Las reservas se confirman aparte: si el bloque falla, sus números no se reutilizan
+        self._assign_codigos(rows)
+        cursor = conn.cursor()
+        try:
+            cursor.executemany("""
+                INSERT INTO estudiantes
+                (nombre, apellido, fecha_nacimiento, genero, direccion, telefono, email, codigo,
+                 nivel_id, grado_id, seccion_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [self._student_params(row) for row in rows])
+            placeholders = ','.join('?' * len(rows))
+            cursor.execute(f"SELECT codigo, id FROM estudiantes WHERE codigo IN ({placeholders})",
+                           [row['codigo'] for row in rows])
+            ids = dict(cursor.fetchall())
+            cursor.executemany("""
+                INSERT INTO padres (estudiante_id, nombre, telefono, email, es_principal)
+                VALUES (?, ?, ?, ?, ?)
+            """, [self._tutor_params(ids[row['codigo']], row) for row in rows])
+            conn.commit()
+            report.imported += len(rows)
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            self._insert_rows(conn, rows, report)
+
+    def _insert_rows(self, conn, rows, report):
+        # Cada INSERT fallido se deshace solo; las demás filas del bloque se confirman juntas
+        cursor = conn.cursor()
+        imported = 0
+        try:
+            for row in rows:
+                try:
+                    cursor.execute("""
+                        INSERT INTO estudiantes
+                        (nombre, apellido, fecha_nacimiento, genero, direccion, telefono, email, codigo,
+                         nivel_id, grado_id, seccion_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, self._student_params(row))
+                except sqlite3.IntegrityError as e:
+                    mensaje = f"El código {row['codigo']} ya existe" if 'codigo' in str(e) else str(e)
+                    report.add_error(row['fila'], mensaje, row['values'])
+                    continue
+                cursor.execute("""
+                    INSERT INTO padres (estudiante_id, nombre, telefono, email, es_principal)
+                    VALUES (?, ?, ?, ?, ?)
+                """, self._tutor_params(cursor.lastrowid, row))
+                imported += 1
+            conn.commit()
+            report.imported += imported
+        except Exception:
+            conn.rollback()
+            raise
+
+
+class StudentImportThread(QThread):
+    """Ejecuta StudentImporter fuera del hilo de la interfaz"""
+    progress = Signal(int)          # filas procesadas
+    import_finished = Signal(object)  # ImportReport
+    import_failed = Signal(str)
+
+    def __init__(self, path, chunk_size=500):
+        super().__init__()
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def run(self):
+        try:
+            report = StudentImporter(self.chunk_size).import_file(self.path, self.progress.emit)
+        except Exception as e:
+            print(f"Error importando estudiantes: {e}")
+            self.import_failed.emit(str(e))
+            return
+        self.import_finished.emit(report)
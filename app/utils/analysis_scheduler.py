@@ -0,0 +1,89 @@
+import time
+import cv2
+from app.utils.settings import get_setting
+
+# Miniatura en escala de grises usada para detectar cambios de escena
+SCENE_THUMBNAIL_SIZE = (32, 24)
+
+
+class AnalysisScheduler:
+    """Decide en qué frames de la cámara se corre el análisis de emociones
+
+    En lugar de analizar cada N frames fijos, mide cuánto tarda cada análisis
+    (media móvil exponencial) y espacia los análisis para que ocupen como
+    máximo cpu_budget del tiempo: con 200 ms por análisis y un presupuesto de
+    0.25 se analiza cada 800 ms. El intervalo queda acotado entre
+    min_interval_ms y max_interval_ms. Un cambio de escena (diferencia media
+    entre miniaturas del frame actual y del último analizado) adelanta el
+    análisis sin bajar de min_interval_ms. Todo se ajusta en la sección
+    'emotion' de la configuración.
+    """
+
+    def __init__(self, cpu_budget=None, min_interval_ms=None, max_interval_ms=None,
+                 frame_interval_ms=None, scene_threshold=None):
+        self.cpu_budget = cpu_budget or get_setting('emotion', 'cpu_budget', 0.25)
+        self.min_interval_ms = min_interval_ms or get_setting('emotion', 'min_analysis_interval_ms', 150)
+        self.max_interval_ms = max_interval_ms or get_setting('emotion', 'max_analysis_interval_ms', 2000)
+        self.frame_interval_ms = frame_interval_ms or get_setting('emotion', 'frame_interval_ms', 33)
+        self.scene_threshold = scene_threshold or get_setting('emotion', 'scene_change_threshold', 8.0)
+        self.smoothing = 0.2
+        self.latency_ms = None
+        self.skipped_frames = 0
+        self._last_analysis = None
+        self._last_thumbnail = None
+
+    def _thumbnail(self, frame):
+        gray = frame if len(frame.shape) == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, SCENE_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+    def interval_ms(self):
+        """Tiempo mínimo entre análisis para no pasar del presupuesto de CPU"""
+        if self.latency_ms is None:
+            return self.min_interval_ms
+        return min(max(self.latency_ms / self.cpu_budget, self.min_interval_ms), self.max_interval_ms)
+
+    def scene_changed(self, frame):
+        """Diferencia media entre el frame y el último analizado mayor al umbral"""
+        if self._last_thumbnail is None:
+            return True
+        return cv2.absdiff(self._thumbnail(frame), self._last_thumbnail).mean() > self.scene_threshold
+
+    def should_analyze(self, frame):
+        """Si corresponde analizar este frame"""
+        if self._last_analysis is None:
+            return True
+        elapsed_ms = (time.monotonic() - self._last_analysis) * 1000
+        if elapsed_ms >= self.interval_ms():
+            return True
+        if elapsed_ms >= self.min_interval_ms and self.scene_changed(frame):
+            return True
+        return False
+
+    def record_analysis(self, frame, started):
+        """Registrar un análisis que empezó en started (time.monotonic())"""
+        now = time.monotonic()
+        latency_ms = (now - started) * 1000
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += self.smoothing * (latency_ms - self.latency_ms)
+        self._last_analysis = now
+        self._last_thumbnail = self._thumbnail(frame)
+
+    def frames_behind(self, loop_started):
+        """Frames de cámara acumulados mientras el ciclo estuvo ocupado
+
+        Se descartan (camera.grab()) para que el siguiente análisis use un
+        frame actual y no uno viejo del búfer; se limita a 5 por ciclo.
+        """
+        elapsed_ms = (time.monotonic() - loop_started) * 1000
+        behind = min(int(elapsed_ms // self.frame_interval_ms) - 1, 5)
+        if behind > 0:
+            self.skipped_frames += behind
+            return behind
+        return 0
+
+    def sleep_ms(self, loop_started):
+        """Pausa hasta el próximo frame descontando lo que tardó el ciclo"""
+        elapsed_ms = (time.monotonic() - loop_started) * 1000
+        return max(int(self.frame_interval_ms - elapsed_ms), 1)
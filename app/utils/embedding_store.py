@@ -0,0 +1,281 @@
+import os
+import json
+import pickle
+import numpy as np
+from pathlib import Path
+
+
+def _atomic_write(path, data):
+    """Escribir un archivo completo de forma atómica (tmp + fsync + replace)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class EmbeddingStore:
+    """Almacén de codificaciones en disco: matriz float32 memmap + bitácora de ids
+
+    Estructura del directorio:
+      manifest.json        generación activa y dimensión (se reemplaza atómicamente)
+      vectors-<gen>.npy    matriz (capacidad, dim) abierta con np.memmap
+      ids-<gen>.jsonl      bitácora append-only {"slot": n, "id": "...", "meta": {...}}
+                           o {"id": "...", "removed": true} para bajas
+
+    Cada escritura primero guarda el vector en un slot libre y luego agrega una
+    línea a la bitácora; la línea es el punto de confirmación. Si el proceso se
+    interrumpe a mitad de una escritura, el slot queda huérfano y una línea
+    incompleta se descarta al abrir, así que el contenido previo sigue intacto.
+    """
+
+    def __init__(self, directory, dim=128):
+        self.directory = Path(directory)
+        self.dim = dim
+        self.manifest_file = self.directory / 'manifest.json'
+        self.generation = 0
+        self._vectors = None
+        self._log = None
+        self._slot_by_id = {}
+        self._meta_by_id = {}
+        self._next_slot = 0
+
+    # --- Apertura y cierre -------------------------------------------------
+
+    def exists(self):
+        return self.manifest_file.exists()
+
+    def _vectors_file(self, generation):
+        return self.directory / f'vectors-{generation}.npy'
+
+    def _ids_file(self, generation):
+        return self.directory / f'ids-{generation}.jsonl'
+
+    def open(self):
+        """Abrir (o crear) el almacén sin copiar la matriz a memoria"""
+        os.makedirs(self.directory, exist_ok=True)
+        if not self.exists():
+            self._create_generation(1, capacity=64)
+        else:
+            manifest = json.loads(self.manifest_file.read_text(encoding='utf-8'))
+            self.generation = manifest['generation']
+            self.dim = manifest['dim']
+        self._remove_stale_files()
+
+        self._vectors = np.lib.format.open_memmap(self._vectors_file(self.generation), mode='r+')
+        self._replay_log()
+        self._log = open(self._ids_file(self.generation), 'ab')
+
+    def close(self):
+        """Liberar la bitácora y el memmap"""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+
+    def _create_generation(self, generation, capacity, rows=None, log_lines=b''):
+        """Escribir los archivos de una generación nueva y activarla vía manifest"""
+        vectors = np.lib.format.open_memmap(self._vectors_file(generation), mode='w+',
+                                            dtype=np.float32, shape=(capacity, self.dim))
+        if rows is not None and len(rows):
+            vectors[:len(rows)] = rows
+        vectors.flush()
+        del vectors
+        _atomic_write(self._ids_file(generation), log_lines)
+        manifest = {'version': 1, 'dim': self.dim, 'generation': generation}
+        _atomic_write(self.manifest_file, json.dumps(manifest).encode('utf-8'))
+        self.generation = generation
+
+    def _remove_stale_files(self):
+        """Eliminar archivos de generaciones anteriores o incompletas"""
+        current = {self._vectors_file(self.generation).name, self._ids_file(self.generation).name,
+                   self.manifest_file.name}
+        for path in self.directory.iterdir():
+            if path.name not in current and path.name.startswith(('vectors-', 'ids-', 'manifest.json.')):
+                try:
+                    path.unlink()
+                except OSError:
+                    # En Windows un archivo aún mapeado no se puede borrar; se reintenta al abrir
+                    pass
+
+    def _replay_log(self):
+        """Reconstruir el mapa id -> slot a partir de la bitácora"""
+        ids_file = self._ids_file(self.generation)
+        data = ids_file.read_bytes() if ids_file.exists() else b''
+        # Descartar una última línea incompleta (escritura interrumpida)
+        valid_length = data.rfind(b'\n') + 1
+        if valid_length != len(data):
+            with open(ids_file, 'r+b') as f:
+                f.truncate(valid_length)
+
+        self._slot_by_id = {}
+        self._meta_by_id = {}
+        self._next_slot = 0
+        capacity = self._vectors.shape[0]
+        for line in data[:valid_length].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('removed'):
+                self._slot_by_id.pop(record['id'], None)
+                self._meta_by_id.pop(record['id'], None)
+                continue
+            slot = record['slot']
+            if slot >= capacity:
+                continue
+            self._slot_by_id[record['id']] = slot
+            self._meta_by_id[record['id']] = record.get('meta', {})
+            self._next_slot = max(self._next_slot, slot + 1)
+
+    # --- Lectura ------------------------------------------------------------
+
+    def __len__(self):
+        return len(self._slot_by_id)
+
+    def __contains__(self, key):
+        return key in self._slot_by_id
+
+    @property
+    def ids(self):
+        """Ids activos en orden de slot"""
+        return sorted(self._slot_by_id, key=self._slot_by_id.get)
+
+    @property
+    def dead_slots(self):
+        return self._next_slot - len(self._slot_by_id)
+
+    def get(self, key):
+        slot = self._slot_by_id.get(key)
+        return None if slot is None else self._vectors[slot]
+
+    def metadata(self, key):
+        """Metadatos guardados junto al vector (dict vacío si no tiene)"""
+        return self._meta_by_id.get(key, {})
+
+    def live_vectors(self):
+        """Matriz de solo lectura con los vectores activos, en el orden de ids
+
+        Si no hay slots huérfanos es una vista directa del memmap (sin copia).
+        """
+        if self.dead_slots == 0:
+            view = self._vectors[:self._next_slot]
+        else:
+            slots = np.fromiter(sorted(self._slot_by_id.values()), dtype=np.int64, count=len(self))
+            view = np.asarray(self._vectors[slots])
+        view.flags.writeable = False
+        return view
+
+    # --- Escritura ------------------------------------------------------------
+
+    def _ensure_capacity(self, extra):
+        capacity = self._vectors.shape[0]
+        if self._next_slot + extra <= capacity:
+            return
+        new_capacity = max(2 * capacity, self._next_slot + extra)
+        # Los slots no cambian, así que la bitácora se copia tal cual
+        self._switch_generation(new_capacity, np.asarray(self._vectors[:self._next_slot]),
+                                self._ids_file(self.generation).read_bytes())
+
+    def _switch_generation(self, capacity, rows, log_lines):
+        old_generation = self.generation
+        self._log.close()
+        self._vectors.flush()
+        self._vectors = None
+        self._create_generation(old_generation + 1, capacity, rows, log_lines)
+        self._remove_stale_files()
+        self._vectors = np.lib.format.open_memmap(self._vectors_file(self.generation), mode='r+')
+        self._log = open(self._ids_file(self.generation), 'ab')
+
+    def _commit(self, records):
+        """Confirmar registros en la bitácora (punto atómico de cada escritura)"""
+        self._log.write(b''.join(json.dumps(r).encode('utf-8') + b'\n' for r in records))
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def _record(self, slot, key, meta):
+        record = {'slot': slot, 'id': key}
+        if meta:
+            record['meta'] = meta
+        return record
+
+    def extend(self, keys, vectors, metadata=None):
+        """Agregar o reemplazar varios vectores con una sola confirmación"""
+        keys = [str(k) for k in keys]
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        metadata = list(metadata) if metadata is not None else [None] * len(keys)
+        if len(keys) != vectors.shape[0] or len(keys) != len(metadata):
+            raise ValueError("La cantidad de ids no coincide con la de vectores")
+        if not keys:
+            return []
+        self._ensure_capacity(len(keys))
+        first = self._next_slot
+        self._vectors[first:first + len(keys)] = vectors
+        self._vectors.flush()
+
+        slots = list(range(first, first + len(keys)))
+        self._commit(self._record(slot, key, meta) for slot, key, meta in zip(slots, keys, metadata))
+        for slot, key, meta in zip(slots, keys, metadata):
+            self._slot_by_id[key] = slot
+            self._meta_by_id[key] = meta or {}
+        self._next_slot = first + len(keys)
+        self._maybe_compact()
+        return [self._slot_by_id[key] for key in keys]
+
+    def append(self, key, vector, meta=None):
+        """Agregar un vector (O(1) amortizado)"""
+        return self.extend([key], [vector], [meta])[0]
+
+    def update(self, key, vector, meta=None):
+        """Reemplazar el vector de un id existente
+
+        El vector nuevo se escribe en un slot libre y la bitácora reapunta el id,
+        de modo que una actualización interrumpida conserva el vector anterior.
+        """
+        return self.append(key, vector, meta)
+
+    def remove(self, keys):
+        """Dar de baja varios ids con una sola confirmación"""
+        keys = [str(k) for k in keys if str(k) in self._slot_by_id]
+        if not keys:
+            return
+        self._commit({'id': key, 'removed': True} for key in keys)
+        for key in keys:
+            del self._slot_by_id[key]
+            self._meta_by_id.pop(key, None)
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self.dead_slots > max(64, len(self)):
+            self.compact()
+
+    def compact(self):
+        """Reescribir el almacén sin slots huérfanos en una generación nueva"""
+        keys = self.ids
+        rows = np.asarray(self.live_vectors())
+        log_lines = b''.join(json.dumps(self._record(i, k, self._meta_by_id.get(k))).encode('utf-8') + b'\n'
+                             for i, k in enumerate(keys))
+        capacity = max(64, 2 * len(keys))
+        self._switch_generation(capacity, rows, log_lines)
+        self._slot_by_id = {k: i for i, k in enumerate(keys)}
+        self._next_slot = len(keys)
+
+    # --- Migración ------------------------------------------------------------
+
+    def migrate_from_pickle(self, pickle_file):
+        """Importar una sola vez el antiguo encodings.pkl y renombrarlo a .migrated"""
+        pickle_file = Path(pickle_file)
+        if not pickle_file.exists():
+            return 0
+        with open(pickle_file, 'rb') as f:
+            data = pickle.load(f)
+        names = [str(n) for n in data.get('names', [])]
+        encodings = data.get('encodings', [])
+        if names:
+            self.extend(names, np.asarray(encodings, dtype=np.float32))
+        os.replace(pickle_file, pickle_file.with_name(pickle_file.name + '.migrated'))
+        print(f"Migradas {len(names)} codificaciones faciales desde {pickle_file.name}")
+        return len(names)
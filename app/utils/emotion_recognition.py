@@ -1,13 +1,158 @@
 import cv2
 import numpy as np
-from deepface import DeepFace
 import random
+import threading
+import time
+from PySide6.QtCore import QObject, Signal
+
+# Salidas del modelo Emotion de DeepFace, en el orden de sus probabilidades
+DEEPFACE_EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+EMOTION_INPUT_SIZE = (48, 48)  # Entrada del modelo: rostro en escala de grises 48x48
+
+# Emociones de DeepFace -> nombres usados en la aplicación
+EMOTION_MAPPING = {
+    'happy': 'happy',
+    'sad': 'sad',
+    'angry': 'angry',
+    'surprise': 'surprised',
+    'fear': 'scared',
+    'disgust': 'disgusted',
+    'neutral': 'neutral'
+}
+
+class EmotionModelService(QObject):
+    """Modelo de emociones de DeepFace compartido por todo el proceso
+
+    DeepFace construye el modelo y el grafo de TensorFlow en la primera
+    llamada, lo que congelaba unos segundos cada hilo de análisis nuevo. El
+    servicio lo carga una sola vez, en segundo plano con warmup() al iniciar la
+    aplicación o en el primer uso, y todas las instancias de EmotionRecognition
+    lo comparten. status_changed permite mostrar el estado en la interfaz.
+    """
+    COLD, LOADING, READY, ERROR = 'cold', 'loading', 'ready', 'error'
+    STATUS_TEXT = {
+        COLD: "Modelo de emociones: sin cargar",
+        LOADING: "Modelo de emociones: cargando...",
+        READY: "Modelo de emociones: listo",
+        ERROR: "Modelo de emociones: error al cargar",
+    }
+    status_changed = Signal(str)
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(EmotionModelService, cls).__new__(cls)
+            QObject.__init__(cls._instance)
+            cls._instance.status = cls.COLD
+            cls._instance.error = None
+            cls._instance.load_time = None
+            cls._instance._deepface = None
+            cls._instance._emotion_model = None
+            cls._instance._ready = threading.Event()
+            cls._instance._load_lock = threading.Lock()
+            cls._instance._inference_lock = threading.Lock()  # El modelo de Keras no es seguro entre hilos
+        return cls._instance
+    
+    def __init__(self):
+        pass  # Inicializado una sola vez en __new__
+    
+    def _set_status(self, status):
+        self.status = status
+        self.status_changed.emit(status)
+    
+    def status_text(self):
+        return self.STATUS_TEXT[self.status]
+    
+    def is_ready(self):
+        return self.status == self.READY
+    
+    def warmup(self):
+        """Cargar el modelo en un hilo de fondo (no bloquea); sin efecto si ya está cargado o cargando"""
+        with self._load_lock:
+            if self.status not in (self.COLD, self.ERROR):
+                return
+            self._ready.clear()
+            self._set_status(self.LOADING)
+        threading.Thread(target=self._load, name="emotion-model-warmup", daemon=True).start()
+    
+    def _load(self):
+        try:
+            started = time.perf_counter()
+            from deepface import DeepFace
+            try:
+                client = DeepFace.build_model('Emotion', task='facial_attribute')
+            except TypeError:
+                client = DeepFace.build_model('Emotion')  # Versiones de DeepFace sin el parámetro task
+            # Las versiones nuevas envuelven el modelo de Keras en un cliente con atributo .model
+            self._emotion_model = getattr(client, 'model', client)
+            # Una inferencia de prueba construye el grafo de TensorFlow antes del primer frame real
+            DeepFace.analyze(np.zeros((48, 48, 3), dtype=np.uint8), actions=['emotion'],
+                             enforce_detection=False, detector_backend='skip')
+            self._deepface = DeepFace
+            self.load_time = time.perf_counter() - started
+            print(f"Modelo de emociones cargado en {self.load_time:.1f} s")
+            self._set_status(self.READY)
+        except Exception as e:
+            print(f"Error al cargar el modelo de emociones: {e}")
+            self.error = str(e)
+            self._set_status(self.ERROR)
+        finally:
+            self._ready.set()
+    
+    def wait_until_ready(self, timeout=None):
+        """Esperar la carga (iniciándola si no empezó); True si el modelo está listo
+
+        Tras un error no se reintenta en cada llamada: hay que volver a llamar a warmup().
+        """
+        if self.status == self.COLD:
+            self.warmup()
+        self._ready.wait(timeout)
+        return self.is_ready()
+    
+    def analyze(self, image, **kwargs):
+        """DeepFace.analyze con el modelo ya cargado; bloquea solo la primera vez"""
+        if not self.wait_until_ready():
+            raise RuntimeError(f"Modelo de emociones no disponible: {self.error}")
+        with self._inference_lock:
+            return self._deepface.analyze(image, **kwargs)
+    
+    def predict_emotions(self, faces):
+        """Una sola pasada del modelo para varios rostros
+
+        faces: lista de rostros en escala de grises de EMOTION_INPUT_SIZE (uint8).
+        Devuelve una matriz (rostros, 7) con porcentajes en el orden de DEEPFACE_EMOTIONS.
+        """
+        if not faces:
+            return np.zeros((0, len(DEEPFACE_EMOTIONS)), dtype=np.float32)
+        if not self.wait_until_ready():
+            raise RuntimeError(f"Modelo de emociones no disponible: {self.error}")
+        # Mismo preprocesamiento que DeepFace: gris 48x48 escalado a [0, 1]
+        batch = np.stack(faces).astype(np.float32)[..., np.newaxis] / 255.0
+        with self._inference_lock:
+            predictions = np.asarray(self._emotion_model.predict(batch, verbose=0), dtype=np.float32)
+        totals = predictions.sum(axis=1, keepdims=True)
+        return 100.0 * predictions / np.where(totals > 0, totals, 1.0)
+    
+    def extract_face_boxes(self, image, detector_backend='opencv'):
+        """Rostros (x, y, w, h) encontrados por el detector de DeepFace"""
+        if not self.wait_until_ready():
+            raise RuntimeError(f"Modelo de emociones no disponible: {self.error}")
+        faces = self._deepface.extract_faces(image, detector_backend=detector_backend, enforce_detection=False)
+        boxes = []
+        for face in faces:
+            # Sin rostros, DeepFace devuelve la imagen completa con confianza 0
+            if face.get('confidence', 1) <= 0:
+                continue
+            area = face['facial_area']
+            boxes.append((area['x'], area['y'], area['w'], area['h']))
+        return boxes
 
 class EmotionRecognition:
     def __init__(self):
         self.emotions = ['happy', 'sad', 'angry', 'surprised', 'scared', 'disgusted', 'neutral']
         self.emotion_history = {}
         self.confidence_threshold = 0.3  # Umbral mínimo de confianza
+        self.model_service = EmotionModelService()
     
     def detect_emotion(self, image):
         """Detectar emoción en una imagen con confianza real"""
@@ -21,7 +166,7 @@ class EmotionRecognition:
                 image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
             
             # Analizar la emoción con DeepFace
-            result = DeepFace.analyze(image, actions=['emotion'], enforce_detection=False)
+            result = self.model_service.analyze(image, actions=['emotion'], enforce_detection=False)
             
             if isinstance(result, list):
                 result = result[0]  # Tomar el primer rostro si hay varios
@@ -34,17 +179,7 @@ class EmotionRecognition:
             confidence = emotions_scores[dominant_emotion] / 100.0  # DeepFace devuelve porcentajes
             
             # Mapear emociones de DeepFace a nuestro sistema
-            emotion_mapping = {
-                'happy': 'happy',
-                'sad': 'sad',
-                'angry': 'angry',
-                'surprise': 'surprised',
-                'fear': 'scared',
-                'disgust': 'disgusted',
-                'neutral': 'neutral'
-            }
-            
-            mapped_emotion = emotion_mapping.get(dominant_emotion, 'neutral')
+            mapped_emotion = EMOTION_MAPPING.get(dominant_emotion, 'neutral')
             
             # Solo devolver si la confianza es suficiente
             if confidence >= self.confidence_threshold:
@@ -57,20 +192,56 @@ class EmotionRecognition:
             # Devolver valores por defecto en caso de error
             return 'neutral', 0.0, {}
     
+    def detect_emotions_batch(self, image, boxes=None):
+        """Emociones de todos los rostros de la imagen con una sola inferencia
+
+        boxes: rostros (x, y, w, h) ya detectados; si es None se usa el detector
+        de DeepFace. Devuelve una lista de dicts por rostro con box, emotion,
+        confidence, scores (porcentajes de DeepFace) y distribution (0-1).
+        """
+        try:
+            if boxes is None:
+                boxes = self.model_service.extract_face_boxes(image)
+            if len(image.shape) == 2:
+                gray = image
+            elif image.shape[2] == 4:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+            else:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            
+            # Recortar cada rostro (limitado a la imagen) al tamaño de entrada del modelo
+            height, width = gray.shape[:2]
+            crops, kept_boxes = [], []
+            for (x, y, w, h) in boxes:
+                x0, y0 = max(int(x), 0), max(int(y), 0)
+                x1, y1 = min(int(x + w), width), min(int(y + h), height)
+                if x1 <= x0 or y1 <= y0:
+                    continue
+                crops.append(cv2.resize(gray[y0:y1, x0:x1], EMOTION_INPUT_SIZE, interpolation=cv2.INTER_AREA))
+                kept_boxes.append((x0, y0, x1 - x0, y1 - y0))
+            
+            results = []
+            for box, percentages in zip(kept_boxes, self.model_service.predict_emotions(crops)):
+                scores = {emotion: float(value) for emotion, value in zip(DEEPFACE_EMOTIONS, percentages)}
+                dominant_emotion = max(scores, key=scores.get)
+                confidence = scores[dominant_emotion] / 100.0
+                emotion = EMOTION_MAPPING.get(dominant_emotion, 'neutral')
+                results.append({
+                    'box': box,
+                    'emotion': emotion if confidence >= self.confidence_threshold else 'neutral',
+                    'confidence': confidence,
+                    'scores': scores,
+                    'distribution': self.get_emotion_distribution(scores),
+                })
+            return results
+        except Exception as e:
+            print(f"Error al detectar emociones por lote: {str(e)}")
+            return []
+    
     def get_emotion_distribution(self, emotions_scores):
         """Obtener distribución de todas las emociones"""
         distribution = {}
-        emotion_mapping = {
-            'happy': 'happy',
-            'sad': 'sad', 
-            'angry': 'angry',
-            'surprise': 'surprised',
-            'fear': 'scared',
-            'disgust': 'disgusted',
-            'neutral': 'neutral'
-        }
-        
-        for deepface_emotion, our_emotion in emotion_mapping.items():
+        for deepface_emotion, our_emotion in EMOTION_MAPPING.items():
             if deepface_emotion in emotions_scores:
                 distribution[our_emotion] = emotions_scores[deepface_emotion] / 100.0
             else:
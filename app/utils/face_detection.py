@@ -0,0 +1,145 @@
+import os
+import threading
+import cv2
+from app.utils.settings import get_setting
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'models')
+HAAR_CASCADE_FILE = 'haarcascade_frontalface_default.xml'
+# Detector SSD res10 de OpenCV (deploy.prototxt + pesos Caffe, ver samples/dnn/face_detector)
+DNN_PROTOTXT_FILE = 'deploy.prototxt'
+DNN_WEIGHTS_FILE = 'res10_300x300_ssd_iter_140000.caffemodel'
+DNN_INPUT_SIZE = (300, 300)
+DNN_MEAN = (104.0, 177.0, 123.0)
+
+
+class HaarFaceDetector:
+    """Cascada Haar de OpenCV, cargada una sola vez por proceso
+
+    CascadeClassifier no es seguro entre hilos, así que detect() se serializa
+    con un lock propio; la vista en vivo y la de reportes comparten la instancia.
+    """
+
+    def __init__(self, cascade_file=None):
+        cascade_file = cascade_file or os.path.join(cv2.data.haarcascades, HAAR_CASCADE_FILE)
+        self.cascade = cv2.CascadeClassifier(cascade_file)
+        if self.cascade.empty():
+            raise RuntimeError(f"No se pudo cargar la cascada Haar: {cascade_file}")
+        self._lock = threading.Lock()
+
+    def detect(self, frame, scale=1.0, min_face_size=40):
+        """Rostros (x, y, w, h) en coordenadas del frame original"""
+        gray = frame if len(frame.shape) == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if scale != 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        min_size = max(int(min_face_size * scale), 12)
+        with self._lock:
+            faces = self.cascade.detectMultiScale(gray, 1.1, 4, minSize=(min_size, min_size))
+        return [tuple(int(round(v / scale)) for v in face) for face in faces]
+
+
+class DnnFaceDetector:
+    """Detector SSD res10 de OpenCV (cv2.dnn), cargado una sola vez por proceso
+
+    Los archivos del modelo se buscan en model_dir (por defecto data/models).
+    La red siempre trabaja a 300x300, así que la escala de detección no aplica.
+    """
+
+    def __init__(self, model_dir=None, confidence_threshold=None):
+        model_dir = model_dir or get_setting('emotion', 'dnn_model_dir', MODELS_DIR)
+        prototxt = os.path.join(model_dir, DNN_PROTOTXT_FILE)
+        weights = os.path.join(model_dir, DNN_WEIGHTS_FILE)
+        for path in (prototxt, weights):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Falta el modelo del detector DNN: {path}")
+        self.net = cv2.dnn.readNetFromCaffe(prototxt, weights)
+        self.confidence_threshold = confidence_threshold or get_setting('emotion', 'dnn_confidence', 0.5)
+        self._lock = threading.Lock()
+
+    def detect(self, frame, scale=1.0, min_face_size=40):
+        """Rostros (x, y, w, h) en coordenadas del frame original"""
+        if len(frame.shape) == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        height, width = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(cv2.resize(frame, DNN_INPUT_SIZE), 1.0, DNN_INPUT_SIZE, DNN_MEAN)
+        with self._lock:
+            self.net.setInput(blob)
+            detections = self.net.forward()
+
+        faces = []
+        for detection in detections[0, 0]:
+            if detection[2] < self.confidence_threshold:
+                continue
+            x0, y0 = max(int(detection[3] * width), 0), max(int(detection[4] * height), 0)
+            x1, y1 = min(int(detection[5] * width), width), min(int(detection[6] * height), height)
+            if x1 - x0 >= min_face_size and y1 - y0 >= min_face_size:
+                faces.append((x0, y0, x1 - x0, y1 - y0))
+        return faces
+
+
+# Detectores locales disponibles; el resto de nombres se delega a DeepFace
+FACE_DETECTORS = {
+    'haar': HaarFaceDetector,
+    'dnn': DnnFaceDetector,
+}
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def get_face_detector(name='haar'):
+    """Instancia compartida del detector indicado, creada en el primer uso
+
+    Cada modelo se lee del disco una sola vez por proceso. Si la carga falla
+    se lanza la excepción y se reintentará en la próxima llamada.
+    """
+    with _detectors_lock:
+        if name not in _detectors:
+            _detectors[name] = FACE_DETECTORS[name]()
+        return _detectors[name]
+
+
+class FaceDetectionStage:
+    """Etapa de detección de rostros compartida por el clasificador y el overlay
+
+    Los rostros se buscan una sola vez por frame con un detector barato y
+    configurable (sección 'emotion' de la configuración). Las mismas cajas se
+    recortan para el modelo de emociones, sin que DeepFace vuelva a detectar
+    (equivale a detector_backend='skip'), y se usan para dibujar el overlay.
+
+    detector: 'haar' (cascada de OpenCV), 'dnn' (SSD res10 de OpenCV) o
+    cualquier detector_backend de DeepFace ('opencv', 'ssd', 'mtcnn', ...).
+    """
+
+    def __init__(self, detector=None, scale=None, min_face_size=None):
+        self.detector = detector or get_setting('emotion', 'face_detector', 'haar')
+        self.scale = scale or get_setting('emotion', 'detection_scale', 0.5)
+        self.min_face_size = min_face_size or get_setting('emotion', 'min_face_size', 40)
+
+    def _local_detector(self):
+        try:
+            return get_face_detector(self.detector)
+        except Exception as e:
+            # Sin los archivos del modelo DNN se sigue con la cascada Haar
+            if self.detector == 'haar':
+                raise
+            print(f"Error al cargar el detector '{self.detector}', se usará 'haar': {str(e)}")
+            self.detector = 'haar'
+            return get_face_detector('haar')
+
+    def detect(self, frame):
+        """Rostros (x, y, w, h) en coordenadas del frame original"""
+        try:
+            if self.detector not in FACE_DETECTORS:
+                from app.utils.emotion_recognition import EmotionModelService
+                return EmotionModelService().extract_face_boxes(frame, detector_backend=self.detector)
+            return self._local_detector().detect(frame, self.scale, self.min_face_size)
+        except Exception as e:
+            print(f"Error al detectar rostros: {str(e)}")
+            return []
+
+    @staticmethod
+    def primary_face(results):
+        """Resultado del rostro más grande (el más cercano a la cámara), o None"""
+        if not results:
+            return None
+        return max(results, key=lambda result: result['box'][2] * result['box'][3])
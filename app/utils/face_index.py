@@ -0,0 +1,384 @@
+import time
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # Dependencia opcional: solo necesaria para el backend 'hnsw'
+    hnswlib = None
+
+BACKENDS = ('exact', 'ivf', 'hnsw', 'auto')
+
+
+class FaceIndex:
+    """Índice en memoria de codificaciones faciales para búsquedas por lotes"""
+
+    def __init__(self, dim=128):
+        self.dim = dim
+        self._buffer = np.empty((0, dim), dtype=np.float32)
+        self._sq_norms = np.empty((0,), dtype=np.float32)
+        self._size = 0
+        self.labels = []
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def matrix(self):
+        """Matriz contigua (n, dim) con las codificaciones activas"""
+        return self._buffer[:self._size]
+
+    def build(self, encodings, labels):
+        """Reconstruir el índice completo a partir de codificaciones y etiquetas"""
+        labels = list(labels)
+        if len(labels) == 0:
+            self._buffer = np.empty((0, self.dim), dtype=np.float32)
+        else:
+            # np.ascontiguousarray no copia si ya es float32 contiguo (p. ej. un memmap)
+            self._buffer = np.ascontiguousarray(np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim))
+        if self._buffer.shape[0] != len(labels):
+            raise ValueError("La cantidad de codificaciones no coincide con la de etiquetas")
+        self._size = len(labels)
+        self.labels = labels
+        self._sq_norms = np.einsum('ij,ij->i', self._buffer, self._buffer)
+
+    def add(self, encoding, label):
+        """Agregar una codificación al final del índice (amortizado O(1))"""
+        encoding = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        if self._size == self._buffer.shape[0] or not self._buffer.flags.writeable:
+            capacity = max(16, 2 * self._buffer.shape[0])
+            buffer = np.empty((capacity, self.dim), dtype=np.float32)
+            buffer[:self._size] = self._buffer[:self._size]
+            norms = np.empty((capacity,), dtype=np.float32)
+            norms[:self._size] = self._sq_norms[:self._size]
+            self._buffer, self._sq_norms = buffer, norms
+        self._buffer[self._size] = encoding
+        self._sq_norms[self._size] = encoding.dot(encoding)
+        self.labels.append(label)
+        self._size += 1
+        return self._size - 1
+
+    def update(self, position, encoding):
+        """Reemplazar la codificación en una posición existente"""
+        if not 0 <= position < self._size:
+            raise IndexError("Posición fuera del índice")
+        encoding = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        if not self._buffer.flags.writeable:
+            self._buffer = self._buffer[:self._size].copy()
+            self._sq_norms = self._sq_norms[:self._size].copy()
+        self._buffer[position] = encoding
+        self._sq_norms[position] = encoding.dot(encoding)
+
+    def position_of(self, label):
+        """Posición de una etiqueta en el índice, o None si no existe"""
+        try:
+            return self.labels.index(label)
+        except ValueError:
+            return None
+
+    def pairwise_distances(self, queries, positions=None):
+        """Distancias euclidianas (m, n) entre las consultas y el índice (o un subconjunto)"""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        if positions is None:
+            matrix, sq_norms = self.matrix, self._sq_norms[:self._size]
+        else:
+            matrix, sq_norms = self._buffer[positions], self._sq_norms[positions]
+        # ||q - x||^2 = ||q||^2 + ||x||^2 - 2 q·x, en una sola multiplicación de matrices
+        sq = np.einsum('ij,ij->i', queries, queries)[:, None] + sq_norms[None, :]
+        sq -= 2.0 * (queries @ matrix.T)
+        np.maximum(sq, 0.0, out=sq)
+        return np.sqrt(sq)
+
+    def search(self, queries, k=1, exact=False):
+        """Buscar los k vecinos más cercanos de cada consulta
+
+        Esta clase recorre todos los vectores, así que el resultado siempre es
+        exacto; exact=True solo cambia algo en los backends aproximados (IVF,
+        HNSW), que en ese caso recurren a esta misma búsqueda por fuerza bruta.
+        Devuelve (posiciones, distancias), ambos con forma (m, k) y ordenados
+        de menor a mayor distancia.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        m = queries.shape[0]
+        k = min(k, self._size)
+        if m == 0 or k == 0:
+            return np.empty((m, 0), dtype=np.int64), np.empty((m, 0), dtype=np.float32)
+
+        distances = self.pairwise_distances(queries)
+        if k < self._size:
+            top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(self._size), (m, self._size))
+        top_distances = np.take_along_axis(distances, top, axis=1)
+        order = np.argsort(top_distances, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_distances, order, axis=1)
+
+    def match(self, queries, k=1, tolerance=0.6, exact=False):
+        """Candidatos (etiqueta, distancia) por consulta dentro de la tolerancia"""
+        positions, distances = self.search(queries, k, exact=exact)
+        results = []
+        for row_positions, row_distances in zip(positions, distances):
+            results.append([(self.labels[p], float(d))
+                            for p, d in zip(row_positions, row_distances) if d <= tolerance])
+        return results
+
+
+def _nearest_centroids(data, centroids, chunk_size=8192):
+    """Índice del centroide más cercano para cada fila de data"""
+    centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+    assignments = np.empty((data.shape[0],), dtype=np.int64)
+    for start in range(0, data.shape[0], chunk_size):
+        chunk = data[start:start + chunk_size]
+        # ||x||^2 es constante por fila, no afecta al argmin
+        scores = centroid_norms[None, :] - 2.0 * (chunk @ centroids.T)
+        assignments[start:start + chunk_size] = np.argmin(scores, axis=1)
+    return assignments
+
+
+def _kmeans(data, n_clusters, iterations=10, seed=0, sample_per_cluster=256):
+    """K-means simple (Lloyd) sobre una muestra de los datos"""
+    rng = np.random.default_rng(seed)
+    if data.shape[0] > n_clusters * sample_per_cluster:
+        data = data[np.sort(rng.choice(data.shape[0], n_clusters * sample_per_cluster, replace=False))]
+    centroids = data[rng.choice(data.shape[0], n_clusters, replace=False)].astype(np.float32)
+
+    for _ in range(iterations):
+        assignments = _nearest_centroids(data, centroids)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        order = np.argsort(assignments, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        filled = counts > 0
+        sums = np.add.reduceat(data[order], starts[filled], axis=0)
+        centroids[filled] = sums / counts[filled, None]
+        # Reiniciar clusters vacíos con puntos aleatorios
+        if not filled.all():
+            centroids[~filled] = data[rng.choice(data.shape[0], int((~filled).sum()))]
+    return centroids
+
+
+class IVFFaceIndex(FaceIndex):
+    """Índice IVF: particiona las codificaciones con k-means y solo revisa las listas más cercanas
+
+    Por debajo de min_train_size se comporta como la búsqueda exacta.
+    """
+
+    def __init__(self, dim=128, nlist=None, nprobe=8, min_train_size=2048, kmeans_iterations=10, seed=0):
+        super().__init__(dim)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self.centroids = None
+        self._lists = []
+        self._assignments = []
+        self._trained_size = 0
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def build(self, encodings, labels):
+        super().build(encodings, labels)
+        self.train()
+
+    def train(self):
+        """Entrenar los centroides y repartir todas las codificaciones en listas"""
+        n = len(self)
+        if n < self.min_train_size:
+            self.centroids = None
+            self._lists, self._assignments, self._trained_size = [], [], 0
+            return
+        nlist = min(self.nlist or int(np.sqrt(n)), n)
+        self.centroids = _kmeans(self.matrix, nlist, self.kmeans_iterations, self.seed)
+        assignments = _nearest_centroids(self.matrix, self.centroids)
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=nlist)
+        self._lists = np.split(order, np.cumsum(counts)[:-1])
+        self._assignments = assignments.tolist()
+        self._trained_size = n
+
+    def add(self, encoding, label):
+        position = super().add(encoding, label)
+        if not self.trained:
+            if len(self) >= self.min_train_size:
+                self.train()
+        elif len(self) >= 2 * self._trained_size:
+            # Reentrenar cuando el índice duplica su tamaño para mantener listas equilibradas
+            self.train()
+        else:
+            cluster = int(_nearest_centroids(self._buffer[position:position + 1], self.centroids)[0])
+            self._lists[cluster] = np.append(self._lists[cluster], position)
+            self._assignments.append(cluster)
+        return position
+
+    def update(self, position, encoding):
+        super().update(position, encoding)
+        if not self.trained:
+            return
+        old_cluster = self._assignments[position]
+        new_cluster = int(_nearest_centroids(self._buffer[position:position + 1], self.centroids)[0])
+        if new_cluster != old_cluster:
+            self._lists[old_cluster] = self._lists[old_cluster][self._lists[old_cluster] != position]
+            self._lists[new_cluster] = np.append(self._lists[new_cluster], position)
+            self._assignments[position] = new_cluster
+
+    def search(self, queries, k=1, exact=False):
+        """Búsqueda aproximada; exact=True (o índice sin entrenar) usa fuerza bruta"""
+        if exact or not self.trained:
+            return FaceIndex.search(self, queries, k)
+
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        m = queries.shape[0]
+        k = min(k, len(self))
+        positions = np.full((m, k), -1, dtype=np.int64)
+        distances = np.full((m, k), np.inf, dtype=np.float32)
+        if m == 0 or k == 0:
+            return positions, distances
+
+        nprobe = min(self.nprobe, self.centroids.shape[0])
+        centroid_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        centroid_scores = centroid_norms[None, :] - 2.0 * (queries @ self.centroids.T)
+        probes = np.argpartition(centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+
+        for i in range(m):
+            candidates = np.concatenate([self._lists[c] for c in probes[i]])
+            if candidates.size == 0:
+                continue
+            candidate_distances = self.pairwise_distances(queries[i:i + 1], candidates)[0]
+            kk = min(k, candidates.size)
+            top = np.argpartition(candidate_distances, kk - 1)[:kk] if kk < candidates.size else np.arange(kk)
+            top = top[np.argsort(candidate_distances[top])]
+            positions[i, :kk] = candidates[top]
+            distances[i, :kk] = candidate_distances[top]
+        return positions, distances
+
+
+class HNSWFaceIndex(FaceIndex):
+    """Índice HNSW basado en hnswlib (dependencia opcional)"""
+
+    def __init__(self, dim=128, M=16, ef_construction=200, ef_search=64):
+        if hnswlib is None:
+            raise ImportError("Para usar el backend 'hnsw', instala: pip install hnswlib")
+        super().__init__(dim)
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._graph = None
+
+    def _new_graph(self, capacity):
+        graph = hnswlib.Index(space='l2', dim=self.dim)
+        graph.init_index(max_elements=max(capacity, 16), ef_construction=self.ef_construction, M=self.M)
+        graph.set_ef(self.ef_search)
+        return graph
+
+    def build(self, encodings, labels):
+        super().build(encodings, labels)
+        self._graph = self._new_graph(len(self))
+        if len(self):
+            self._graph.add_items(self.matrix, np.arange(len(self)))
+
+    def add(self, encoding, label):
+        position = super().add(encoding, label)
+        if self._graph is None:
+            self._graph = self._new_graph(16)
+        if self._graph.get_current_count() >= self._graph.get_max_elements():
+            self._graph.resize_index(2 * self._graph.get_max_elements())
+        self._graph.add_items(self._buffer[position:position + 1], [position])
+        return position
+
+    def update(self, position, encoding):
+        super().update(position, encoding)
+        # hnswlib actualiza el vector si la etiqueta ya existe
+        self._graph.add_items(self._buffer[position:position + 1], [position])
+
+    def search(self, queries, k=1, exact=False):
+        """Búsqueda aproximada; exact=True usa fuerza bruta"""
+        if exact or self._graph is None or len(self) == 0:
+            return FaceIndex.search(self, queries, k)
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        k = min(k, len(self))
+        if queries.shape[0] == 0:
+            return np.empty((0, k), dtype=np.int64), np.empty((0, k), dtype=np.float32)
+        self._graph.set_ef(max(self.ef_search, k))
+        positions, sq_distances = self._graph.knn_query(queries, k=k)
+        return positions.astype(np.int64), np.sqrt(np.maximum(sq_distances, 0.0))
+
+
+def create_face_index(backend='auto', dim=128, **options):
+    """Crear un índice facial para el backend indicado
+
+    'exact' es fuerza bruta, 'ivf' particiona con k-means, 'hnsw' requiere hnswlib
+    y 'auto' usa IVF (que se comporta como exacto con pocos rostros).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de índice desconocido: {backend}")
+    if backend == 'exact':
+        return FaceIndex(dim)
+    if backend == 'hnsw':
+        try:
+            return HNSWFaceIndex(dim, **options)
+        except ImportError as e:
+            print(f"{e}. Usando búsqueda exacta.")
+            return FaceIndex(dim)
+    return IVFFaceIndex(dim, **options)
+
+
+def _synthetic_encodings(n, n_queries, dim, seed):
+    """Codificaciones sintéticas con separación similar a las de face_recognition"""
+    rng = np.random.default_rng(seed)
+    # Personas distintas quedan a ~1.0 de distancia; capturas de la misma persona a ~0.35
+    identities = rng.normal(0.0, 0.75 / np.sqrt(dim), size=(n, dim)).astype(np.float32)
+    targets = rng.choice(n, n_queries, replace=False)
+    noise = rng.normal(0.0, 0.35 / np.sqrt(dim), size=(n_queries, dim)).astype(np.float32)
+    return identities, identities[targets] + noise
+
+
+def benchmark(n=20000, n_queries=400, faces_per_frame=4, k=1, dim=128, seed=0):
+    """Comparar recall@k y latencia de cada backend contra la búsqueda exacta"""
+    data, queries = _synthetic_encodings(n, n_queries, dim, seed)
+    labels = list(range(n))
+    batches = [queries[i:i + faces_per_frame] for i in range(0, n_queries, faces_per_frame)]
+
+    exact = FaceIndex(dim)
+    exact.build(data, labels)
+    truth, _ = exact.search(queries, k)
+
+    configs = [('exact', {}, [None])]
+    configs.append(('ivf', {'min_train_size': 0}, [1, 2, 4, 8, 16, 32]))
+    if hnswlib is not None:
+        configs.append(('hnsw', {}, [16, 32, 64, 128]))
+    else:
+        print("hnswlib no está instalado; se omite el backend 'hnsw'")
+
+    results = []
+    print(f"{n} codificaciones, {n_queries} consultas en lotes de {faces_per_frame}")
+    print(f"{'backend':<8}{'param':>8}{'build (s)':>12}{'ms/frame':>12}{'recall@' + str(k):>12}")
+    for backend, options, params in configs:
+        start = time.perf_counter()
+        index = create_face_index(backend, dim, **options)
+        index.build(data, labels)
+        build_time = time.perf_counter() - start
+
+        for param in params:
+            if backend == 'ivf':
+                index.nprobe = param
+            elif backend == 'hnsw':
+                index.ef_search = param
+            found = []
+            start = time.perf_counter()
+            for batch in batches:
+                positions, _ = index.search(batch, k)
+                found.append(positions)
+            elapsed = time.perf_counter() - start
+            found = np.vstack(found)
+            recall = np.mean([len(set(t) & set(f)) / k for t, f in zip(truth, found)])
+            ms_per_frame = 1000.0 * elapsed / len(batches)
+            results.append({'backend': backend, 'param': param, 'build_s': build_time,
+                            'ms_per_frame': ms_per_frame, 'recall': recall})
+            print(f"{backend:<8}{str(param or '-'):>8}{build_time:>12.2f}{ms_per_frame:>12.3f}{recall:>12.3f}")
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(n=int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,112 @@
+def box_iou(a, b):
+    """IoU entre dos cajas (top, right, bottom, left)"""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    if bottom <= top or right <= left:
+        return 0.0
+    intersection = (bottom - top) * (right - left)
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    return intersection / float(area_a + area_b - intersection)
+
+
+class FaceTracker:
+    """Seguimiento de rostros entre frames por IoU
+
+    Cada track conserva la identidad reconocida y una confianza que decae en
+    cada frame. La confianza inicial es el margen de la coincidencia respecto
+    de la tolerancia del reconocimiento (1 - distancia / tolerancia): 1 para
+    una coincidencia exacta y 0 en el límite. Solo hace falta volver a
+    reconocer un track nuevo, uno cuya confianza bajó de min_confidence o uno
+    sin identidad; en ambos casos no antes de retry_frames, para que las
+    coincidencias cercanas a la tolerancia no se codifiquen en cada frame.
+    """
+
+    def __init__(self, tolerance=0.6, iou_threshold=0.3, max_missed=5, confidence_decay=0.97,
+                 min_confidence=0.2, retry_frames=5):
+        self.tolerance = tolerance
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.confidence_decay = confidence_decay
+        self.min_confidence = min_confidence
+        self.retry_frames = retry_frames
+        self.tracks = {}
+        self._next_id = 1
+
+    def reset(self):
+        self.tracks = {}
+
+    def update(self, locations):
+        """Asociar las detecciones del frame a los tracks; devuelve un track por detección"""
+        pairs = []
+        for track_id, track in self.tracks.items():
+            for index, location in enumerate(locations):
+                iou = box_iou(track['location'], location)
+                if iou >= self.iou_threshold:
+                    pairs.append((iou, track_id, index))
+        pairs.sort(reverse=True)
+
+        # Asociación voraz: mayor IoU primero
+        assigned = [None] * len(locations)
+        used_tracks = set()
+        for iou, track_id, index in pairs:
+            if assigned[index] is None and track_id not in used_tracks:
+                assigned[index] = track_id
+                used_tracks.add(track_id)
+
+        for track_id in list(self.tracks):
+            track = self.tracks[track_id]
+            if track_id in used_tracks:
+                track['missed'] = 0
+                track['confidence'] *= self.confidence_decay
+                track['frames_since_recognition'] += 1
+            else:
+                track['missed'] += 1
+                if track['missed'] > self.max_missed:
+                    del self.tracks[track_id]
+
+        result = []
+        for index, location in enumerate(locations):
+            if assigned[index] is None:
+                track = {
+                    'id': self._next_id,
+                    'student_id': None,
+                    'distance': None,
+                    'confidence': 0.0,
+                    'missed': 0,
+                    'frames_since_recognition': None
+                }
+                self.tracks[self._next_id] = track
+                self._next_id += 1
+            else:
+                track = self.tracks[assigned[index]]
+            track['location'] = location
+            result.append(track)
+        return result
+
+    def forget(self, student_ids):
+        """Quitar la identidad de los tracks de esos estudiantes para reconocerlos de nuevo"""
+        student_ids = {str(student_id) for student_id in student_ids}
+        for track in self.tracks.values():
+            if track['student_id'] is not None and str(track['student_id']) in student_ids:
+                track['student_id'] = None
+                track['distance'] = None
+                track['confidence'] = 0.0
+                track['frames_since_recognition'] = None
+
+    def needs_recognition(self, track):
+        """Indica si el track debe pasar por codificación y búsqueda"""
+        if track['frames_since_recognition'] is None:
+            return True
+        if track['frames_since_recognition'] < self.retry_frames:
+            return False
+        return track['student_id'] is None or track['confidence'] < self.min_confidence
+
+    def set_identity(self, track, student_id, distance):
+        """Registrar el resultado del reconocimiento; True si la identidad es nueva"""
+        is_new = student_id is not None and student_id != track['student_id']
+        track['student_id'] = student_id
+        track['distance'] = distance
+        track['confidence'] = max(1.0 - distance / self.tolerance, 0.0) if distance is not None else 0.0
+        track['frames_since_recognition'] = 0
+        return is_new
@@ -1,35 +1,174 @@
 import os
 import cv2
 import face_recognition
+import uuid
+import threading
 import numpy as np
-import pickle
+from datetime import datetime
 from pathlib import Path
+from app.utils.face_index import create_face_index
+from app.utils.embedding_store import EmbeddingStore
+from app.utils.settings import get_setting
 
 class FacialRecognition:
     def __init__(self):
-        self.known_face_encodings = []
-        self.known_face_names = []
+        self.tolerance = 0.6
+        self.index_backend = get_setting('facial_recognition', 'index_backend', 'auto')
+        self.detection_model = get_setting('facial_recognition', 'detection_model', 'hog')
+        self.detection_scale = get_setting('facial_recognition', 'detection_scale', 0.5)
+        self.max_samples_per_student = 10
+        self.centroid_candidates = 5  # Estudiantes que pasan a la comparación por muestra
+        self.face_index = create_face_index(self.index_backend)  # Un centroide por estudiante
+        self.samples = {}  # student_id -> {'keys', 'encodings', 'captured_at', 'quality'}
+        self.lock = threading.RLock()  # El reconocimiento corre en un hilo aparte del registro
         self.data_dir = Path(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))) / 'data' / 'facial_data'
-        self.encodings_file = self.data_dir / 'encodings.pkl'
+        self.encodings_file = self.data_dir / 'encodings.pkl'  # Formato anterior, solo para migrar
+        self.store = EmbeddingStore(self.data_dir / 'embeddings')
         self.load_encodings()
     
+    @property
+    def known_face_encodings(self):
+        """Centroides de cada estudiante registrado"""
+        return self.face_index.matrix
+    
+    @property
+    def known_face_names(self):
+        return self.face_index.labels
+    
     def load_encodings(self):
-        """Cargar codificaciones faciales guardadas"""
-        if os.path.exists(self.encodings_file):
-            with open(self.encodings_file, 'rb') as f:
-                data = pickle.load(f)
-                self.known_face_encodings = data.get('encodings', [])
-                self.known_face_names = data.get('names', [])
-    
-    def save_encodings(self):
-        """Guardar codificaciones faciales"""
-        os.makedirs(self.data_dir, exist_ok=True)
-        data = {
-            'encodings': self.known_face_encodings,
-            'names': self.known_face_names
-        }
-        with open(self.encodings_file, 'wb') as f:
-            pickle.dump(data, f)
+        """Cargar codificaciones faciales guardadas (memmap) y agruparlas por estudiante"""
+        self.store.open()
+        if len(self.store) == 0:
+            self.store.migrate_from_pickle(self.encodings_file)
+        
+        vectors = self.store.live_vectors()
+        rows_by_student = {}
+        keys = self.store.ids
+        for row, key in enumerate(keys):
+            # Las entradas migradas del formato anterior usan el student_id como clave
+            student_id = self.store.metadata(key).get('student', key)
+            rows_by_student.setdefault(student_id, []).append(row)
+        
+        self.samples = {}
+        for student_id, rows in rows_by_student.items():
+            metas = [self.store.metadata(keys[row]) for row in rows]
+            self.samples[student_id] = {
+                'keys': [keys[row] for row in rows],
+                'encodings': np.asarray(vectors[rows], dtype=np.float32),
+                'captured_at': [meta.get('captured_at') for meta in metas],
+                'quality': [meta.get('quality') for meta in metas]
+            }
+        
+        students = list(self.samples)
+        centroids = [self.samples[student_id]['encodings'].mean(axis=0) for student_id in students]
+        self.face_index.build(centroids, students)
+    
+    def detect_faces(self, rgb_image):
+        """Detectar rostros sobre una copia reducida y devolver ubicaciones en resolución completa"""
+        scale = self.detection_scale
+        if not 0 < scale < 1:
+            return face_recognition.face_locations(rgb_image, model=self.detection_model)
+        
+        small_image = cv2.resize(rgb_image, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        small_locations = face_recognition.face_locations(small_image, model=self.detection_model)
+        
+        # Mapear las cajas a la resolución original para codificar con todo el detalle
+        height, width = rgb_image.shape[:2]
+        return [(max(int(top / scale), 0), min(int(right / scale), width),
+                 min(int(bottom / scale), height), max(int(left / scale), 0))
+                for top, right, bottom, left in small_locations]
+    
+    def estimate_quality(self, rgb_image, face_location):
+        """Calidad de captura (0-1) según nitidez y tamaño del rostro"""
+        top, right, bottom, left = face_location
+        face = rgb_image[max(top, 0):bottom, max(left, 0):right]
+        if face.size == 0:
+            return 0.0
+        gray = cv2.cvtColor(face, cv2.COLOR_RGB2GRAY)
+        sharpness = min(cv2.Laplacian(gray, cv2.CV_64F).var() / 300.0, 1.0)
+        size = min((bottom - top) / 150.0, 1.0)
+        return round(0.5 * sharpness + 0.5 * size, 3)
+    
+    def _prune_samples(self, student_id, new_key=None):
+        """Descartar muestras atípicas y limitar la cantidad por estudiante
+
+        El límite de cantidad solo descarta muestras anteriores a new_key (la
+        recién agregada), que únicamente puede eliminarse por ser atípica.
+        Devuelve las claves eliminadas.
+        """
+        samples = self.samples[student_id]
+        encodings = samples['encodings']
+        keep = np.ones(len(encodings), dtype=bool)
+        
+        if len(encodings) >= 3:
+            # Distancia robusta al centroide: mediana + 3 MAD
+            distances = np.linalg.norm(encodings - encodings.mean(axis=0), axis=1)
+            median = np.median(distances)
+            mad = 1.4826 * np.median(np.abs(distances - median))
+            threshold = max(median + 3 * mad, self.tolerance / 2)
+            keep &= distances <= threshold
+            if keep.sum() < 2:
+                keep[np.argsort(distances)[:2]] = True
+        
+        excess = int(keep.sum()) - self.max_samples_per_student
+        if excess > 0:
+            # Quitar primero las de menor calidad y, a igual calidad, las más antiguas
+            order = sorted((i for i in np.flatnonzero(keep) if samples['keys'][i] != new_key),
+                           key=lambda i: (samples['quality'][i] or 0.0, samples['captured_at'][i] or ''))
+            keep[order[:excess]] = False
+        
+        removed = [key for key, kept in zip(samples['keys'], keep) if not kept]
+        if removed:
+            indices = np.flatnonzero(keep)
+            samples['encodings'] = encodings[indices]
+            for field in ('keys', 'captured_at', 'quality'):
+                samples[field] = [samples[field][i] for i in indices]
+        return removed
+    
+    def add_face_sample(self, student_id, encoding, quality=None, captured_at=None):
+        """Agregar una muestra al estudiante, podar atípicas y actualizar su centroide"""
+        student_id = str(student_id)
+        encoding = np.asarray(encoding, dtype=np.float32)
+        captured_at = captured_at or datetime.now().isoformat(timespec='seconds')
+        key = f"{student_id}:{uuid.uuid4().hex[:12]}"
+        with self.lock:
+            return self._add_face_sample(student_id, key, encoding, quality, captured_at)
+    
+    def _add_face_sample(self, student_id, key, encoding, quality, captured_at):
+        previous = self.samples.get(student_id)
+        samples = self.samples[student_id] = {
+            'keys': [], 'encodings': np.empty((0, encoding.shape[0]), dtype=np.float32),
+            'captured_at': [], 'quality': []
+        } if previous is None else dict(previous)
+        samples['keys'] = samples['keys'] + [key]
+        samples['encodings'] = np.vstack([samples['encodings'], encoding[None, :]])
+        samples['captured_at'] = samples['captured_at'] + [captured_at]
+        samples['quality'] = samples['quality'] + [quality]
+        
+        # Decidir en memoria qué se conserva y luego escribir en disco solo los
+        # cambios; si la escritura falla se restauran las muestras anteriores
+        removed = self._prune_samples(student_id, new_key=key)
+        accepted = key not in removed
+        try:
+            if accepted:
+                self.store.append(key, encoding, {'student': student_id, 'captured_at': captured_at, 'quality': quality})
+            stale = [k for k in removed if k != key]
+            if stale:
+                self.store.remove(stale)
+        except Exception:
+            if previous is None:
+                del self.samples[student_id]
+            else:
+                self.samples[student_id] = previous
+            raise
+        
+        centroid = self.samples[student_id]['encodings'].mean(axis=0)
+        position = self.face_index.position_of(student_id)
+        if position is None:
+            self.face_index.add(centroid, student_id)
+        else:
+            self.face_index.update(position, centroid)
+        return accepted
     
     def register_face(self, student_id, image):
         """Registrar un nuevo rostro"""
@@ -37,7 +176,7 @@ class FacialRecognition:
         rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         
         # Detectar ubicaciones de rostros
-        face_locations = face_recognition.face_locations(rgb_image)
+        face_locations = self.detect_faces(rgb_image)
         
         if not face_locations:
             return False, "No se detectó ningún rostro en la imagen"
@@ -48,56 +187,96 @@ class FacialRecognition:
         if not face_encodings:
             return False, "No se pudo codificar el rostro"
         
-        # Guardar la codificación
-        student_id_str = str(student_id)
-        
-        # Si el estudiante ya existe, actualizar sus codificaciones
-        if student_id_str in self.known_face_names:
-            idx = self.known_face_names.index(student_id_str)
-            self.known_face_encodings[idx] = face_encodings[0]
-        else:
-            self.known_face_encodings.append(face_encodings[0])
-            self.known_face_names.append(student_id_str)
-        
-        # Guardar las codificaciones actualizadas
-        self.save_encodings()
+        # Agregar la codificación como una muestra más del estudiante
+        quality = self.estimate_quality(rgb_image, face_locations[0])
+        if not self.add_face_sample(student_id, face_encodings[0], quality):
+            return False, "La captura difiere demasiado de las muestras registradas del estudiante"
         
-        return True, "Rostro registrado correctamente"
+        total = len(self.samples[str(student_id)]['keys'])
+        return True, f"Rostro registrado correctamente ({total} muestras)"
     
-    def recognize_face(self, image):
-        """Reconocer un rostro en la imagen"""
-        if not self.known_face_encodings:
-            return None, "No hay rostros registrados en el sistema"
+    def analyze_faces(self, image):
+        """Detectar, codificar y reconocer todos los rostros en una sola pasada
         
+        Devuelve una lista de dicts con 'location' (top, right, bottom, left),
+        'encoding', 'student_id' (None si no hay coincidencia) y 'distance'.
+        """
         # Convertir imagen a RGB
         rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         
         # Detectar ubicaciones de rostros
-        face_locations = face_recognition.face_locations(rgb_image)
-        
+        face_locations = self.detect_faces(rgb_image)
+        return self.match_locations(rgb_image, face_locations)
+    
+    def match_locations(self, rgb_image, face_locations):
+        """Codificar y reconocer rostros en ubicaciones ya detectadas (imagen RGB)"""
         if not face_locations:
-            return None, "No se detectó ningún rostro en la imagen"
+            return []
         
-        # Obtener codificaciones faciales
+        # Obtener codificaciones faciales y buscar coincidencias en lote
         face_encodings = face_recognition.face_encodings(rgb_image, face_locations)
+        matches = self.match_encodings(face_encodings, k=1)
         
-        # Buscar coincidencias
-        # Mejora: Añadir nivel de confianza en el reconocimiento
-        for face_encoding in face_encodings:
-            matches = face_recognition.compare_faces(self.known_face_encodings, face_encoding, tolerance=0.6)
-            face_distances = face_recognition.face_distance(self.known_face_encodings, face_encoding)
-            
-            if not any(matches):
-                continue
-                
-            best_match_index = np.argmin(face_distances)
-            if matches[best_match_index]:
-                student_id = self.known_face_names[best_match_index]
-                confidence = 1 - face_distances[best_match_index]  # Nivel de confianza (0-1)
-                return student_id, f"Rostro reconocido (Confianza: {confidence:.2f})"
+        faces = []
+        for location, encoding, candidates in zip(face_locations, face_encodings, matches):
+            student_id, distance = candidates[0] if candidates else (None, None)
+            faces.append({
+                'location': location,
+                'encoding': encoding,
+                'student_id': student_id,
+                'distance': distance
+            })
+        return faces
+    
+    def confidence_message(self, distance):
+        """Mensaje con el nivel de confianza (0-1) de una coincidencia"""
+        return f"Rostro reconocido (Confianza: {1 - distance:.2f})"
+    
+    def recognize_face(self, image):
+        """Reconocer un rostro en la imagen"""
+        if len(self.face_index) == 0:
+            return None, "No hay rostros registrados en el sistema"
+        
+        faces = self.analyze_faces(image)
+        if not faces:
+            return None, "No se detectó ningún rostro en la imagen"
+        
+        for face in faces:
+            if face['student_id']:
+                return face['student_id'], self.confidence_message(face['distance'])
         
         return None, "No se encontró coincidencia"
     
+    def match_encodings(self, face_encodings, k=1):
+        """Obtener los k mejores candidatos (student_id, distancia) para cada codificación"""
+        with self.lock:
+            return self._match_encodings(face_encodings, k)
+    
+    def _match_encodings(self, face_encodings, k):
+        if len(self.face_index) == 0 or len(face_encodings) == 0:
+            return [[] for _ in face_encodings]
+        
+        # Primera pasada: centroides (costo proporcional a la cantidad de estudiantes)
+        queries = np.asarray(face_encodings, dtype=np.float32)
+        positions, _ = self.face_index.search(queries, k=max(k, self.centroid_candidates))
+        
+        # Segunda pasada: todas las muestras de los estudiantes candidatos
+        results = []
+        for query, candidate_positions in zip(queries, positions):
+            students = [self.face_index.labels[p] for p in candidate_positions if p >= 0]
+            if not students:
+                results.append([])
+                continue
+            encodings = np.vstack([self.samples[student_id]['encodings'] for student_id in students])
+            owners = np.repeat(np.arange(len(students)),
+                               [len(self.samples[student_id]['keys']) for student_id in students])
+            distances = np.linalg.norm(encodings - query, axis=1)
+            best = np.full(len(students), np.inf)
+            np.minimum.at(best, owners, distances)
+            order = np.argsort(best)[:k]
+            results.append([(students[i], float(best[i])) for i in order if best[i] <= self.tolerance])
+        return results
+    
     # Nueva función: Detección de "liveness" para prevenir fotos
     def detect_liveness(self, image):
         """Detectar si el rostro pertenece a una persona real o una foto"""
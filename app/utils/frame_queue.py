@@ -0,0 +1,43 @@
+import threading
+from collections import deque
+
+
+class FrameQueue:
+    """Cola acotada de frames entre hilos que siempre entrega el frame más reciente
+
+    Al llenarse descarta el más antiguo, y get() descarta los frames que
+    quedaron atrás del último; todos los descartes se cuentan en dropped.
+    """
+
+    def __init__(self, maxsize=2):
+        self._frames = deque(maxlen=maxsize)
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def __len__(self):
+        with self._condition:
+            return len(self._frames)
+
+    def put(self, frame):
+        """Encolar sin bloquear nunca al productor"""
+        with self._condition:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+            self._frames.append(frame)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Obtener el frame más reciente (descartando los anteriores), o None si vence el timeout"""
+        with self._condition:
+            if not self._frames:
+                self._condition.wait(timeout)
+            if not self._frames:
+                return None
+            frame = self._frames.pop()
+            self.dropped += len(self._frames)
+            self._frames.clear()
+            return frame
+
+    def clear(self):
+        with self._condition:
+            self._frames.clear()
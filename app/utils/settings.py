@@ -0,0 +1,66 @@
+import os
+import copy
+import json
+
+SETTINGS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'settings.json')
+
+# Valores por defecto; data/settings.json puede sobrescribir cualquier clave por sección
+DEFAULT_SETTINGS = {
+    'facial_recognition': {
+        'detection_model': 'hog',   # 'hog' (CPU) o 'cnn' (más preciso, requiere dlib con CUDA)
+        'detection_scale': 0.5,     # Escala del frame para detectar rostros (1.0 = resolución completa)
+        'index_backend': 'auto',    # 'exact', 'ivf', 'hnsw' o 'auto'
+    },
+    'database': {
+        'performance_profile': 'balanced',  # 'safe', 'balanced' o 'fast' (ver PERFORMANCE_PROFILES)
+        'busy_timeout_ms': 5000,            # Espera ante un bloqueo antes de "database is locked"
+        'checkpoint_interval_s': 300,       # Checkpoint TRUNCATE periódico del WAL
+    },
+    'emotion': {
+        'preload_model': True,      # Cargar el modelo de emociones en segundo plano al iniciar
+        'face_detector': 'haar',    # 'haar', 'dnn' (SSD res10 en data/models) o un detector_backend de DeepFace
+        'detection_scale': 0.5,     # Escala del frame para detectar rostros (1.0 = resolución completa)
+        'min_face_size': 40,        # Tamaño mínimo de rostro en píxeles del frame original
+        'dnn_confidence': 0.5,      # Confianza mínima del detector 'dnn'
+        'cpu_budget': 0.25,         # Fracción del tiempo que puede ocupar el análisis de emociones
+        'min_analysis_interval_ms': 150,   # Intervalo mínimo entre análisis (también ante cambios de escena)
+        'max_analysis_interval_ms': 2000,  # Intervalo máximo entre análisis aunque la escena no cambie
+        'frame_interval_ms': 33,    # Intervalo entre frames de cámara (~30 FPS)
+        'scene_change_threshold': 8.0,     # Diferencia media (0-255) entre miniaturas que cuenta como cambio de escena
+    },
+}
+
+_settings = None
+
+def load_settings(reload=False):
+    """Cargar la configuración: valores por defecto + data/settings.json"""
+    global _settings
+    if _settings is None or reload:
+        settings = copy.deepcopy(DEFAULT_SETTINGS)
+        if os.path.exists(SETTINGS_FILE):
+            try:
+                with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+                    for section, values in json.load(f).items():
+                        settings.setdefault(section, {}).update(values)
+            except Exception as e:
+                print(f"Error leyendo configuración: {e}")
+        _settings = settings
+    return _settings
+
+def get_setting(section, key, default=None):
+    """Obtener un valor de configuración"""
+    return load_settings().get(section, {}).get(key, default)
+
+def save_setting(section, key, value):
+    """Guardar un valor en data/settings.json (solo las claves modificadas)"""
+    stored = {}
+    if os.path.exists(SETTINGS_FILE):
+        with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    stored.setdefault(section, {})[key] = value
+    os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
+    tmp_file = SETTINGS_FILE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(stored, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_file, SETTINGS_FILE)
+    load_settings().setdefault(section, {})[key] = value
@@ -89,7 +89,7 @@ class AppStyles:
     
     @staticmethod
     def get_table_style():
-        return f"QTableWidget {{ \
+        return f"QTableView {{ \
                     border: 1px solid #dddddd; \
                     gridline-color: #f0f0f0; \
                     selection-background-color: {AppStyles.SECONDARY_COLOR}; \
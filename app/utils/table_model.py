@@ -0,0 +1,264 @@
+from PySide6.QtWidgets import QStyledItemDelegate
+from PySide6.QtCore import (Qt, QAbstractTableModel, QSortFilterProxyModel, QModelIndex, QRect,
+                            QEvent, QTimer, Signal)
+from PySide6.QtGui import QColor
+
+
+class RowTableModel(QAbstractTableModel):
+    """Modelo de tabla perezoso para listas grandes (estudiantes, profesores)
+
+    Las filas se guardan por columna como texto ya formateado (los valores
+    repetidos, como nivel o grado, comparten el mismo objeto str) y la vista
+    solo pide datos de las filas visibles. Las filas se exponen por bloques de
+    batch_size mediante canFetchMore/fetchMore a medida que se hace scroll.
+    """
+
+    def __init__(self, headers, parent=None, batch_size=200):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.batch_size = batch_size
+        self._columns = [[] for _ in self.headers]
+        self._keys = []
+        self._loaded = 0
+        self._styles = {}
+
+    def set_rows(self, rows, keys=None):
+        """Reemplazar el contenido; rows son tuplas con el texto de cada columna"""
+        rows = list(rows)
+        shared = {}
+        self.beginResetModel()
+        self._columns = [[] for _ in self.headers]
+        for row in rows:
+            for column, value in zip(self._columns, row):
+                value = "" if value is None else str(value)
+                column.append(shared.setdefault(value, value))
+        self._keys = list(keys) if keys is not None else [None] * len(rows)
+        self._loaded = min(self.batch_size, len(rows))
+        self.endResetModel()
+
+    def set_column_style(self, column, style):
+        """style(texto) -> (color de fondo, color de texto) o None"""
+        self._styles[column] = style
+
+    def total_rows(self):
+        """Cantidad de filas del modelo, incluidas las aún no expuestas a la vista"""
+        return len(self._keys)
+
+    def value(self, row, column):
+        return self._columns[column][row]
+
+    def key(self, row):
+        """Dato asociado a la fila (normalmente el id en la base de datos)"""
+        return self._keys[row]
+
+    def set_value(self, row, column, value):
+        self._columns[column][row] = value
+        if row < self._loaded:
+            index = self.index(row, column)
+            self.dataChanged.emit(index, index)
+
+    def set_column_value(self, rows, column, value):
+        """Asignar el mismo texto a varias filas con una sola notificación"""
+        rows = list(rows)
+        for row in rows:
+            self._columns[column][row] = value
+        visible = [row for row in rows if row < self._loaded]
+        if visible:
+            self.dataChanged.emit(self.index(min(visible), column), self.index(max(visible), column))
+
+    def fetch_all(self):
+        """Exponer todas las filas pendientes de una vez"""
+        while self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    def reset_paging(self):
+        """Volver a exponer solo el primer bloque; True si había más filas expuestas"""
+        if self._loaded <= self.batch_size:
+            return False
+        self.beginResetModel()
+        self._loaded = min(self.batch_size, len(self._keys))
+        self.endResetModel()
+        return True
+
+    # --- Interfaz QAbstractTableModel ---------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._loaded < len(self._keys)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        count = min(self.batch_size, len(self._keys) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            return self._columns[column][row]
+        if role == Qt.UserRole:
+            return self._keys[row]
+        if role in (Qt.BackgroundRole, Qt.ForegroundRole) and column in self._styles:
+            colors = self._styles[column](self._columns[column][row])
+            if colors:
+                return colors[0] if role == Qt.BackgroundRole else colors[1]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+
+class RowFilterProxyModel(QSortFilterProxyModel):
+    """Filtro sobre un RowTableModel con claves de búsqueda precalculadas
+
+    La búsqueda de texto compara contra una clave en minúsculas por fila
+    (las columnas search_columns unidas con espacios) que se calcula una vez
+    por carga del modelo. Los cambios de texto se aplican tras debounce_ms sin
+    escribir; los filtros por columna (combos) se aplican de inmediato.
+    """
+
+    def __init__(self, search_columns, parent=None, debounce_ms=200):
+        super().__init__(parent)
+        self.search_columns = list(search_columns)
+        self._search_text = ""
+        self._pending_text = ""
+        self._column_filters = {}
+        self._search_keys = None
+        self._repaging = False
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(debounce_ms)
+        self._debounce.timeout.connect(self._apply_search_text)
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelReset.connect(self._on_source_reset)
+        model.dataChanged.connect(self._clear_search_keys)
+        self._clear_search_keys()
+
+    def _clear_search_keys(self, *args):
+        self._search_keys = None
+
+    def _on_source_reset(self):
+        # reset_paging() no cambia las filas, así que las claves siguen sirviendo
+        if not self._repaging:
+            self._clear_search_keys()
+        if self.is_filtering():
+            self.sourceModel().fetch_all()
+
+    def _keys(self):
+        if self._search_keys is None:
+            model = self.sourceModel()
+            columns = [[model.value(row, c) for row in range(model.total_rows())] for c in self.search_columns]
+            self._search_keys = [" ".join(values).lower() for values in zip(*columns)]
+        return self._search_keys
+
+    def set_search_text(self, text):
+        """Programar la búsqueda de texto (con debounce)"""
+        self._pending_text = text.strip().lower()
+        self._debounce.start()
+
+    def _apply_search_text(self):
+        if self._pending_text != self._search_text:
+            self._search_text = self._pending_text
+            self._refilter()
+
+    def set_column_filter(self, column, value):
+        """Filtrar por igualdad exacta del texto de una columna (None = sin filtro)"""
+        if value is None:
+            changed = self._column_filters.pop(column, None) is not None
+        else:
+            changed = self._column_filters.get(column) != value
+            self._column_filters[column] = value
+        if changed:
+            self._refilter()
+
+    def is_filtering(self):
+        return bool(self._search_text or self._column_filters)
+
+    def _refilter(self):
+        # Con un filtro activo hay que evaluar todas las filas, no solo las ya
+        # expuestas; la vista sigue dibujando solo las filas visibles. Al quitar
+        # el último filtro el modelo vuelve a exponer las filas por bloques
+        model = self.sourceModel()
+        if self.is_filtering():
+            model.fetch_all()
+            self.invalidateFilter()
+            return
+        self._repaging = True
+        try:
+            repaged = model.reset_paging()
+        finally:
+            self._repaging = False
+        if not repaged:
+            self.invalidateFilter()
+
+    def accepts(self, source_row):
+        if self._search_text and self._search_text not in self._keys()[source_row]:
+            return False
+        model = self.sourceModel()
+        for column, value in self._column_filters.items():
+            if model.value(source_row, column) != value:
+                return False
+        return True
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.accepts(source_row)
+
+    def accepted_source_rows(self):
+        """Filas del modelo origen que pasan el filtro, incluidas las aún no expuestas"""
+        return [row for row in range(self.sourceModel().total_rows()) if self.accepts(row)]
+
+
+class ActionButtonsDelegate(QStyledItemDelegate):
+    """Dibuja botones de acción en una celda sin crear widgets por fila
+
+    buttons: lista de (acción, texto, color). Al hacer clic se emite
+    button_clicked(acción, dato UserRole de la fila).
+    """
+    button_clicked = Signal(str, object)
+
+    def __init__(self, buttons, parent=None, spacing=4):
+        super().__init__(parent)
+        self.buttons = buttons
+        self.spacing = spacing
+
+    def _button_rects(self, rect):
+        count = len(self.buttons)
+        width = (rect.width() - self.spacing * (count + 1)) // count
+        height = rect.height() - 2 * self.spacing
+        return [QRect(rect.x() + self.spacing + i * (width + self.spacing), rect.y() + self.spacing, width, height)
+                for i in range(count)]
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        for (action, text, color), rect in zip(self.buttons, self._button_rects(option.rect)):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(color))
+            painter.drawRoundedRect(rect, 3, 3)
+            painter.setPen(QColor("white"))
+            painter.drawText(rect, Qt.AlignCenter, text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            position = event.position().toPoint()
+            for (action, text, color), rect in zip(self.buttons, self._button_rects(option.rect)):
+                if rect.contains(position):
+                    self.button_clicked.emit(action, index.data(Qt.UserRole))
+                    return True
+        return super().editorEvent(event, model, option, index)
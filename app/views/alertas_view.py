@@ -122,6 +122,7 @@ class AlertasView(QWidget):
         self.nivel_combo.setStyleSheet(AppStyles.get_input_style())
         self.nivel_combo.setMinimumWidth(120)
         self.load_niveles()
+        self.db.catalog.catalog_changed.connect(self.load_niveles)
         self.nivel_combo.currentIndexChanged.connect(self.on_nivel_changed)
         filter_layout.addWidget(self.nivel_combo, 0, 1)
         
@@ -406,23 +407,6 @@ class AlertasView(QWidget):
             conn = self.db.connect()
             cursor = conn.cursor()
             
-            # Verificar si existe la tabla de alertas, si no, crearla
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS alertas (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fecha TEXT,
-                    hora TEXT,
-                    tipo TEXT,
-                    destinatarios TEXT,
-                    asunto TEXT,
-                    mensaje TEXT,
-                    metodos_envio TEXT,
-                    estado TEXT,
-                    usuario_id INTEGER,
-                    FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
-                )
-            """)
-            
             # Obtener fecha y hora actual
             now = QDateTime.currentDateTime()
             fecha = now.toString("yyyy-MM-dd")
@@ -514,30 +498,6 @@ class AlertasView(QWidget):
             conn = self.db.connect()
             cursor = conn.cursor()
             
-            # Verificar si existe la tabla de alertas
-            cursor.execute("""
-                SELECT name FROM sqlite_master WHERE type='table' AND name='alertas'
-            """)
-            
-            if not cursor.fetchone():
-                # Si no existe la tabla, crearla
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS alertas (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        fecha TEXT,
-                        hora TEXT,
-                        tipo TEXT,
-                        destinatarios TEXT,
-                        asunto TEXT,
-                        mensaje TEXT,
-                        metodos_envio TEXT,
-                        estado TEXT,
-                        usuario_id INTEGER,
-                        FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
-                    )
-                """)
-                conn.commit()
-            
             # Cargar alertas del usuario actual
             cursor.execute("""
                 SELECT id, fecha, hora, tipo, destinatarios, asunto, estado
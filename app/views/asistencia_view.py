@@ -3,17 +3,142 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushB
                              QComboBox, QTableWidget, QTableWidgetItem, QMessageBox,
                              QHeaderView, QDateEdit, QGroupBox, QLineEdit, QFrame, 
                              QTabWidget, QGridLayout, QSplitter, QTextEdit, QCalendarWidget,
-                             QScrollArea, QProgressBar)
+                             QScrollArea, QProgressBar, QListWidget, QTableView)
 from PySide6.QtCore import Qt, QDate, QTimer, QDateTime, QThread, Signal
 from PySide6.QtGui import QImage, QPixmap, QFont, QIcon, QColor
 import cv2
 import datetime
+import time
+import threading
 import numpy as np
 import sqlite3
 from app.models.database import Database
+from app.models.queries import ASISTENCIAS_RECIENTES_SQL, ESTUDIANTES_ASISTENCIA_SQL
+from app.models.attendance_cache import AttendanceCache
+from app.models.attendance_writer import AttendanceWriter
 from app.utils.facial_recognition import FacialRecognition
+from app.utils.frame_queue import FrameQueue
+from app.utils.face_tracker import FaceTracker
+from app.utils.table_model import RowTableModel, RowFilterProxyModel
 from PySide6.QtWidgets import QDialog
 
+class AutoAttendanceCaptureThread(QThread):
+    """Hilo de captura de cámara para la asistencia automática"""
+    frame_ready = Signal(np.ndarray)
+    
+    def __init__(self, frame_queue):
+        super().__init__()
+        self.frame_queue = frame_queue
+        self.running = False
+        self.camera = None
+    
+    def start_capture(self):
+        """Abrir la cámara e iniciar la captura"""
+        try:
+            self.camera = cv2.VideoCapture(0)
+            if not self.camera.isOpened():
+                return False
+            
+            self.running = True
+            self.start()
+            return True
+        except Exception as e:
+            print(f"Error al iniciar cámara: {e}")
+            return False
+    
+    def stop_capture(self):
+        """Detener la captura y liberar la cámara"""
+        self.running = False
+        self.wait()
+        if self.camera:
+            self.camera.release()
+            self.camera = None
+    
+    def run(self):
+        while self.running and self.camera and self.camera.isOpened():
+            ret, frame = self.camera.read()
+            if ret:
+                # Voltear frame horizontalmente
+                frame = cv2.flip(frame, 1)
+                # La vista previa recibe todos los frames; el reconocimiento solo los más recientes
+                self.frame_queue.put(frame)
+                self.frame_ready.emit(frame)
+            else:
+                self.msleep(10)
+
+class AutoAttendanceRecognitionThread(QThread):
+    """Hilo de reconocimiento facial: consume frames de la cola y emite resultados"""
+    # Un dict por rostro: location, student_id, distance, track_id y new_identity
+    recognition_done = Signal(list)
+    
+    def __init__(self, facial_recognition, frame_queue, min_interval_ms=100):
+        super().__init__()
+        self.facial_recognition = facial_recognition
+        self.frame_queue = frame_queue
+        self.min_interval_ms = min_interval_ms
+        self.tracker = FaceTracker(tolerance=facial_recognition.tolerance)
+        self._forgotten = set()  # Estudiantes a reconocer de nuevo, pedidos desde la interfaz
+        self._forgotten_lock = threading.Lock()
+        self.running = False
+    
+    def forget_students(self, student_ids):
+        """Volver a reconocer a estos estudiantes aunque sigan en cuadro"""
+        with self._forgotten_lock:
+            self._forgotten.update(student_ids)
+    
+    def start_recognition(self):
+        self.tracker.reset()
+        self.running = True
+        self.start()
+    
+    def stop_recognition(self):
+        self.running = False
+        self.wait()
+        self.frame_queue.clear()
+    
+    def run(self):
+        while self.running:
+            frame = self.frame_queue.get(timeout=0.2)
+            if frame is None:
+                continue
+            
+            started = time.monotonic()
+            try:
+                self.recognition_done.emit(self.process_frame(frame))
+            except Exception as e:
+                print(f"Error en reconocimiento: {str(e)}")
+            
+            # Limitar la frecuencia de reconocimiento sin afectar a la vista previa
+            remaining_ms = self.min_interval_ms - int((time.monotonic() - started) * 1000)
+            if remaining_ms > 0:
+                self.msleep(remaining_ms)
+    
+    def process_frame(self, frame):
+        """Detectar y seguir rostros; solo se codifican los tracks nuevos o con confianza baja"""
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Una sola detección por frame: el mismo resultado alimenta la asistencia y el dibujo
+        tracks = self.tracker.update(self.facial_recognition.detect_faces(rgb_frame))
+        with self._forgotten_lock:
+            forgotten, self._forgotten = self._forgotten, set()
+        if forgotten:
+            self.tracker.forget(forgotten)
+        
+        pending = [track for track in tracks if self.tracker.needs_recognition(track)]
+        new_identities = set()
+        if pending:
+            faces = self.facial_recognition.match_locations(rgb_frame, [track['location'] for track in pending])
+            for track, face in zip(pending, faces):
+                if self.tracker.set_identity(track, face['student_id'], face['distance']):
+                    new_identities.add(track['id'])
+        
+        return [{
+            'location': track['location'],
+            'student_id': track['student_id'],
+            'distance': track['distance'],
+            'track_id': track['id'],
+            'new_identity': track['id'] in new_identities
+        } for track in tracks]
+
 class AsistenciaView(QWidget):
     def __init__(self, user_data):
         super().__init__()
@@ -29,6 +154,19 @@ class AsistenciaView(QWidget):
         
         # Inicializar reconocimiento facial
         self.facial_recognition = FacialRecognition()
+        self.attendance_cache = AttendanceCache()
+        
+        # Escritura diferida de asistencias automáticas (sin bloquear la interfaz)
+        self.attendance_writer = AttendanceWriter()
+        self.attendance_writer.records_flushed.connect(self.on_attendance_flushed)
+        self.attendance_writer.flush_failed.connect(self.on_attendance_flush_failed)
+        
+        # Asistencia automática: captura y reconocimiento en hilos separados
+        self.auto_camera_active = False
+        self.auto_frame_queue = FrameQueue(maxsize=2)
+        self.auto_capture_thread = None
+        self.auto_recognition_thread = None
+        self.auto_overlay = []  # Último resultado de reconocimiento (un dict por rostro)
         
         # Variables para verificación
         self.selected_student_id = None
@@ -427,6 +565,16 @@ class AsistenciaView(QWidget):
         self.recent_attendance_table.horizontalHeader().setStretchLastSection(True)
         records_layout.addWidget(self.recent_attendance_table)
         
+        # Notificaciones no bloqueantes de la asistencia automática
+        feed_title = QLabel("🔔 Notificaciones")
+        feed_title.setFont(QFont("Arial", 12, QFont.Bold))
+        feed_title.setStyleSheet("color: #3498db; margin-top: 10px;")
+        records_layout.addWidget(feed_title)
+        
+        self.attendance_feed = QListWidget()
+        self.attendance_feed.setMaximumHeight(150)
+        records_layout.addWidget(self.attendance_feed)
+        
         info_panel.addWidget(records_frame)
         
         # Agregar paneles al contenedor principal
@@ -457,7 +605,7 @@ class AsistenciaView(QWidget):
         filters_layout.addWidget(QLabel("Código:"))
         self.search_code = QLineEdit()
         self.search_code.setPlaceholderText("Buscar por código...")
-        self.search_code.textChanged.connect(self.filter_students)
+        # Búsqueda con debounce sobre el proxy (se conecta al crear la tabla)
         filters_layout.addWidget(self.search_code)
         
         # Filtro por nivel
@@ -484,12 +632,19 @@ class AsistenciaView(QWidget):
         filters_group.setLayout(filters_layout)
         layout.addWidget(filters_group)
         
-        # Tabla de estudiantes
-        self.students_table = QTableWidget()
-        self.students_table.setColumnCount(6)
-        self.students_table.setHorizontalHeaderLabels(["Código", "Nombre", "Nivel", "Grado", "Sección", "Estado"])
+        # Tabla de estudiantes (modelo perezoso: solo se dibujan las filas visibles)
+        self.students_model = RowTableModel([
+            "Código", "Nombre", "Nivel", "Grado", "Sección",
+            "Estado Hoy", "Total Presentes", "Total Ausentes"
+        ], self)
+        self.students_model.set_column_style(5, self.attendance_state_colors)
+        self.students_proxy = RowFilterProxyModel([0], self)
+        self.students_proxy.setSourceModel(self.students_model)
+        self.search_code.textChanged.connect(self.students_proxy.set_search_text)
+        self.students_table = QTableView()
+        self.students_table.setModel(self.students_proxy)
         self.students_table.horizontalHeader().setStretchLastSection(True)
-        self.students_table.cellClicked.connect(self.on_student_name_clicked)
+        self.students_table.clicked.connect(self.on_student_name_clicked)
         layout.addWidget(self.students_table)
         
         # Botones de acción
@@ -550,37 +705,31 @@ class AsistenciaView(QWidget):
         
         # Cargar datos iniciales
         self.load_filter_data()
+        Database().catalog.catalog_changed.connect(self.load_filter_data)
         self.load_students_data()
         
         widget.setLayout(layout)
         return widget
     
     def load_filter_data(self):
-        """Cargar datos para los filtros"""
+        """Cargar datos para los filtros (también tras cambios en el catálogo, conservando la selección)"""
         try:
-            db = Database()
-            conn = db.connect()
-            cursor = conn.cursor()
-            
-            # Cargar niveles
-            cursor.execute("SELECT nombre FROM niveles")
-            niveles = cursor.fetchall()
-            for nivel in niveles:
-                self.level_combo.addItem(nivel[0])
-            
-            # Cargar grados
-            cursor.execute("SELECT nombre FROM grados")
-            grados = cursor.fetchall()
-            for grado in grados:
-                self.grade_combo.addItem(grado[0])
-            
-            # Cargar secciones
-            cursor.execute("SELECT nombre FROM secciones")
-            secciones = cursor.fetchall()
-            for seccion in secciones:
-                self.section_combo.addItem(seccion[0])
+            catalog = Database().catalog
+            combos = ((self.level_combo, catalog.niveles(order_by='id')),
+                      (self.grade_combo, catalog.grados(order_by='id')),
+                      (self.section_combo, catalog.secciones(order_by='id')))
             
-            conn.close()
+            for combo, rows in combos:
+                selected = combo.currentText()
+                combo.blockSignals(True)
+                combo.clear()
+                combo.addItem("Todos")
+                for row in rows:
+                    combo.addItem(row[1])
+                # Si la opción elegida ya no existe se vuelve a "Todos"
+                combo.setCurrentIndex(max(combo.findText(selected), 0))
+                combo.blockSignals(False)
+            self.filter_students()
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error al cargar filtros: {str(e)}")
     
@@ -594,56 +743,12 @@ class AsistenciaView(QWidget):
             # Obtener fecha actual
             fecha_actual = datetime.datetime.now().strftime("%Y-%m-%d")
             
-            query = """
-                SELECT e.id, e.nombre, e.apellido, n.nombre as nivel, g.nombre as grado, s.nombre as seccion,
-                       COALESCE(a.estado, 'ausente') as estado_hoy,
-                       (
-                           SELECT COUNT(*) FROM asistencias a2 
-                           WHERE a2.estudiante_id = e.id AND a2.estado = 'presente'
-                       ) as total_presentes,
-                       (
-                           SELECT COUNT(*) FROM asistencias a3 
-                           WHERE a3.estudiante_id = e.id AND a3.estado = 'ausente'
-                       ) as total_ausentes
-                FROM estudiantes e
-                LEFT JOIN niveles n ON e.nivel_id = n.id
-                LEFT JOIN grados g ON e.grado_id = g.id
-                LEFT JOIN secciones s ON e.seccion_id = s.id
-                LEFT JOIN asistencias a ON e.id = a.estudiante_id AND a.fecha = ?
-                ORDER BY e.nombre, e.apellido
-            """
+            # Los totales vienen de asistencias_resumen (mantenida por triggers),
+            # sin recorrer asistencias por cada estudiante
+            query = ESTUDIANTES_ASISTENCIA_SQL
             
             cursor.execute(query, (fecha_actual,))
-            students = cursor.fetchall()
-            
-            # Expandir tabla para incluir columnas de historial
-            self.students_table.setColumnCount(8)
-            self.students_table.setHorizontalHeaderLabels([
-                "Código", "Nombre", "Nivel", "Grado", "Sección", 
-                "Estado Hoy", "Total Presentes", "Total Ausentes"
-            ])
-            
-            self.students_table.setRowCount(len(students))
-            
-            for row, student in enumerate(students):
-                self.students_table.setItem(row, 0, QTableWidgetItem(str(student[0])))
-                self.students_table.setItem(row, 1, QTableWidgetItem(f"{student[1]} {student[2]}"))
-                self.students_table.setItem(row, 2, QTableWidgetItem(student[3] or ""))
-                self.students_table.setItem(row, 3, QTableWidgetItem(student[4] or ""))
-                self.students_table.setItem(row, 4, QTableWidgetItem(student[5] or ""))
-                
-                # Estado de hoy con colores
-                estado_item = QTableWidgetItem(student[6])
-                if student[6] == "presente":
-                    estado_item.setBackground(QColor(212, 237, 218))  # Verde claro
-                    estado_item.setForeground(QColor(21, 87, 36))     # Verde oscuro
-                else:
-                    estado_item.setBackground(QColor(248, 215, 218))  # Rojo claro
-                    estado_item.setForeground(QColor(114, 28, 36))    # Rojo oscuro
-                self.students_table.setItem(row, 5, estado_item)
-                
-                self.students_table.setItem(row, 6, QTableWidgetItem(str(student[7])))
-                self.students_table.setItem(row, 7, QTableWidgetItem(str(student[8])))
+            self.display_students(cursor.fetchall())
             
             # Ajustar ancho de columnas
             self.students_table.resizeColumnsToContents()
@@ -652,48 +757,33 @@ class AsistenciaView(QWidget):
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error al cargar estudiantes: {str(e)}")
     
+    @staticmethod
+    def attendance_state_colors(estado):
+        """Colores (fondo, texto) del estado de hoy cargado de la base de datos"""
+        if estado == "presente":
+            return QColor(212, 237, 218), QColor(21, 87, 36)     # Verde
+        if estado in ("ausente", "tardanza"):
+            return QColor(248, 215, 218), QColor(114, 28, 36)    # Rojo
+        return None
+    
+    def display_students(self, students):
+        """Mostrar estudiantes en la tabla de gestión"""
+        self.students_model.set_rows(
+            ((str(student[0]), f"{student[1]} {student[2]}", student[3] or "", student[4] or "",
+              student[5] or "", student[6],
+              str(student[7]), str(student[8])) for student in students),
+            keys=[student[0] for student in students])
+    
     def filter_students(self):
-        """Filtrar estudiantes según los criterios seleccionados"""
-        search_text = self.search_code.text().lower()
-        selected_level = self.level_combo.currentText()
-        selected_grade = self.grade_combo.currentText()
-        selected_section = self.section_combo.currentText()
-        
-        for row in range(self.students_table.rowCount()):
-            show_row = True
-            
-            # Filtro por código
-            if search_text:
-                codigo_item = self.students_table.item(row, 0)
-                if codigo_item and search_text not in codigo_item.text().lower():
-                    show_row = False
-            
-            # Filtro por nivel
-            if selected_level != "Todos":
-                nivel_item = self.students_table.item(row, 2)
-                if not nivel_item or nivel_item.text() != selected_level:
-                    show_row = False
-            
-            # Filtro por grado
-            if selected_grade != "Todos":
-                grado_item = self.students_table.item(row, 3)
-                if not grado_item or grado_item.text() != selected_grade:
-                    show_row = False
-            
-            # Filtro por sección
-            if selected_section != "Todos":
-                seccion_item = self.students_table.item(row, 4)
-                if not seccion_item or seccion_item.text() != selected_section:
-                    show_row = False
-            
-            self.students_table.setRowHidden(row, not show_row)
+        """Filtrar por nivel, grado y sección (la búsqueda por código se aplica con debounce)"""
+        for column, combo in ((2, self.level_combo), (3, self.grade_combo), (4, self.section_combo)):
+            selected = combo.currentText()
+            self.students_proxy.set_column_filter(column, None if selected == "Todos" else selected)
     
-    def on_student_name_clicked(self, row, column):
+    def on_student_name_clicked(self, index):
         """Manejar clic en nombre de estudiante"""
-        if column == 1:  # Columna de nombre
-            codigo_item = self.students_table.item(row, 0)
-            if codigo_item:
-                self.show_student_details(codigo_item.text())
+        if index.column() == 1:  # Columna de nombre
+            self.show_student_details(index.sibling(index.row(), 0).data())
     
     def show_student_details(self, codigo):
         """Mostrar detalles del estudiante"""
@@ -719,15 +809,15 @@ class AsistenciaView(QWidget):
     
     def mark_all_present(self):
         """Marcar todos los estudiantes como presentes"""
-        for row in range(self.students_table.rowCount()):
-            if not self.students_table.isRowHidden(row):
-                self.students_table.setItem(row, 5, QTableWidgetItem("Presente"))
+        self.mark_all_filtered("Presente")
     
     def mark_all_absent(self):
         """Marcar todos los estudiantes como ausentes"""
-        for row in range(self.students_table.rowCount()):
-            if not self.students_table.isRowHidden(row):
-                self.students_table.setItem(row, 5, QTableWidgetItem("Ausente"))
+        self.mark_all_filtered("Ausente")
+    
+    def mark_all_filtered(self, estado):
+        """Asignar un estado a todos los estudiantes que pasan el filtro"""
+        self.students_model.set_column_value(self.students_proxy.accepted_source_rows(), 5, estado)
     
     def save_attendance(self):
         """Guardar la asistencia en la base de datos"""
@@ -738,39 +828,38 @@ class AsistenciaView(QWidget):
             
             fecha_actual = datetime.datetime.now().strftime("%Y-%m-%d")
             
-            for row in range(self.students_table.rowCount()):
-                if not self.students_table.isRowHidden(row):
-                    codigo_item = self.students_table.item(row, 0)
-                    estado_item = self.students_table.item(row, 5)
+            for row in self.students_proxy.accepted_source_rows():
+                codigo = self.students_model.value(row, 0)
+                estado = self.students_model.value(row, 5)
+                
+                if codigo and estado:
+                    presente = 1 if estado == "Presente" else 0
+                    
+                    # Verificar si ya existe un registro para hoy
+                    cursor.execute("""
+                        SELECT id FROM asistencias 
+                        WHERE estudiante_codigo = ? AND fecha = ?
+                    """, (codigo, fecha_actual))
+                    
+                    existing = cursor.fetchone()
                     
-                    if codigo_item and estado_item:
-                        codigo = codigo_item.text()
-                        presente = 1 if estado_item.text() == "Presente" else 0
-                        
-                        # Verificar si ya existe un registro para hoy
+                    if existing:
+                        # Actualizar registro existente
                         cursor.execute("""
-                            SELECT id FROM asistencias 
+                            UPDATE asistencias 
+                            SET presente = ?, hora_registro = ?
                             WHERE estudiante_codigo = ? AND fecha = ?
-                        """, (codigo, fecha_actual))
-                        
-                        existing = cursor.fetchone()
-                        
-                        if existing:
-                            # Actualizar registro existente
-                            cursor.execute("""
-                                UPDATE asistencias 
-                                SET presente = ?, hora_registro = ?
-                                WHERE estudiante_codigo = ? AND fecha = ?
-                            """, (presente, datetime.datetime.now().strftime("%H:%M:%S"), codigo, fecha_actual))
-                        else:
-                            # Crear nuevo registro
-                            cursor.execute("""
-                                INSERT INTO asistencias (estudiante_codigo, fecha, presente, hora_registro)
-                                VALUES (?, ?, ?, ?)
-                            """, (codigo, fecha_actual, presente, datetime.datetime.now().strftime("%H:%M:%S")))
+                        """, (presente, datetime.datetime.now().strftime("%H:%M:%S"), codigo, fecha_actual))
+                    else:
+                        # Crear nuevo registro
+                        cursor.execute("""
+                            INSERT INTO asistencias (estudiante_codigo, fecha, presente, hora_registro)
+                            VALUES (?, ?, ?, ?)
+                        """, (codigo, fecha_actual, presente, datetime.datetime.now().strftime("%H:%M:%S")))
             
             conn.commit()
             conn.close()
+            self.attendance_cache.invalidate()
             
             QMessageBox.information(self, "Éxito", "Asistencia guardada correctamente")
             
@@ -1131,16 +1220,9 @@ class AsistenciaView(QWidget):
     def get_student_name(self, student_id):
         """Obtener nombre completo del estudiante por ID"""
         try:
-            db = Database()
-            conn = db.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT nombre, apellido FROM estudiantes WHERE id = ?", (student_id,))
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return f"{result[0]} {result[1]}"
+            info = self.attendance_cache.get_student_info(student_id)
+            if info:
+                return info['nombre']
             return "Estudiante desconocido"
         except:
             return "Error al obtener nombre"
@@ -1152,18 +1234,6 @@ class AsistenciaView(QWidget):
             conn = db.connect()
             cursor = conn.cursor()
             
-            # Crear tabla de logs de verificación si no existe
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS verification_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id INTEGER,
-                    timestamp TEXT,
-                    success BOOLEAN,
-                    details TEXT,
-                    FOREIGN KEY (student_id) REFERENCES estudiantes(id)
-                )
-            """)
-            
             # Insertar log
             cursor.execute("""
                 INSERT INTO verification_logs (student_id, timestamp, success, details)
@@ -1177,18 +1247,19 @@ class AsistenciaView(QWidget):
     
     def toggle_auto_attendance_camera(self):
         """Alternar cámara de detección automática de asistencia"""
-        if not hasattr(self, 'auto_camera_active'):
-            self.auto_camera_active = False
-            self.auto_cap = None
-            self.auto_timer = QTimer()
-            self.auto_timer.timeout.connect(self.update_auto_attendance_camera)
-        
         if not self.auto_camera_active:
             # Encender cámara
-            self.auto_cap = cv2.VideoCapture(0)
-            if self.auto_cap.isOpened():
+            self.auto_frame_queue.clear()
+            self.auto_overlay = []
+            self.auto_capture_thread = AutoAttendanceCaptureThread(self.auto_frame_queue)
+            self.auto_capture_thread.frame_ready.connect(self.update_auto_attendance_camera)
+            if self.auto_capture_thread.start_capture():
+                self.auto_recognition_thread = AutoAttendanceRecognitionThread(
+                    self.facial_recognition, self.auto_frame_queue)
+                self.auto_recognition_thread.recognition_done.connect(self.on_auto_recognition_result)
+                self.auto_recognition_thread.start_recognition()
+                self.attendance_writer.start_writing()
                 self.auto_camera_active = True
-                self.auto_timer.start(100)  # Actualizar cada 100ms para mejor detección
                 self.auto_camera_btn.setText("⏹️ Detener Detección")
                 self.auto_camera_btn.setStyleSheet("""
                     QPushButton {
@@ -1215,12 +1286,11 @@ class AsistenciaView(QWidget):
                 """)
                 self.load_recent_attendance()
             else:
+                self.auto_capture_thread = None
                 QMessageBox.warning(self, "Error", "No se pudo acceder a la cámara")
         else:
             # Apagar cámara
-            self.auto_timer.stop()
-            if self.auto_cap:
-                self.auto_cap.release()
+            self.stop_auto_attendance_threads()
             self.auto_camera_active = False
             self.auto_camera_label.clear()
             self.auto_camera_label.setText("Cámara desactivada\nHaz clic en 'Iniciar Detección'")
@@ -1250,73 +1320,73 @@ class AsistenciaView(QWidget):
             """)
             self.detected_student_info.setText("Ningún estudiante detectado")
 
-    def update_auto_attendance_camera(self):
-        """Actualizar cámara de detección automática y procesar reconocimiento facial"""
-        if self.auto_cap and self.auto_cap.isOpened():
-            ret, frame = self.auto_cap.read()
-            if ret:
-                # Voltear frame horizontalmente
-                frame = cv2.flip(frame, 1)
-                
-                # Procesar reconocimiento facial
-                try:
-                    recognized_id, confidence_message = self.facial_recognition.recognize_face(frame)
-                    
-                    if recognized_id:
-                        # Estudiante reconocido
-                        self.process_automatic_attendance(recognized_id, confidence_message)
-                        
-                        # Dibujar rectángulo verde alrededor del rostro detectado
-                        import face_recognition
-                        face_locations = face_recognition.face_locations(frame)
-                        for (top, right, bottom, left) in face_locations:
-                            cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
-                            cv2.putText(frame, "RECONOCIDO", (left, top-10), 
-                                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                    else:
-                        # Rostro no reconocido
-                        import face_recognition
-                        face_locations = face_recognition.face_locations(frame)
-                        for (top, right, bottom, left) in face_locations:
-                            cv2.rectangle(frame, (left, top), (right, bottom), (0, 0, 255), 2)
-                            cv2.putText(frame, "NO RECONOCIDO", (left, top-10), 
-                                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-                        
-                        self.detected_student_info.setText("Rostro detectado pero no reconocido\nAsegúrese de estar registrado en el sistema")
-                        
-                except Exception as e:
-                    print(f"Error en reconocimiento: {str(e)}")
-                
-                # Mostrar frame en la interfaz
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb_frame.shape
-                bytes_per_line = ch * w
-                qt_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                
-                pixmap = QPixmap.fromImage(qt_image)
-                scaled_pixmap = pixmap.scaled(self.auto_camera_label.size(), 
-                                            Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                
-                self.auto_camera_label.setPixmap(scaled_pixmap)
+    def stop_auto_attendance_threads(self):
+        """Detener los hilos de captura y reconocimiento automático"""
+        if self.auto_capture_thread:
+            self.auto_capture_thread.stop_capture()
+            self.auto_capture_thread = None
+        if self.auto_recognition_thread:
+            self.auto_recognition_thread.stop_recognition()
+            self.auto_recognition_thread = None
+        # Guardar las asistencias pendientes antes de detener la escritura
+        self.attendance_writer.stop_writing()
+    
+    def closeEvent(self, event):
+        """Limpiar recursos al cerrar"""
+        self.stop_auto_attendance_threads()
+        self.auto_camera_active = False
+        event.accept()
+    
+    def on_auto_recognition_result(self, faces):
+        """Procesar un resultado del hilo de reconocimiento"""
+        if not self.auto_camera_active:
+            return
+        self.auto_overlay = faces
+        
+        recognized = [face for face in faces if face['student_id']]
+        if recognized:
+            # Estudiante reconocido: la asistencia se procesa una sola vez por track
+            for face in recognized:
+                if face['new_identity']:
+                    self.process_automatic_attendance(face['student_id'],
+                                                      self.facial_recognition.confidence_message(face['distance']))
+        elif faces:
+            # Rostro no reconocido
+            self.detected_student_info.setText("Rostro detectado pero no reconocido\nAsegúrese de estar registrado en el sistema")
+    
+    def update_auto_attendance_camera(self, frame):
+        """Mostrar un frame de la cámara automática con el último resultado de reconocimiento"""
+        if not self.auto_camera_active:
+            return
+        frame = frame.copy()
+        for face in self.auto_overlay:
+            top, right, bottom, left = face['location']
+            if face['student_id']:
+                # Rectángulo verde alrededor del rostro reconocido
+                color, text = (0, 255, 0), "RECONOCIDO"
+            else:
+                color, text = (0, 0, 255), "NO RECONOCIDO"
+            cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
+            cv2.putText(frame, text, (left, top-10), 
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        
+        # Mostrar frame en la interfaz
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb_frame.shape
+        bytes_per_line = ch * w
+        qt_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
+        
+        pixmap = QPixmap.fromImage(qt_image)
+        scaled_pixmap = pixmap.scaled(self.auto_camera_label.size(), 
+                                    Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        
+        self.auto_camera_label.setPixmap(scaled_pixmap)
 
     def process_automatic_attendance(self, student_id, confidence_message):
         """Procesar asistencia automática para estudiante reconocido"""
         try:
-            # Verificar si ya se registró asistencia hoy para este estudiante
-            db = Database()
-            conn = db.connect()
-            cursor = conn.cursor()
-            
-            fecha_actual = datetime.datetime.now().strftime("%Y-%m-%d")
-            
-            cursor.execute("""
-                SELECT id FROM asistencias 
-                WHERE estudiante_id = ? AND fecha = ?
-            """, (student_id, fecha_actual))
-            
-            existing_record = cursor.fetchone()
-            
-            if existing_record:
+            # Verificar en la caché del día si ya se registró asistencia (sin tocar la base de datos)
+            if self.attendance_cache.is_marked(student_id):
                 # Ya tiene asistencia registrada hoy
                 student_name = self.get_student_name(student_id)
                 self.detected_student_info.setText(f"""
@@ -1328,15 +1398,10 @@ class AsistenciaView(QWidget):
                 </div>
                 """)
             else:
-                # Registrar nueva asistencia
-                hora_actual = datetime.datetime.now().strftime("%H:%M:%S")
-                
-                cursor.execute("""
-                    INSERT INTO asistencias (estudiante_id, fecha, hora, estado, metodo)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (student_id, fecha_actual, hora_actual, "presente", "reconocimiento_facial"))
-                
-                conn.commit()
+                # Encolar la asistencia; se guarda en lote en segundo plano. La caché se marca
+                # de inmediato para no volver a encolar y se invalida si la escritura falla.
+                hora_actual = self.attendance_writer.enqueue(student_id)
+                self.attendance_cache.mark(student_id)
                 
                 # Mostrar información del estudiante registrado
                 student_info = self.get_detailed_student_info(student_id)
@@ -1350,46 +1415,48 @@ class AsistenciaView(QWidget):
                     <p><b>Confianza:</b> {confidence_message}</p>
                 </div>
                 """)
-                
-                # Actualizar tabla de registros recientes
-                self.load_recent_attendance()
-                
-                # Mostrar notificación
-                QMessageBox.information(self, "Asistencia Registrada", 
-                                      f"Asistencia registrada para {student_info['nombre']} a las {hora_actual}")
-            
-            conn.close()
             
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error al procesar asistencia automática: {str(e)}")
+            self.add_attendance_notification(f"❌ Error al procesar asistencia automática: {str(e)}")
+    
+    def add_attendance_notification(self, text):
+        """Agregar una entrada al panel de notificaciones (más reciente arriba)"""
+        self.attendance_feed.insertItem(0, f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {text}")
+        while self.attendance_feed.count() > 50:
+            self.attendance_feed.takeItem(self.attendance_feed.count() - 1)
+    
+    def on_attendance_flushed(self, records):
+        """Informar el resultado de un lote guardado por la cola de asistencias"""
+        for record in records:
+            student_name = self.get_student_name(record['student_id'])
+            if record['inserted']:
+                self.add_attendance_notification(f"✅ Asistencia registrada: {student_name} ({record['hora']})")
+            else:
+                self.add_attendance_notification(f"⚠️ {student_name} ya tenía asistencia registrada hoy")
+        
+        # Actualizar tabla de registros recientes una vez por lote
+        self.load_recent_attendance()
+    
+    def on_attendance_flush_failed(self, message, records):
+        """Reintentar un lote que no se pudo guardar y revertir la caché si se descarta"""
+        dropped = self.attendance_writer.requeue(records)
+        retried = len(records) - len(dropped)
+        if retried:
+            self.add_attendance_notification(f"⚠️ No se pudieron guardar {retried} asistencias, se reintentará: {message}")
+        if dropped:
+            # Sin marca en la caché y sin identidad en el track, el próximo
+            # reconocimiento vuelve a encolarlas aunque el estudiante siga en cuadro
+            self.attendance_cache.invalidate()
+            if self.auto_recognition_thread:
+                self.auto_recognition_thread.forget_students({record['student_id'] for record in dropped})
+            self.add_attendance_notification(f"❌ No se pudieron guardar {len(dropped)} asistencias: {message}")
 
     def get_detailed_student_info(self, student_id):
         """Obtener información detallada del estudiante"""
         try:
-            db = Database()
-            conn = db.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT e.nombre, e.apellido, e.codigo, n.nombre as nivel, g.nombre as grado, s.nombre as seccion
-                FROM estudiantes e
-                LEFT JOIN niveles n ON e.nivel_id = n.id
-                LEFT JOIN grados g ON e.grado_id = g.id
-                LEFT JOIN secciones s ON e.seccion_id = s.id
-                WHERE e.id = ?
-            """, (student_id,))
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
-                    'nombre': f"{result[0]} {result[1]}",
-                    'codigo': result[2] or 'No asignado',
-                    'nivel': result[3] or 'No asignado',
-                    'grado': result[4] or 'No asignado',
-                    'seccion': result[5] or 'No asignado'
-                }
+            info = self.attendance_cache.get_student_info(student_id)
+            if info:
+                return info
             return {'nombre': 'Desconocido', 'codigo': '', 'nivel': '', 'grado': '', 'seccion': ''}
         except:
             return {'nombre': 'Error', 'codigo': '', 'nivel': '', 'grado': '', 'seccion': ''}
@@ -1401,14 +1468,7 @@ class AsistenciaView(QWidget):
             conn = db.connect()
             cursor = conn.cursor()
             
-            cursor.execute("""
-                SELECT a.hora, e.nombre, e.apellido, a.estado, a.metodo
-                FROM asistencias a
-                JOIN estudiantes e ON a.estudiante_id = e.id
-                WHERE a.fecha = ?
-                ORDER BY a.hora DESC
-                LIMIT 10
-            """, (datetime.datetime.now().strftime("%Y-%m-%d"),))
+            cursor.execute(ASISTENCIAS_RECIENTES_SQL, (datetime.datetime.now().strftime("%Y-%m-%d"),))
             
             records = cursor.fetchall()
             
@@ -2,11 +2,12 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushB
                              QComboBox, QTableWidget, QTableWidgetItem, QHeaderView,
                              QMessageBox, QDoubleSpinBox, QTextEdit, QGroupBox, QFrame,
                              QDialog, QTabWidget, QLineEdit, QSplitter, QScrollArea, QSizePolicy,
-                             QCheckBox)
+                             QCheckBox, QTableView)
 from PySide6.QtCore import Qt, QTimer, QSize
 from PySide6.QtGui import QIcon, QFont, QColor, QPainter, QPixmap
 from app.models.database import Database
 from app.utils.styles import AppStyles
+from app.utils.table_model import RowTableModel
 import datetime
 import math
 
@@ -16,6 +17,7 @@ class CalificacionesView(QWidget):
         self.user_data = user_data
         self.db = Database()
         self.setup_ui()
+        self.db.catalog.catalog_changed.connect(self.on_catalog_changed)
     
     def setup_ui(self):
         main_layout = QVBoxLayout()
@@ -257,25 +259,25 @@ class CalificacionesView(QWidget):
         students_group.setStyleSheet(AppStyles.get_group_box_style())
         students_layout = QVBoxLayout()
         
-        self.students_table = QTableWidget()
-        self.students_table.setColumnCount(5)
-        self.students_table.setHorizontalHeaderLabels(["Código", "Nombre", "Nivel", "Grado", "Sección"])
+        self.students_model = RowTableModel(["Código", "Nombre", "Nivel", "Grado", "Sección"], self)
+        self.students_table = QTableView()
+        self.students_table.setModel(self.students_model)
         self.students_table.horizontalHeader().setStretchLastSection(True)
-        self.students_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.students_table.cellClicked.connect(self.on_student_selected)
+        self.students_table.setSelectionBehavior(QTableView.SelectRows)
+        self.students_table.clicked.connect(self.on_student_selected)
         self.students_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #ddd;
                 background-color: white;
                 alternate-background-color: #f8f9fa;
                 border: none;
                 border-radius: 8px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #eee;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #3498db;
                 color: white;
             }
@@ -630,35 +632,39 @@ class CalificacionesView(QWidget):
     def load_filter_options(self):
         """Cargar opciones para los filtros"""
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
+            catalog = self.db.catalog
             
             # Cargar niveles
             self.nivel_combo.clear()
             self.nivel_combo.addItem("Todos los niveles", None)
-            cursor.execute("SELECT id, nombre FROM niveles ORDER BY nombre")
-            for nivel in cursor.fetchall():
+            for nivel in catalog.niveles():
                 self.nivel_combo.addItem(nivel[1], nivel[0])
             
             # Cargar grados
             self.grado_combo.clear()
             self.grado_combo.addItem("Todos los grados", None)
-            cursor.execute("SELECT id, nombre FROM grados ORDER BY nombre")
-            for grado in cursor.fetchall():
+            for grado in catalog.grados():
                 self.grado_combo.addItem(grado[1], grado[0])
             
             # Cargar secciones
             self.seccion_combo.clear()
             self.seccion_combo.addItem("Todas las secciones", None)
-            cursor.execute("SELECT id, nombre FROM secciones ORDER BY nombre")
-            for seccion in cursor.fetchall():
+            for seccion in catalog.secciones():
                 self.seccion_combo.addItem(seccion[1], seccion[0])
             
-            conn.close()
-            
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al cargar filtros: {str(e)}")
     
+    def on_catalog_changed(self):
+        """Recargar los filtros tras cambios en el catálogo, conservando la selección"""
+        selected = [(combo, combo.currentData()) for combo in (self.nivel_combo, self.grado_combo, self.seccion_combo)]
+        self.load_filter_options()
+        for combo, value in selected:
+            index = combo.findData(value)
+            if index >= 0:
+                combo.setCurrentIndex(index)
+        self.filter_students()
+    
     def on_nivel_changed(self):
         """Manejar cambio de nivel"""
         self.filter_students()
@@ -702,22 +708,16 @@ class CalificacionesView(QWidget):
     
     def display_students(self, students):
         """Mostrar estudiantes en la tabla"""
-        self.students_table.setRowCount(len(students))
-        
-        for row, student in enumerate(students):
-            self.students_table.setItem(row, 0, QTableWidgetItem(str(student[1]) if student[1] else "N/A"))
-            self.students_table.setItem(row, 1, QTableWidgetItem(f"{student[2]} {student[3]}"))
-            self.students_table.setItem(row, 2, QTableWidgetItem(student[5] or "N/A"))
-            self.students_table.setItem(row, 3, QTableWidgetItem(student[6] or "N/A"))
-            self.students_table.setItem(row, 4, QTableWidgetItem(student[7] or "N/A"))
-            
-            # Guardar ID del estudiante en la primera columna
-            self.students_table.item(row, 0).setData(Qt.UserRole, student[0])
+        self.students_model.set_rows(
+            ((str(student[1]) if student[1] else "N/A", f"{student[2]} {student[3]}",
+              student[5] or "N/A", student[6] or "N/A", student[7] or "N/A") for student in students),
+            # El ID del estudiante se guarda como dato de la fila (Qt.UserRole)
+            keys=[student[0] for student in students])
     
-    def on_student_selected(self, row, column):
+    def on_student_selected(self, index):
         """Manejar selección de estudiante"""
-        if row >= 0:
-            student_id = self.students_table.item(row, 0).data(Qt.UserRole)
+        if index.isValid():
+            student_id = index.data(Qt.UserRole)
             self.load_student_details(student_id)
     
     def load_student_details(self, student_id):
@@ -1144,11 +1144,7 @@ class CalificacionesView(QWidget):
         
         # Cargar materias desde la base de datos
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nombre FROM materias ORDER BY nombre")
-            subjects = cursor.fetchall()
-            conn.close()
+            subjects = self.db.catalog.materias()
             
             for subject in subjects:
                 self.subject_combo.addItem(subject[1], subject[0])
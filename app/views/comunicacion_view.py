@@ -41,6 +41,7 @@ class ComunicacionView(QWidget):
         self.nivel_combo.setStyleSheet(AppStyles.get_input_style())
         self.nivel_combo.setMinimumWidth(120)
         self.load_niveles()
+        self.db.catalog.catalog_changed.connect(self.load_niveles)
         self.nivel_combo.currentIndexChanged.connect(self.on_nivel_changed)
         nivel_layout.addWidget(nivel_label)
         nivel_layout.addWidget(self.nivel_combo)
@@ -179,11 +180,7 @@ class ComunicacionView(QWidget):
             return
         
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT id, nombre FROM grados WHERE nivel_id = ? ORDER BY id", (nivel_id,))
-            grados = cursor.fetchall()
+            grados = self.db.catalog.grados(nivel_id, order_by='id')
             
             self.grado_combo.clear()
             for grado in grados:
@@ -198,11 +195,7 @@ class ComunicacionView(QWidget):
             return
         
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT id, nombre FROM secciones WHERE grado_id = ? ORDER BY id", (grado_id,))
-            secciones = cursor.fetchall()
+            secciones = self.db.catalog.secciones(grado_id, order_by='id')
             
             self.seccion_combo.clear()
             for seccion in secciones:
@@ -240,21 +233,6 @@ class ComunicacionView(QWidget):
             conn = self.db.connect()
             cursor = conn.cursor()
             
-            # Verificar si existe la tabla de mensajes, si no, crearla
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS mensajes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fecha TEXT,
-                    hora TEXT,
-                    destinatarios TEXT,
-                    asunto TEXT,
-                    mensaje TEXT,
-                    estado TEXT,
-                    usuario_id INTEGER,
-                    FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
-                )
-            """)
-            
             # Obtener fecha y hora actual
             now = QDateTime.currentDateTime()
             fecha = now.toString("yyyy-MM-dd")
@@ -285,28 +263,6 @@ class ComunicacionView(QWidget):
             conn = self.db.connect()
             cursor = conn.cursor()
             
-            # Verificar si existe la tabla de mensajes
-            cursor.execute("""
-                SELECT name FROM sqlite_master WHERE type='table' AND name='mensajes'
-            """)
-            
-            if not cursor.fetchone():
-                # Si no existe la tabla, crearla
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS mensajes (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        fecha TEXT,
-                        hora TEXT,
-                        destinatarios TEXT,
-                        asunto TEXT,
-                        mensaje TEXT,
-                        estado TEXT,
-                        usuario_id INTEGER,
-                        FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
-                    )
-                """)
-                conn.commit()
-            
             # Cargar mensajes del usuario actual
             cursor.execute("""
                 SELECT id, fecha, hora, destinatarios, asunto, estado
@@ -4,8 +4,11 @@ from PySide6.QtCore import Qt, QThread, QTimer, Signal
 from PySide6.QtGui import QPixmap, QImage, QFont
 import cv2
 import numpy as np
+import time
 from datetime import datetime
-from app.utils.emotion_recognition import EmotionRecognition
+from app.utils.emotion_recognition import EmotionRecognition, EmotionModelService
+from app.utils.face_detection import FaceDetectionStage
+from app.utils.analysis_scheduler import AnalysisScheduler
 from app.models.database import Database
 
 class EmotionLiveThread(QThread):
@@ -16,10 +19,11 @@ class EmotionLiveThread(QThread):
     def __init__(self):
         super().__init__()
         self.emotion_recognition = EmotionRecognition()
+        self.face_stage = FaceDetectionStage()
         self.running = False
         self.camera = None
-        self.frame_count = 0
-        self.detection_interval = 15  # Detectar cada 15 frames para mejor rendimiento
+        # Frecuencia de análisis adaptada a la latencia medida (sección 'emotion')
+        self.scheduler = AnalysisScheduler()
     
     def start_analysis(self):
         """Iniciar análisis de emociones"""
@@ -28,6 +32,8 @@ class EmotionLiveThread(QThread):
             if not self.camera.isOpened():
                 return False
             
+            # Si el modelo aún no está cargado, se muestra video mientras termina de cargar
+            self.emotion_recognition.model_service.warmup()
             self.running = True
             self.start()
             return True
@@ -46,26 +52,32 @@ class EmotionLiveThread(QThread):
     
     def run(self):
         while self.running and self.camera and self.camera.isOpened():
+            loop_started = time.monotonic()
             ret, frame = self.camera.read()
             if ret:
                 # Emitir frame para mostrar en la interfaz
                 self.frame_ready.emit(frame.copy())
                 
-                # Analizar emoción cada N frames
-                self.frame_count += 1
-                if self.frame_count % self.detection_interval == 0:
+                # Analizar emoción cuando el planificador lo indique (con el modelo ya cargado)
+                if self.emotion_recognition.model_service.is_ready() and self.scheduler.should_analyze(frame):
+                    started = time.monotonic()
                     try:
-                        emotion, confidence, emotions_scores = self.emotion_recognition.detect_emotion(frame)
-                        timestamp = datetime.now().strftime("%H:%M:%S")
-                        
-                        # Obtener distribución completa de emociones
-                        distribution = self.emotion_recognition.get_emotion_distribution(emotions_scores)
-                        
-                        self.emotion_detected.emit(emotion, confidence, timestamp, distribution)
+                        # Detectar rostros una vez y clasificar todos con una sola inferencia
+                        faces = self.face_stage.detect(frame)
+                        results = self.emotion_recognition.detect_emotions_batch(frame, faces)
+                        primary = self.face_stage.primary_face(results)
+                        if primary:
+                            timestamp = datetime.now().strftime("%H:%M:%S")
+                            self.emotion_detected.emit(primary['emotion'], primary['confidence'], timestamp,
+                                                       primary['distribution'])
                     except Exception as e:
                         print(f"Error en detección de emoción: {e}")
+                    self.scheduler.record_analysis(frame, started)
             
-            self.msleep(33)  # ~30 FPS
+            # Descartar los frames acumulados mientras se analizaba
+            for _ in range(self.scheduler.frames_behind(loop_started)):
+                self.camera.grab()
+            self.msleep(self.scheduler.sleep_ms(loop_started))
 
 class EmotionLiveView(QWidget):
     def __init__(self, user_data):
@@ -167,6 +179,14 @@ class EmotionLiveView(QWidget):
         controls_layout.addStretch()
         
         camera_layout.addLayout(controls_layout)
+        
+        # Estado del modelo de emociones (compartido por toda la aplicación)
+        self.model_service = EmotionModelService()
+        self.model_status_label = QLabel(self.model_service.status_text())
+        self.model_status_label.setStyleSheet("color: #666; padding: 5px;")
+        self.model_service.status_changed.connect(self.on_model_status_changed)
+        camera_layout.addWidget(self.model_status_label)
+        
         main_layout.addWidget(camera_group, 2)
         
         # Panel derecho - Resultados
@@ -252,6 +272,9 @@ class EmotionLiveView(QWidget):
         else:
             self.video_label.setText("Error: No se pudo iniciar la cámara")
     
+    def on_model_status_changed(self, status):
+        self.model_status_label.setText(self.model_service.status_text())
+    
     def stop_emotion_analysis(self):
         """Detener análisis de emociones"""
         if self.emotion_thread:
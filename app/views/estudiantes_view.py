@@ -7,6 +7,8 @@ from PySide6.QtGui import QPixmap, QFont, QImage
 import cv2
 import os
 from app.models.database import Database
+from app.models.student_importer import StudentImportThread
+from app.models.student_codes import codigo_prefix, generate_email, unique_email
 # from app.utils.facial_recognition import FacialRecognition  # Temporarily commented out
 
 class EstudiantesView(QWidget):
@@ -19,7 +21,9 @@ class EstudiantesView(QWidget):
         self.camera = None
         self.camera_timer = None
         self.is_camera_active = False
+        self.import_thread = None
         self.setup_ui()
+        Database().catalog.catalog_changed.connect(self.on_catalog_changed)
     
     def setup_ui(self):
         main_layout = QVBoxLayout()
@@ -63,6 +67,13 @@ class EstudiantesView(QWidget):
         buscar_btn.clicked.connect(self.buscar_estudiante)
         filtros_layout.addWidget(buscar_btn)
         
+        # Importación masiva desde CSV/XLSX
+        self.import_btn = QPushButton("📥 Importar")
+        self.import_btn.setStyleSheet(buscar_btn.styleSheet())
+        self.import_btn.setToolTip("Importar estudiantes desde un archivo CSV o Excel")
+        self.import_btn.clicked.connect(self.import_students)
+        filtros_layout.addWidget(self.import_btn)
+        
         # Filtros
         filtros_layout.addWidget(QLabel("Nivel:"))
         self.nivel_filter = QComboBox()
@@ -488,6 +499,17 @@ class EstudiantesView(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al cargar niveles: {str(e)}")
     
+    def on_catalog_changed(self):
+        """Recargar los combos del formulario tras cambios en el catálogo, conservando la selección"""
+        selected = [(combo, combo.currentData()) for combo in (self.nivel_combo, self.grado_combo, self.seccion_combo)]
+        self.load_niveles()
+        # Cada selección recarga el combo siguiente (on_nivel_changed, on_grado_changed)
+        for combo, value in selected:
+            index = combo.findData(value)
+            if value is None or index < 0:
+                break
+            combo.setCurrentIndex(index)
+    
     def on_nivel_changed(self):
         """Cargar grados cuando se selecciona un nivel"""
         nivel_id = self.nivel_combo.currentData()
@@ -555,49 +577,31 @@ class EstudiantesView(QWidget):
         segundo_apellido = self.segundo_apellido_input.text().strip()
         
         if nombres and primer_apellido and segundo_apellido:
-            # Generar email: nombre+2primeras_primer_apellido+2primeras_segundo_apellido@kairos.pe
-            nombre_clean = nombres.split()[0].lower() if nombres else ""
-            primer_2 = primer_apellido[:2].lower() if len(primer_apellido) >= 2 else primer_apellido.lower()
-            segundo_2 = segundo_apellido[:2].lower() if len(segundo_apellido) >= 2 else segundo_apellido.lower()
+            db = Database()
             
-            email = f"{nombre_clean}{primer_2}{segundo_2}@kairos.pe"
+            # Generar email: nombre+2primeras_primer_apellido+2primeras_segundo_apellido@kairos.pe
+            # (con un número si ya está registrado: ana@ -> ana2@)
+            email = unique_email(generate_email(nombres, primer_apellido, segundo_apellido), db.email_registrado)
             self.email_input.setText(email)
             
-            # Generar código mejorado basado en nivel, grado y sección
-            nivel_text = self.nivel_combo.currentText()
-            grado_text = self.grado_combo.currentText()
-            seccion_text = self.seccion_combo.currentText()
-            
-            if nivel_text and grado_text and seccion_text and nivel_text != "Seleccionar nivel" and grado_text != "Seleccionar grado" and seccion_text != "Seleccionar sección":
-                # Prefijo por nivel
-                if "Inicial" in nivel_text:
-                    nivel_prefix = "I"
-                elif "Primaria" in nivel_text:
-                    nivel_prefix = "P"
-                elif "Secundaria" in nivel_text:
-                    nivel_prefix = "S"
-                else:
-                    nivel_prefix = "X"
-                
-                # Número de grado (extraer primer dígito)
-                import re
-                grado_num = re.findall(r'\d+', grado_text)
-                grado_code = grado_num[0] if grado_num else "0"
-                
-                # Letra de sección
-                seccion_code = seccion_text.upper()
-                
-                # Número correlativo (simulado con números aleatorios por ahora)
-                import random
-                correlativo = f"{random.randint(100, 999):03d}"
-                
-                # Formato: NIVEL + GRADO + SECCIÓN + CORRELATIVO
-                # Ejemplo: P3A001, S1B045, I5C123
-                codigo = f"{nivel_prefix}{grado_code}{seccion_code}{correlativo}"
-                self.codigo_input.setText(codigo)
+            # Código: NIVEL + GRADO + SECCIÓN + CORRELATIVO (ej. P3A001, S1B045, I5C123).
+            # Aquí solo se muestra el siguiente correlativo; se reserva al guardar
+            prefix = self.current_codigo_prefix()
+            if prefix:
+                self.codigo_input.setText(db.peek_codigo(prefix))
             else:
                 self.codigo_input.setText("Seleccione nivel, grado y sección")
     
+    def current_codigo_prefix(self):
+        """Prefijo del código según nivel, grado y sección seleccionados (None si falta alguno)"""
+        nivel_text = self.nivel_combo.currentText()
+        grado_text = self.grado_combo.currentText()
+        seccion_text = self.seccion_combo.currentText()
+        
+        if nivel_text and grado_text and seccion_text and nivel_text != "Seleccionar nivel" and grado_text != "Seleccionar grado" and seccion_text != "Seleccionar sección":
+            return codigo_prefix(nivel_text, grado_text, seccion_text)
+        return None
+    
     def upload_photo(self):
         """Subir foto del estudiante"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -626,13 +630,22 @@ class EstudiantesView(QWidget):
             QMessageBox.warning(self, "Error", "Debe seleccionar nivel, grado y sección")
             return
         
+        email = self.email_input.text().strip()
         try:
             db = Database()
+            # Búsqueda por idx_estudiantes_email en lugar de descubrir el duplicado al insertar
+            if email and db.email_registrado(email):
+                QMessageBox.warning(self, "Error", f"El email {email} ya está registrado")
+                return
+            
             conn = db.connect()
             
             with conn:  # Usar context manager
                 cursor = conn.cursor()
                 
+                # El correlativo se reserva en la misma transacción que el INSERT
+                codigo = db.reserve_codigos(self.current_codigo_prefix(), 1, conn)[0]
+                
                 # Crear nuevo estudiante
                 cursor.execute("""
                     INSERT INTO estudiantes 
@@ -646,8 +659,8 @@ class EstudiantesView(QWidget):
                     self.genero_combo.currentText(),
                     self.direccion_input.text().strip(),
                     self.telefono_input.text().strip(),
-                    self.email_input.text().strip(),
-                    self.codigo_input.text().strip(),
+                    email,
+                    codigo,
                     self.seccion_combo.currentData()
                 ))
                 
@@ -667,12 +680,47 @@ class EstudiantesView(QWidget):
                     1  # Es el tutor principal
                 ))
                 
-                QMessageBox.information(self, "Éxito", "Estudiante y datos del tutor guardados correctamente")
+                QMessageBox.information(self, "Éxito", f"Estudiante {codigo} y datos del tutor guardados correctamente")
                 self.clear_form()
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al guardar estudiante: {str(e)}")
     
+    def import_students(self):
+        """Importar estudiantes y tutores desde un archivo CSV/XLSX en segundo plano"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Importar Estudiantes", "",
+            "Archivos de estudiantes (*.csv *.xlsx)"
+        )
+        if not file_path:
+            return
+        
+        self.import_btn.setEnabled(False)
+        self.import_btn.setText("📥 Importando...")
+        self.import_thread = StudentImportThread(file_path)
+        self.import_thread.progress.connect(self.on_import_progress)
+        self.import_thread.import_finished.connect(self.on_import_finished)
+        self.import_thread.import_failed.connect(self.on_import_failed)
+        self.import_thread.start()
+    
+    def on_import_progress(self, filas):
+        self.import_btn.setText(f"📥 {filas} filas...")
+    
+    def on_import_finished(self, report):
+        self.reset_import_button()
+        mensaje = report.summary()
+        if report.errors:
+            mensaje += f"\n\nLas filas con errores se guardaron en:\n{report.write_errors()}"
+        QMessageBox.information(self, "Importación", mensaje)
+    
+    def on_import_failed(self, error):
+        self.reset_import_button()
+        QMessageBox.critical(self, "Error", f"Error al importar estudiantes: {error}")
+    
+    def reset_import_button(self):
+        self.import_btn.setEnabled(True)
+        self.import_btn.setText("📥 Importar")
+    
     def clear_form(self):
         """Limpiar formulario"""
         self.nombres_input.clear()
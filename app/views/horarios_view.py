@@ -6,6 +6,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushB
 from PySide6.QtCore import Qt, QTime
 from PySide6.QtGui import QFont, QColor
 from app.models.database import Database
+from app.models.queries import HORARIOS_SECCION_SQL, HORARIOS_PROFESOR_SQL
 from app.utils.styles import AppStyles
 
 class HorariosView(QWidget):
@@ -246,16 +247,14 @@ class HorariosView(QWidget):
     def load_initial_data(self):
         """Cargar datos iniciales"""
         self.load_niveles()
+        self.db.catalog.catalog_changed.connect(self.load_niveles)
         self.load_teachers()
         self.load_management_table()
     
     def load_niveles(self):
         """Cargar niveles en el combo"""
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nombre FROM niveles ORDER BY nombre")
-            niveles = cursor.fetchall()
+            niveles = self.db.get_niveles()
             
             self.nivel_combo.clear()
             self.nivel_combo.addItem("Todos los niveles", None)
@@ -277,10 +276,7 @@ class HorariosView(QWidget):
             self.grado_combo.addItem("Todos los grados", None)
             
             if nivel_id:
-                conn = self.db.connect()
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, nombre FROM grados WHERE nivel_id = ? ORDER BY nombre", (nivel_id,))
-                grados = cursor.fetchall()
+                grados = self.db.get_grados_by_nivel(nivel_id)
                 
                 for grado in grados:
                     self.grado_combo.addItem(grado[1], grado[0])
@@ -300,10 +296,7 @@ class HorariosView(QWidget):
             self.seccion_combo.addItem("Todas las secciones", None)
             
             if grado_id:
-                conn = self.db.connect()
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, nombre FROM secciones WHERE grado_id = ? ORDER BY nombre", (grado_id,))
-                secciones = cursor.fetchall()
+                secciones = self.db.get_secciones_by_grado(grado_id)
                 
                 for seccion in secciones:
                     self.seccion_combo.addItem(seccion[1], seccion[0])
@@ -327,15 +320,7 @@ class HorariosView(QWidget):
             cursor = conn.cursor()
             
             # Obtener horarios de la sección
-            cursor.execute("""
-                SELECT h.dia_semana, h.hora_inicio, h.hora_fin, m.nombre as materia, 
-                       p.nombre || ' ' || p.apellido as profesor, h.aula
-                FROM horarios h
-                JOIN materias m ON h.materia_id = m.id
-                JOIN profesores p ON h.profesor_id = p.id
-                WHERE h.seccion_id = ? AND h.activo = 1
-                ORDER BY h.dia_semana, h.hora_inicio
-            """, (seccion_id,))
+            cursor.execute(HORARIOS_SECCION_SQL, (seccion_id,))
             
             horarios = cursor.fetchall()
             
@@ -423,17 +408,7 @@ class HorariosView(QWidget):
                 self.teacher_info_group.setVisible(True)
             
             # Obtener horarios del profesor
-            cursor.execute("""
-                SELECT h.dia_semana, h.hora_inicio, h.hora_fin, m.nombre as materia,
-                       n.nombre as nivel, g.nombre as grado, s.nombre as seccion, h.aula
-                FROM horarios h
-                JOIN materias m ON h.materia_id = m.id
-                JOIN secciones s ON h.seccion_id = s.id
-                JOIN grados g ON s.grado_id = g.id
-                JOIN niveles n ON g.nivel_id = n.id
-                WHERE h.profesor_id = ? AND h.activo = 1
-                ORDER BY h.dia_semana, h.hora_inicio
-            """, (teacher_id,))
+            cursor.execute(HORARIOS_PROFESOR_SQL, (teacher_id,))
             
             schedules = cursor.fetchall()
             
@@ -625,10 +600,7 @@ class ScheduleDialog(QDialog):
     
     def load_subjects(self):
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nombre FROM materias ORDER BY nombre")
-            subjects = cursor.fetchall()
+            subjects = self.db.catalog.materias()
             
             for subject in subjects:
                 self.subject_combo.addItem(subject[1], subject[0])
@@ -649,16 +621,7 @@ class ScheduleDialog(QDialog):
     
     def load_sections(self):
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT s.id, n.nombre || ' - ' || g.nombre || ' - ' || s.nombre as seccion_completa
-                FROM secciones s
-                JOIN grados g ON s.grado_id = g.id
-                JOIN niveles n ON g.nivel_id = n.id
-                ORDER BY n.nombre, g.nombre, s.nombre
-            """)
-            sections = cursor.fetchall()
+            sections = self.db.catalog.secciones_completas()
             
             for section in sections:
                 self.section_combo.addItem(section[1], section[0])
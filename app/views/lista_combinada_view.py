@@ -1,11 +1,12 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTabWidget,
-                             QTableWidget, QTableWidgetItem, QComboBox, QLineEdit,
+                             QTableView, QComboBox, QLineEdit,
                              QGroupBox, QFormLayout, QMessageBox, QHeaderView, QLabel,
                              QPushButton)
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QIcon
 from app.models.database import Database
 from app.utils.styles import AppStyles
+from app.utils.table_model import RowTableModel, RowFilterProxyModel, ActionButtonsDelegate
 from datetime import datetime
 import os
 from reportlab.lib.pagesizes import A4
@@ -13,6 +14,9 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 
+# Botones de acción por fila: (acción, texto, color)
+EDIT_DELETE_BUTTONS = [("edit", "Editar", "#3498db"), ("delete", "Eliminar", "#e74c3c")]
+
 class ListaCombinadaView(QWidget):
     def __init__(self, user_data):
         super().__init__()
@@ -72,7 +76,6 @@ class ListaCombinadaView(QWidget):
         self.student_search_input = QLineEdit()
         self.student_search_input.setPlaceholderText("Buscar por nombre o código...")
         self.student_search_input.setStyleSheet(AppStyles.get_line_edit_style())
-        self.student_search_input.textChanged.connect(self.filter_students)
         filter_layout.addWidget(self.student_search_input)
         
         # Filtros académicos
@@ -86,9 +89,16 @@ class ListaCombinadaView(QWidget):
         layout.addWidget(filter_group)
         
         # Tabla de estudiantes
-        self.students_table = QTableWidget()
-        self.students_table.setColumnCount(7)
-        self.students_table.setHorizontalHeaderLabels(["Código", "Nombre", "Nivel", "Grado", "Sección", "Email", "Acciones"])
+        self.students_model = RowTableModel(["Código", "Nombre", "Nivel", "Grado", "Sección", "Email", "Acciones"], self)
+        # Búsqueda por código y nombre sobre el proxy, con debounce
+        self.students_proxy = RowFilterProxyModel([0, 1], self)
+        self.students_proxy.setSourceModel(self.students_model)
+        self.student_search_input.textChanged.connect(self.students_proxy.set_search_text)
+        self.students_table = QTableView()
+        self.students_table.setModel(self.students_proxy)
+        self.students_actions = ActionButtonsDelegate(EDIT_DELETE_BUTTONS, self.students_table)
+        self.students_actions.button_clicked.connect(self.on_student_action)
+        self.students_table.setItemDelegateForColumn(6, self.students_actions)
         self.students_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.students_table.setStyleSheet(AppStyles.get_table_style())
         layout.addWidget(self.students_table)
@@ -124,16 +134,22 @@ class ListaCombinadaView(QWidget):
         self.teacher_search_input = QLineEdit()
         self.teacher_search_input.setPlaceholderText("Buscar por nombre o especialidad...")
         self.teacher_search_input.setStyleSheet(AppStyles.get_line_edit_style())
-        self.teacher_search_input.textChanged.connect(self.filter_teachers)
         filter_layout.addWidget(self.teacher_search_input)
         
         filter_group.setLayout(filter_layout)
         layout.addWidget(filter_group)
         
         # Tabla de profesores
-        self.teachers_table = QTableWidget()
-        self.teachers_table.setColumnCount(6)
-        self.teachers_table.setHorizontalHeaderLabels(["ID", "Nombre", "Email", "Teléfono", "Especialidad", "Acciones"])
+        self.teachers_model = RowTableModel(["ID", "Nombre", "Email", "Teléfono", "Especialidad", "Acciones"], self)
+        # Búsqueda por nombre y especialidad sobre el proxy, con debounce
+        self.teachers_proxy = RowFilterProxyModel([1, 4], self)
+        self.teachers_proxy.setSourceModel(self.teachers_model)
+        self.teacher_search_input.textChanged.connect(self.teachers_proxy.set_search_text)
+        self.teachers_table = QTableView()
+        self.teachers_table.setModel(self.teachers_proxy)
+        self.teachers_actions = ActionButtonsDelegate(EDIT_DELETE_BUTTONS, self.teachers_table)
+        self.teachers_actions.button_clicked.connect(self.on_teacher_action)
+        self.teachers_table.setItemDelegateForColumn(5, self.teachers_actions)
         self.teachers_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.teachers_table.setStyleSheet(AppStyles.get_table_style())
         layout.addWidget(self.teachers_table)
@@ -187,107 +203,42 @@ class ListaCombinadaView(QWidget):
             QMessageBox.warning(self, "Error", f"Error cargando profesores: {e}")
     
     def display_students(self, students):
-        self.students_table.setRowCount(len(students))
-        
-        for row, student in enumerate(students):
-            # Código
-            self.students_table.setItem(row, 0, QTableWidgetItem(student[1] or "N/A"))
-            # Nombre completo
-            self.students_table.setItem(row, 1, QTableWidgetItem(f"{student[2]} {student[3]}"))
-            # Nivel
-            self.students_table.setItem(row, 2, QTableWidgetItem(student[5] or "N/A"))
-            # Grado
-            self.students_table.setItem(row, 3, QTableWidgetItem(student[6] or "N/A"))
-            # Sección
-            self.students_table.setItem(row, 4, QTableWidgetItem(student[7] or "N/A"))
-            # Email
-            self.students_table.setItem(row, 5, QTableWidgetItem(student[4] or "N/A"))
-            
-            # Botones de acción
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(0, 0, 0, 0)
-            
-            # Botón Editar
-            edit_btn = QPushButton("Editar")
-            edit_btn.setStyleSheet("background-color: #3498db; color: white; border-radius: 3px; padding: 3px;")
-            edit_btn.clicked.connect(lambda checked, s=student[0]: self.edit_student(s))
-            actions_layout.addWidget(edit_btn)
-            
-            # Botón Eliminar
-            delete_btn = QPushButton("Eliminar")
-            delete_btn.setStyleSheet("background-color: #e74c3c; color: white; border-radius: 3px; padding: 3px;")
-            delete_btn.clicked.connect(lambda checked, s=student[0]: self.delete_student(s))
-            actions_layout.addWidget(delete_btn)
-            
-            self.students_table.setCellWidget(row, 6, actions_widget)
+        self.students_model.set_rows(
+            ((student[1] or "N/A",                  # Código
+              f"{student[2]} {student[3]}",         # Nombre completo
+              student[5] or "N/A",                  # Nivel
+              student[6] or "N/A",                  # Grado
+              student[7] or "N/A",                  # Sección
+              student[4] or "N/A",                  # Email
+              "") for student in students),         # Acciones (las dibuja el delegate)
+            keys=[student[0] for student in students])
     
     def display_teachers(self, teachers):
-        self.teachers_table.setRowCount(len(teachers))
-        
-        for row, teacher in enumerate(teachers):
-            # ID
-            self.teachers_table.setItem(row, 0, QTableWidgetItem(str(teacher[0])))
-            # Nombre completo
-            self.teachers_table.setItem(row, 1, QTableWidgetItem(f"{teacher[1]} {teacher[2]}"))
-            # Email
-            self.teachers_table.setItem(row, 2, QTableWidgetItem(teacher[3] or "N/A"))
-            # Teléfono
-            self.teachers_table.setItem(row, 3, QTableWidgetItem(teacher[4] or "N/A"))
-            # Especialidad
-            self.teachers_table.setItem(row, 4, QTableWidgetItem(teacher[5] or "N/A"))
-            
-            # Botones de acción
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(0, 0, 0, 0)
-            
-            # Botón Editar
-            edit_btn = QPushButton("Editar")
-            edit_btn.setStyleSheet("background-color: #3498db; color: white; border-radius: 3px; padding: 3px;")
-            edit_btn.clicked.connect(lambda checked, t=teacher[0]: self.edit_teacher(t))
-            actions_layout.addWidget(edit_btn)
-            
-            # Botón Eliminar
-            delete_btn = QPushButton("Eliminar")
-            delete_btn.setStyleSheet("background-color: #e74c3c; color: white; border-radius: 3px; padding: 3px;")
-            delete_btn.clicked.connect(lambda checked, t=teacher[0]: self.delete_teacher(t))
-            actions_layout.addWidget(delete_btn)
-            
-            self.teachers_table.setCellWidget(row, 5, actions_widget)
+        self.teachers_model.set_rows(
+            ((str(teacher[0]),                      # ID
+              f"{teacher[1]} {teacher[2]}",         # Nombre completo
+              teacher[3] or "N/A",                  # Email
+              teacher[4] or "N/A",                  # Teléfono
+              teacher[5] or "N/A",                  # Especialidad
+              "") for teacher in teachers),         # Acciones (las dibuja el delegate)
+            keys=[teacher[0] for teacher in teachers])
     
-    def filter_students(self):
-        search_text = self.student_search_input.text().lower()
-        nivel_id = self.nivel_combo.currentData()
-        
-        filtered_students = []
-        
-        for student in self.all_students:
-            # Filtrar por texto de búsqueda
-            if search_text and search_text not in f"{student[1]} {student[2]} {student[3]}".lower():
-                continue
-            
-            # Filtrar por nivel
-            if nivel_id and student[8] != nivel_id:
-                continue
-            
-            filtered_students.append(student)
-        
-        self.display_students(filtered_students)
+    def on_student_action(self, action, student_id):
+        if action == "edit":
+            self.edit_student(student_id)
+        elif action == "delete":
+            self.delete_student(student_id)
     
-    def filter_teachers(self):
-        search_text = self.teacher_search_input.text().lower()
-        
-        filtered_teachers = []
-        
-        for teacher in self.all_teachers:
-            # Filtrar por texto de búsqueda
-            if search_text and search_text not in f"{teacher[1]} {teacher[2]} {teacher[5]}".lower():
-                continue
-            
-            filtered_teachers.append(teacher)
-        
-        self.display_teachers(filtered_teachers)
+    def on_teacher_action(self, action, teacher_id):
+        if action == "edit":
+            self.edit_teacher(teacher_id)
+        elif action == "delete":
+            self.delete_teacher(teacher_id)
+    
+    def filter_students(self):
+        # Filtrar por nivel (la búsqueda de texto la aplica el proxy)
+        nivel = self.nivel_combo.currentText() if self.nivel_combo.currentData() else None
+        self.students_proxy.set_column_filter(2, nivel)
     
     def export_students_to_pdf(self):
         try:
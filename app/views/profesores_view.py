@@ -1,14 +1,18 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-                             QTableWidget, QTableWidgetItem, QComboBox, QLineEdit,
+                             QTableView, QComboBox, QLineEdit,
                              QGroupBox, QFormLayout, QMessageBox, QHeaderView, QDialog,
                              QDialogButtonBox, QStackedWidget)
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QIcon
 from app.models.database import Database
 from app.utils.styles import AppStyles
+from app.utils.table_model import RowTableModel, RowFilterProxyModel, ActionButtonsDelegate
 import os
 from datetime import datetime
 
+# Botones de acción por fila: (acción, texto, color)
+EDIT_DELETE_BUTTONS = [("edit", "Editar", "#3498db"), ("delete", "Eliminar", "#e74c3c")]
+
 class ProfesoresView(QWidget):
     def __init__(self, user_data):
         super().__init__()
@@ -78,23 +82,29 @@ class ProfesoresView(QWidget):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Buscar por nombre o especialidad...")
         self.search_input.setStyleSheet(AppStyles.get_line_edit_style())
-        self.search_input.textChanged.connect(self.filter_teachers)
         filter_layout.addWidget(self.search_input)
         
         filter_group.setLayout(filter_layout)
         layout.addWidget(filter_group)
         
         # Tabla de profesores
-        self.teachers_table = QTableWidget()
-        self.teachers_table.setColumnCount(6)
-        self.teachers_table.setHorizontalHeaderLabels(["ID", "Nombre", "Email", "Teléfono", "Especialidad", "Acciones"])
+        self.teachers_model = RowTableModel(["ID", "Nombre", "Email", "Teléfono", "Especialidad", "Acciones"], self)
+        # Búsqueda por nombre y especialidad sobre el proxy, con debounce
+        self.teachers_proxy = RowFilterProxyModel([1, 4], self)
+        self.teachers_proxy.setSourceModel(self.teachers_model)
+        self.search_input.textChanged.connect(self.teachers_proxy.set_search_text)
+        self.teachers_table = QTableView()
+        self.teachers_table.setModel(self.teachers_proxy)
+        self.teachers_actions = ActionButtonsDelegate(EDIT_DELETE_BUTTONS, self.teachers_table)
+        self.teachers_actions.button_clicked.connect(self.on_teacher_action)
+        self.teachers_table.setItemDelegateForColumn(5, self.teachers_actions)
         self.teachers_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.teachers_table.setStyleSheet("""QTableWidget {
+        self.teachers_table.setStyleSheet("""QTableView {
             border: 1px solid #ddd;
             border-radius: 5px;
             background-color: white;
         }
-        QTableWidget::item {
+        QTableView::item {
             padding: 5px;
         }
         QHeaderView::section {
@@ -135,50 +145,18 @@ class ProfesoresView(QWidget):
     
     def display_teachers(self, teachers):
         """Mostrar profesores en la tabla"""
-        self.teachers_table.setRowCount(len(teachers))
-        
-        for row, teacher in enumerate(teachers):
-            # ID
-            self.teachers_table.setItem(row, 0, QTableWidgetItem(str(teacher[0])))
-            # Nombre completo
-            self.teachers_table.setItem(row, 1, QTableWidgetItem(f"{teacher[1]} {teacher[2]}"))
-            # Email
-            self.teachers_table.setItem(row, 2, QTableWidgetItem(teacher[3] or "N/A"))
-            # Teléfono
-            self.teachers_table.setItem(row, 3, QTableWidgetItem(teacher[4] or "N/A"))
-            # Especialidad
-            self.teachers_table.setItem(row, 4, QTableWidgetItem(teacher[5] or "N/A"))
-            
-            # Botones de acción
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(0, 0, 0, 0)
-            
-            # Botón Editar
-            edit_btn = QPushButton("Editar")
-            edit_btn.setStyleSheet("background-color: #3498db; color: white; border-radius: 3px; padding: 3px;")
-            edit_btn.clicked.connect(lambda checked, t=teacher[0]: self.edit_teacher(t))
-            actions_layout.addWidget(edit_btn)
-            
-            # Botón Eliminar
-            delete_btn = QPushButton("Eliminar")
-            delete_btn.setStyleSheet("background-color: #e74c3c; color: white; border-radius: 3px; padding: 3px;")
-            delete_btn.clicked.connect(lambda checked, t=teacher[0]: self.delete_teacher(t))
-            actions_layout.addWidget(delete_btn)
-            
-            self.teachers_table.setCellWidget(row, 5, actions_widget)
+        self.teachers_model.set_rows(
+            ((str(teacher[0]),                      # ID
+              f"{teacher[1]} {teacher[2]}",         # Nombre completo
+              teacher[3] or "N/A",                  # Email
+              teacher[4] or "N/A",                  # Teléfono
+              teacher[5] or "N/A",                  # Especialidad
+              "") for teacher in teachers),         # Acciones (las dibuja el delegate)
+            keys=[teacher[0] for teacher in teachers])
     
-    def filter_teachers(self):
-        """Filtrar profesores según texto de búsqueda"""
-        search_text = self.search_input.text().lower()
-        
-        filtered_teachers = []
-        
-        for teacher in self.all_teachers:
-            # Filtrar por texto de búsqueda
-            if search_text and search_text not in f"{teacher[1]} {teacher[2]} {teacher[5]}".lower():
-                continue
-            
-            filtered_teachers.append(teacher)
-        
-        self.display_teachers(filtered_teachers)
\ No newline at end of file
+    def on_teacher_action(self, action, teacher_id):
+        """Botones Editar/Eliminar de la columna de acciones"""
+        if action == "edit":
+            self.edit_teacher(teacher_id)
+        elif action == "delete":
+            self.delete_teacher(teacher_id)
\ No newline at end of file
@@ -15,7 +15,11 @@ from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Image
 from reportlab.lib.styles import getSampleStyleSheet
 from app.models.database import Database
-from app.utils.emotion_recognition import EmotionRecognition
+from app.models.queries import (EMOCIONES_RESUMEN_SQL, EMOCIONES_POR_HORA_SQL, EMOCIONES_POR_DIA_SQL,
+                                EMOCIONES_POR_DIA_PDF_SQL)
+from app.utils.emotion_recognition import EmotionRecognition, EmotionModelService
+from app.utils.face_detection import FaceDetectionStage
+from app.utils.analysis_scheduler import AnalysisScheduler
 
 class EmotionAnalysisThread(QThread):
     """Hilo para análisis de emociones en tiempo real"""
@@ -26,10 +30,13 @@ class EmotionAnalysisThread(QThread):
     def __init__(self):
         super().__init__()
         self.emotion_recognition = EmotionRecognition()
+        self.face_stage = FaceDetectionStage()
+        self.scheduler = AnalysisScheduler()
         self.running = False
         self.camera = None
     
     def start_analysis(self):
+        self.emotion_recognition.model_service.warmup()
         self.running = True
         self.camera = cv2.VideoCapture(0)
         self.start()
@@ -42,14 +49,31 @@ class EmotionAnalysisThread(QThread):
         self.wait()
     
     def run(self):
+        faces, emotions_scores = [], {}
         while self.running and self.camera and self.camera.isOpened():
+            loop_started = time.monotonic()
             ret, frame = self.camera.read()
             if ret:
-                # Detectar emoción cada 2 segundos
-                emotion, confidence, emotions_scores = self.emotion_recognition.detect_emotion(frame)
+                # El análisis corre cuando lo indica el planificador; entre análisis
+                # el overlay reutiliza los últimos rostros y puntajes
+                analyzed = self.scheduler.should_analyze(frame)
+                emotion, confidence = 'desconocido', 0.0
+                if analyzed:
+                    started = time.monotonic()
+                    # Los rostros se detectan una sola vez: las mismas cajas alimentan
+                    # al clasificador y al overlay
+                    faces = self.face_stage.detect(frame)
+                    emotions_scores = {}
+                    # Mientras el modelo carga solo se muestra el video con los rostros
+                    if faces and self.emotion_recognition.model_service.is_ready():
+                        primary = self.face_stage.primary_face(
+                            self.emotion_recognition.detect_emotions_batch(frame, faces))
+                        if primary:
+                            emotion, confidence, emotions_scores = primary['emotion'], primary['confidence'], primary['scores']
+                    self.scheduler.record_analysis(frame, started)
                 
                 # Dibujar el mapeo facial y las barras de emociones en el frame
-                frame_with_overlay = self.draw_facial_mapping_and_bars(frame, emotions_scores)
+                frame_with_overlay = self.draw_facial_mapping_and_bars(frame, emotions_scores, faces)
                 
                 # Convertir el frame a QPixmap y enviarlo
                 rgb_frame = cv2.cvtColor(frame_with_overlay, cv2.COLOR_BGR2RGB)
@@ -60,24 +84,29 @@ class EmotionAnalysisThread(QThread):
                 self.frame_ready.emit(pixmap)
                 
                 # Emitir los datos de emociones para actualizar la UI
-                self.emotions_data_ready.emit(emotions_scores)
+                if analyzed:
+                    self.emotions_data_ready.emit(emotions_scores)
                 
                 if emotion != 'desconocido':
                     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     self.emotion_detected.emit(emotion, confidence, timestamp)
-                
-                self.msleep(100)  # Actualizar más rápido para una visualización fluida
+            
+            # Descartar los frames acumulados mientras se analizaba
+            for _ in range(self.scheduler.frames_behind(loop_started)):
+                self.camera.grab()
+            self.msleep(self.scheduler.sleep_ms(loop_started))
     
-    def draw_facial_mapping_and_bars(self, frame, emotions_scores):
-        """Dibujar el mapeo facial y las barras de emociones en el frame"""
+    def draw_facial_mapping_and_bars(self, frame, emotions_scores, faces=None):
+        """Dibujar el mapeo facial y las barras de emociones en el frame
+
+        faces: rostros ya detectados en este frame; si es None se detectan aquí.
+        """
         try:
             # Crear una copia del frame para no modificar el original
             result_frame = frame.copy()
             
-            # Detectar rostros usando OpenCV
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+            if faces is None:
+                faces = self.face_stage.detect(frame)
             
             # Dibujar barras de emociones en la parte izquierda
             bar_width = 150
@@ -204,6 +233,7 @@ class ReportesView(QWidget):
         nivel_label = QLabel("Nivel:")
         self.nivel_combo = QComboBox()
         self.load_niveles()
+        Database().catalog.catalog_changed.connect(self.load_niveles)
         self.nivel_combo.currentIndexChanged.connect(self.on_nivel_changed)
         filter_layout.addWidget(nivel_label)
         filter_layout.addWidget(self.nivel_combo)
@@ -394,6 +424,14 @@ class ReportesView(QWidget):
         control_layout.addWidget(self.export_realtime_btn)
         
         camera_panel.addLayout(control_layout)
+        
+        # Estado del modelo de emociones (compartido por toda la aplicación)
+        self.model_service = EmotionModelService()
+        self.model_status_label = QLabel(self.model_service.status_text())
+        self.model_status_label.setStyleSheet("color: #666;")
+        self.model_service.status_changed.connect(self.on_model_status_changed)
+        camera_panel.addWidget(self.model_status_label)
+        
         camera_emotion_layout.addLayout(camera_panel, 3)  # Proporción 3
         
         # Panel derecho: Resultados y estadísticas en tiempo real
@@ -462,6 +500,9 @@ class ReportesView(QWidget):
         except Exception as e:
             QMessageBox.warning(self, "Error", f"No se pudo iniciar el análisis: {str(e)}")
     
+    def on_model_status_changed(self, status):
+        self.model_status_label.setText(self.model_service.status_text())
+    
     def stop_emotion_analysis(self):
         """Detener análisis de emociones"""
         self.emotion_thread.stop_analysis()
@@ -514,39 +555,12 @@ class ReportesView(QWidget):
             fecha_fin = self.fecha_fin.date().toString("yyyy-MM-dd")
             
             # Análisis por hora del día
-            cursor.execute("""
-                SELECT 
-                    strftime('%H', fecha_registro) as hora,
-                    emocion,
-                    COUNT(*) as cantidad
-                FROM emociones 
-                WHERE fecha_registro BETWEEN ? AND ?
-                GROUP BY hora, emocion
-                ORDER BY hora, cantidad DESC
-            """, (fecha_inicio, fecha_fin))
+            cursor.execute(EMOCIONES_POR_HORA_SQL, (fecha_inicio, fecha_fin))
             
             hourly_data = cursor.fetchall()
             
             # Análisis por día de la semana
-            cursor.execute("""
-                SELECT 
-                    CASE strftime('%w', fecha_registro)
-                        WHEN '0' THEN 'Domingo'
-                        WHEN '1' THEN 'Lunes'
-                        WHEN '2' THEN 'Martes'
-                        WHEN '3' THEN 'Miércoles'
-                        WHEN '4' THEN 'Jueves'
-                        WHEN '5' THEN 'Viernes'
-                        WHEN '6' THEN 'Sábado'
-                    END as dia_semana,
-                    emocion,
-                    COUNT(*) as cantidad,
-                    AVG(confianza) as confianza_promedio
-                FROM emociones 
-                WHERE fecha_registro BETWEEN ? AND ?
-                GROUP BY dia_semana, emocion
-                ORDER BY cantidad DESC
-            """, (fecha_inicio, fecha_fin))
+            cursor.execute(EMOCIONES_POR_DIA_SQL, (fecha_inicio, fecha_fin))
             
             weekly_data = cursor.fetchall()
             conn.close()
@@ -677,13 +691,7 @@ class ReportesView(QWidget):
             conn = db.connect()
             cursor = conn.cursor()
             
-            cursor.execute("""
-                SELECT emocion, COUNT(*) as cantidad, AVG(confianza) as confianza_promedio
-                FROM emociones 
-                WHERE fecha_registro BETWEEN ? AND ?
-                GROUP BY emocion
-                ORDER BY cantidad DESC
-            """, (fecha_inicio, fecha_fin))
+            cursor.execute(EMOCIONES_RESUMEN_SQL, (fecha_inicio, fecha_fin))
             
             emotion_data = cursor.fetchall()
             
@@ -774,24 +782,7 @@ class ReportesView(QWidget):
                 story.append(Paragraph("<br/>", styles['Normal']))
                 
                 # Obtener datos de patrones por día
-                cursor.execute("""
-                    SELECT 
-                        CASE strftime('%w', fecha_registro)
-                            WHEN '0' THEN 'Domingo'
-                            WHEN '1' THEN 'Lunes'
-                            WHEN '2' THEN 'Martes'
-                            WHEN '3' THEN 'Miércoles'
-                            WHEN '4' THEN 'Jueves'
-                            WHEN '5' THEN 'Viernes'
-                            WHEN '6' THEN 'Sábado'
-                        END as dia_semana,
-                        emocion,
-                        COUNT(*) as cantidad
-                    FROM emociones 
-                    WHERE fecha_registro BETWEEN ? AND ?
-                    GROUP BY dia_semana, emocion
-                    ORDER BY dia_semana, cantidad DESC
-                """, (fecha_inicio, fecha_fin))
+                cursor.execute(EMOCIONES_POR_DIA_PDF_SQL, (fecha_inicio, fecha_fin))
                 
                 weekly_data = cursor.fetchall()
                 
@@ -892,18 +883,12 @@ class ReportesView(QWidget):
     def load_niveles(self):
         """Cargar niveles desde la base de datos"""
         try:
-            db = Database()
-            conn = db.connect()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nombre FROM niveles")
-            niveles = cursor.fetchall()
+            niveles = Database().catalog.niveles(order_by='id')
             
             self.nivel_combo.clear()
             self.nivel_combo.addItem("Todos", None)
             for nivel in niveles:
                 self.nivel_combo.addItem(nivel[1], nivel[0])
-            
-            conn.close()
         except Exception as e:
             print(f"Error cargando niveles: {e}")
     
@@ -915,23 +900,12 @@ class ReportesView(QWidget):
     def load_grados(self, nivel_id):
         """Cargar grados según el nivel seleccionado"""
         try:
-            db = Database()
-            conn = db.connect()
-            cursor = conn.cursor()
-            
-            if nivel_id:
-                cursor.execute("SELECT id, nombre FROM grados WHERE nivel_id = ?", (nivel_id,))
-            else:
-                cursor.execute("SELECT id, nombre FROM grados")
-            
-            grados = cursor.fetchall()
+            grados = Database().catalog.grados(nivel_id or None, order_by='id')
             
             self.grado_combo.clear()
             self.grado_combo.addItem("Todos", None)
             for grado in grados:
                 self.grado_combo.addItem(grado[1], grado[0])
-            
-            conn.close()
         except Exception as e:
             print(f"Error cargando grados: {e}")
     
@@ -943,23 +917,12 @@ class ReportesView(QWidget):
     def load_secciones(self, grado_id):
         """Cargar secciones según el grado seleccionado"""
         try:
-            db = Database()
-            conn = db.connect()
-            cursor = conn.cursor()
-            
-            if grado_id:
-                cursor.execute("SELECT id, nombre FROM secciones WHERE grado_id = ?", (grado_id,))
-            else:
-                cursor.execute("SELECT id, nombre FROM secciones")
-            
-            secciones = cursor.fetchall()
+            secciones = Database().catalog.secciones(grado_id or None, order_by='id')
             
             self.seccion_combo.clear()
             self.seccion_combo.addItem("Todas", None)
             for seccion in secciones:
                 self.seccion_combo.addItem(seccion[1], seccion[0])
-            
-            conn.close()
         except Exception as e:
             print(f"Error cargando secciones: {e}")
     
@@ -984,13 +947,7 @@ class ReportesView(QWidget):
             cursor = conn.cursor()
             
             # Obtener datos de emociones del período especificado
-            cursor.execute("""
-                SELECT emocion, COUNT(*) as cantidad, AVG(confianza) as confianza_promedio
-                FROM emociones 
-                WHERE fecha_registro BETWEEN ? AND ?
-                GROUP BY emocion
-                ORDER BY cantidad DESC
-            """, (fecha_inicio, fecha_fin))
+            cursor.execute(EMOCIONES_RESUMEN_SQL, (fecha_inicio, fecha_fin))
             
             results = cursor.fetchall()
             conn.close()
@@ -1176,6 +1133,13 @@ class ReportesView(QWidget):
             
             if not file_path:
                 return
+            
+            # No bloquear la interfaz esperando la carga del modelo
+            if not self.model_service.is_ready():
+                self.model_service.warmup()
+                QMessageBox.information(self, "Análisis de Imagen",
+                                        f"{self.model_service.status_text()}\nIntente nuevamente en unos segundos.")
+                return
                 
             # Cargar la imagen
             image = cv2.imread(file_path)
@@ -1183,11 +1147,18 @@ class ReportesView(QWidget):
                 QMessageBox.warning(self, "Error", "No se pudo cargar la imagen seleccionada.")
                 return
             
-            # Detectar emoción
-            emotion, confidence, emotions_scores = self.emotion_recognition.detect_emotion(image)
+            # Detectar los rostros una sola vez (imagen a resolución completa) y
+            # clasificarlos con una sola inferencia
+            faces = FaceDetectionStage(scale=1.0).detect(image)
+            primary = FaceDetectionStage.primary_face(
+                self.emotion_recognition.detect_emotions_batch(image, faces))
+            if not primary:
+                QMessageBox.information(self, "Análisis de Imagen", "No se detectaron rostros en la imagen seleccionada.")
+                return
+            emotion, confidence, emotions_scores = primary['emotion'], primary['confidence'], primary['scores']
             
             # Dibujar el mapeo facial y las barras de emociones
-            result_frame = self.emotion_thread.draw_facial_mapping_and_bars(image, emotions_scores)
+            result_frame = self.emotion_thread.draw_facial_mapping_and_bars(image, emotions_scores, faces)
             
             # Convertir a QPixmap y mostrar
             rgb_frame = cv2.cvtColor(result_frame, cv2.COLOR_BGR2RGB)
@@ -1208,6 +1179,8 @@ class ReportesView(QWidget):
             self.emotion_results.clear()
             self.emotion_results.append(f"🖼️ Análisis de imagen: {os.path.basename(file_path)}\n")
             self.emotion_results.append(f"[{timestamp}] Emoción dominante: {emotion.upper()} (Confianza: {confidence:.2f})\n")
+            if len(faces) > 1:
+                self.emotion_results.append(f"Rostros detectados: {len(faces)} (se muestra el más grande)\n")
             
             # Mostrar estadísticas
             self.emotion_stats.clear()
@@ -3,6 +3,8 @@ import os
 from PySide6.QtWidgets import QApplication
 from app.views.login_view import LoginWindow
 from app.models.database import Database
+from app.utils.emotion_recognition import EmotionModelService
+from app.utils.settings import get_setting
 
 def main():
     # Asegurar que existan los directorios necesarios
@@ -16,6 +18,10 @@ def main():
     app = QApplication(sys.argv)
     app.setApplicationName("KairosApp")
     
+    # Precargar el modelo de emociones mientras el usuario inicia sesión
+    if get_setting('emotion', 'preload_model', True):
+        EmotionModelService().warmup()
+    
     # Mostrar ventana de login
     login_window = LoginWindow()
     login_window.show()
@@ -0,0 +1,22 @@
+import pytest
+
+from app.models import database
+from app.models.database import Database
+
+
+@pytest.fixture
+def empty_db(tmp_path, monkeypatch):
+    """Base temporaria con las tablas base, sin migraciones aplicadas"""
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'database.db'))
+    monkeypatch.setattr(Database, '_instance', None)
+    db = Database()
+    db._create_tables()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def db(empty_db):
+    """Base temporaria con el esquema completo (tablas + migraciones)"""
+    empty_db.migrate_database()
+    return empty_db
@@ -0,0 +1,61 @@
+import pytest
+
+
+@pytest.fixture
+def conn(db):
+    with db.connection() as conn:
+        conn.executemany("INSERT INTO estudiantes (id, nombre, apellido, fecha_nacimiento) VALUES (?, ?, ?, ?)",
+                         [(1, 'Ana', 'Pérez', '2015-01-01'), (2, 'Luis', 'García', '2015-02-01')])
+        yield conn
+
+
+def _resumen(conn, estudiante_id):
+    row = conn.execute("SELECT presentes, ausentes, tardanzas FROM asistencias_resumen WHERE estudiante_id = ?",
+                       (estudiante_id,)).fetchone()
+    return tuple(row) if row else None
+
+
+def _insert(conn, estudiante_id, fecha, estado):
+    conn.execute("INSERT INTO asistencias (estudiante_id, fecha, hora, estado) VALUES (?, ?, '08:00', ?)",
+                 (estudiante_id, fecha, estado))
+
+
+def test_insert(conn):
+    _insert(conn, 1, '2024-03-01', 'presente')
+    _insert(conn, 1, '2024-03-02', 'tardanza')
+    _insert(conn, 1, '2024-03-03', None)
+    assert _resumen(conn, 1) == (1, 0, 1)
+    _insert(conn, 2, '2024-03-01', None)
+    assert _resumen(conn, 2) == (0, 0, 0)
+
+
+def test_update(conn):
+    _insert(conn, 1, '2024-03-01', 'presente')
+    conn.execute("UPDATE asistencias SET estado = NULL WHERE estudiante_id = 1")
+    assert _resumen(conn, 1) == (0, 0, 0)
+    conn.execute("UPDATE asistencias SET estado = 'ausente' WHERE estudiante_id = 1")
+    assert _resumen(conn, 1) == (0, 1, 0)
+    conn.execute("UPDATE asistencias SET estudiante_id = 2 WHERE estudiante_id = 1")
+    assert _resumen(conn, 1) == (0, 0, 0)
+    assert _resumen(conn, 2) == (0, 1, 0)
+
+
+def test_delete(conn):
+    _insert(conn, 1, '2024-03-01', 'presente')
+    _insert(conn, 1, '2024-03-02', None)
+    conn.execute("DELETE FROM asistencias WHERE estado IS NULL")
+    assert _resumen(conn, 1) == (1, 0, 0)
+    conn.execute("DELETE FROM asistencias WHERE estudiante_id = 1")
+    assert _resumen(conn, 1) == (0, 0, 0)
+
+
+def test_matches_recount(conn):
+    for i, estado in enumerate(['presente', None, 'ausente', 'tardanza', None, 'presente']):
+        _insert(conn, 1 + i % 2, f'2024-03-{i + 1:02d}', estado)
+    conn.execute("UPDATE asistencias SET estado = 'presente' WHERE estado IS NULL AND estudiante_id = 1")
+    conn.execute("DELETE FROM asistencias WHERE fecha = '2024-03-04'")
+    expected = conn.execute("""
+        SELECT estudiante_id, SUM(estado IS 'presente'), SUM(estado IS 'ausente'), SUM(estado IS 'tardanza')
+        FROM asistencias GROUP BY estudiante_id""").fetchall()
+    for estudiante_id, *counts in expected:
+        assert _resumen(conn, estudiante_id) == tuple(counts)
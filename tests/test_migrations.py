@@ -0,0 +1,35 @@
+from app.models.database import SCHEMA_MIGRATIONS, SCHEMA_VERSION
+
+
+def _tables(db):
+    with db.connection() as conn:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_versions_are_append_only():
+    versions = [version for version, _, _ in SCHEMA_MIGRATIONS]
+    assert versions == list(range(1, len(versions) + 1))
+    # Las bases ya marcadas con user_version 1 tienen los índices de esta migración
+    assert SCHEMA_MIGRATIONS[0][1] == "Índices para las consultas frecuentes"
+
+
+def test_fresh_database_is_fully_migrated(db):
+    assert db.get_schema_version() == SCHEMA_VERSION
+    assert {'asistencias_resumen', 'codigo_secuencias', 'alertas'} <= _tables(db)
+
+
+def test_database_at_version_1_gets_later_migrations(empty_db):
+    # Base migrada solo con los índices (user_version = 1)
+    with empty_db.connection() as conn:
+        for step in SCHEMA_MIGRATIONS[0][2]:
+            if callable(step):
+                step(conn.cursor())
+            else:
+                conn.execute(step)
+        conn.execute("PRAGMA user_version = 1")
+
+    empty_db.migrate_database()
+
+    assert empty_db.get_schema_version() == SCHEMA_VERSION
+    assert {'asistencias_resumen', 'codigo_secuencias'} <= _tables(empty_db)
+    assert empty_db.verify_query_plans() == []
@@ -0,0 +1,15 @@
+def test_hot_queries_use_indexes(db):
+    assert db.verify_query_plans() == []
+
+
+def test_full_table_scan_is_reported(db):
+    queries = {'por nombre': (('e',), "SELECT e.id FROM estudiantes e WHERE e.nombre = ?", ('Ana',))}
+    assert db.verify_query_plans(queries) == [('por nombre', 'SCAN e')]
+
+
+def test_full_index_scan_is_reported(db):
+    # Recorrer un índice completo sigue siendo leer todas las filas
+    queries = {'por sección': (('e',), "SELECT e.seccion_id FROM estudiantes e ORDER BY e.seccion_id", ())}
+    failures = db.verify_query_plans(queries)
+    assert len(failures) == 1
+    assert failures[0][1].startswith('SCAN e USING COVERING INDEX')
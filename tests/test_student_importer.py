@@ -0,0 +1,34 @@
+import pytest
+
+from app.models.student_importer import StudentImporter
+
+HEADER = ('nombres,primer_apellido,segundo_apellido,fecha_nacimiento,codigo,'
+          'nivel,grado,seccion,tutor_nombre,tutor_telefono')
+
+
+@pytest.fixture
+def catalog_db(db):
+    """Base temporaria con niveles, grados y secciones por defecto"""
+    conn = db.connect()
+    db._insert_initial_data(conn.cursor())
+    conn.commit()
+    conn.close()
+    return db
+
+
+def _import(tmp_path, *rows):
+    path = tmp_path / 'estudiantes.csv'
+    path.write_text('\n'.join((HEADER,) + rows) + '\n', encoding='utf-8')
+    return StudentImporter().import_file(path)
+
+
+def test_codigo_must_match_nivel_grado_seccion(catalog_db, tmp_path):
+    report = _import(tmp_path,
+                     'Ana,Ríos,Soto,2020-05-01,P3A500,Inicial,3 años,C,Rosa Soto,999111222',
+                     'Luis,Paz,Vega,2020-06-01,I3C007,Inicial,3 años,C,Eva Vega,999111333')
+    assert report.imported == 1
+    assert [(fila, mensaje.split(' no corresponde')[0]) for fila, mensaje, _ in report.errors] == [
+        (2, 'El código P3A500')]
+    # El código rechazado no adelanta el correlativo de su prefijo
+    assert catalog_db.reserve_codigos('P3A', 1) == ['P3A001']
+